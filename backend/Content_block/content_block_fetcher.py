@@ -1,17 +1,14 @@
 import json
 import requests
 import base64
-import os
 import re
-import time
-import html
-from fastapi import FastAPI, BackgroundTasks, HTTPException, Query
+from fastapi import FastAPI, HTTPException, Query
 from fastapi.middleware.cors import CORSMiddleware
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any
 from pydantic import BaseModel
 
-# Your custom conversion logic
-from liquid_to_jinja import convert_liquid_to_jinja
+# Your custom conversion logic, shared with the other services (backend/migration_core)
+from migration_core import BrazeCdnToMoenageCdn, add_converter_service, convert_liquid_to_jinja, get_http_session
 
 # ==============================================================================
 # SECTION 1: PYDANTIC MODELS
@@ -66,184 +63,7 @@ app.add_middleware(
 )
 
 # ==============================================================================
-# SECTION 3: BRAZE CDN TO MOENGAGE CDN CONVERSION
-# ==============================================================================
-
-class BrazeCdnToMoenageCdn:
-    @staticmethod
-    def __extract_braze_image_urls(payload):
-        decoded_payload = payload.encode().decode('unicode_escape')
-        decoded_payload = html.unescape(decoded_payload)
-        
-        # Comprehensive patterns to catch ALL Braze-related image URLs
-        patterns = [
-            # Original braze-images.com domain
-            r"https:\/\/braze-images\.com\/[^\"\s,]+",
-            
-            # All braze.com subdomains (including cdn-staging, assets, etc.)
-            r"https:\/\/[a-zA-Z0-9-]+\.braze\.com\/[^\"\s,]+",
-            
-            # Braze social icons on S3
-            r"https:\/\/braze-social-icons\.s3\.amazonaws\.com\/[^\"\s,]+",
-            
-            # Other potential Braze S3 buckets
-            r"https:\/\/braze-[a-zA-Z0-9-]+\.s3\.amazonaws\.com\/[^\"\s,]+",
-            
-            # Braze CDN variations
-            r"https:\/\/cdn[a-zA-Z0-9-]*\.braze\.com\/[^\"\s,]+",
-            
-            # Assets subdomain variations
-            r"https:\/\/assets[a-zA-Z0-9-]*\.braze\.com\/[^\"\s,]+",
-            
-            # Any other braze-related domains
-            r"https:\/\/[a-zA-Z0-9-]*braze[a-zA-Z0-9-]*\.[a-zA-Z0-9.-]+\/[^\"\s,]+",
-            
-            # Appboy legacy domains (Braze was formerly Appboy)
-            r"https:\/\/[a-zA-Z0-9-]*appboy[a-zA-Z0-9-]*\.[a-zA-Z0-9.-]+\/[^\"\s,]+",
-        ]
-
-        all_matches = []
-        for pattern in patterns:
-            matches = re.findall(pattern, decoded_payload, re.IGNORECASE)
-            all_matches.extend(matches)
-        
-        # Remove duplicates and filter for actual image files
-        unique_urls = list(set(all_matches))
-        
-        # Additional filtering for image file extensions and valid URLs
-        image_extensions = ('.jpg', '.jpeg', '.png', '.gif', '.webp', '.svg', '.bmp', '.ico')
-        filtered_urls = []
-        
-        for url in unique_urls:
-            # Remove any trailing quotes or spaces
-            url = url.strip('\'"')
-            
-            # Check if it's likely an image (has image extension or no extension but comes from image CDN)
-            url_lower = url.lower()
-            is_image = (
-                any(ext in url_lower for ext in image_extensions) or
-                'image' in url_lower or
-                'icon' in url_lower or
-                'logo' in url_lower or
-                'assets/images' in url_lower or
-                url_lower.endswith('/') == False  # Could be dynamic image URL without extension
-            )
-            
-            if is_image:
-                filtered_urls.append(url)
-        
-        return filtered_urls
-
-    @staticmethod
-    def __download_image(url):
-        try:
-            # Add headers to mimic a real browser request
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-                'Accept': 'image/webp,image/apng,image/svg+xml,image/*,*/*;q=0.8',
-                'Accept-Language': 'en-US,en;q=0.9',
-            }
-            
-            response = requests.get(url, headers=headers, timeout=30)
-            if response.status_code == 200:
-                # Try to get filename from URL
-                url_path = url.split('/')[-1].split('?')[0]
-                
-                # If no proper filename, generate one based on content type
-                if not url_path or '.' not in url_path:
-                    content_type = response.headers.get('content-type', '').lower()
-                    if 'image/jpeg' in content_type or 'image/jpg' in content_type:
-                        extension = '.jpg'
-                    elif 'image/png' in content_type:
-                        extension = '.png'
-                    elif 'image/gif' in content_type:
-                        extension = '.gif'
-                    elif 'image/webp' in content_type:
-                        extension = '.webp'
-                    elif 'image/svg' in content_type:
-                        extension = '.svg'
-                    else:
-                        extension = '.jpg'  # Default fallback
-                    
-                    file_name = f"braze_image_{int(time.time())}{extension}"
-                else:
-                    file_name = url_path
-                
-                # Ensure filename is safe
-                file_name = re.sub(r'[^\w\-_\.]', '_', file_name)
-                
-                with open(file_name, 'wb') as file:
-                    file.write(response.content)
-                return file_name
-            else:
-                print(f"Failed to download image from {url}: HTTP {response.status_code}")
-                return None
-        except Exception as e:
-            print(f"Error downloading image from {url}: {str(e)}")
-            return None
-
-    @staticmethod
-    def __upload_image(file_name, headers):
-        origin = headers.get('origin', 'https://dashboard-01.moengage.com').rstrip('/')
-        moe_image_cdn_url = f'{origin}/v1/platform/services/upload-file'
-        try:
-            with open(file_name, 'rb') as file:
-                files = {'file': (file_name, file)}
-                upload_headers = {k: v for k, v in headers.items() if k.lower() != 'content-type'}
-                response = requests.post(moe_image_cdn_url, headers=upload_headers, files=files, timeout=30)
-            if response.status_code == 201:
-                return response.json().get('url', '')
-            return None
-        except Exception:
-            return None
-
-    @staticmethod
-    def process_images(payload, headers):
-        if not payload or not isinstance(payload, str): 
-            return payload or ""
-        
-        print(f"Processing images in content block...")
-        image_urls = BrazeCdnToMoenageCdn.__extract_braze_image_urls(payload)
-        
-        if not image_urls:
-            print("No Braze image URLs found in content block")
-            return payload
-        
-        print(f"Found {len(image_urls)} Braze image URLs:")
-        for i, url in enumerate(image_urls, 1):
-            print(f"  {i}. {url}")
-        
-        for url in image_urls:
-            print(f"\nProcessing image: {url}")
-            
-            # Download the image
-            file_name = BrazeCdnToMoenageCdn.__download_image(url)
-            if file_name:
-                print(f"  ✅ Downloaded as: {file_name}")
-                
-                # Upload to MoEngage
-                moe_cdn_url = BrazeCdnToMoenageCdn.__upload_image(file_name, headers)
-                if moe_cdn_url:
-                    print(f"  ✅ Uploaded to MoEngage: {moe_cdn_url}")
-                    payload = payload.replace(url, moe_cdn_url)
-                    print(f"  ✅ Replaced in content")
-                else:
-                    print(f"  ❌ Failed to upload to MoEngage")
-                
-                # Clean up downloaded file
-                try: 
-                    os.remove(file_name)
-                    print(f"  🗑️ Cleaned up temporary file")
-                except Exception as e:
-                    print(f"  ⚠️ Failed to clean up file {file_name}: {e}")
-            else:
-                print(f"  ❌ Failed to download image")
-        
-        print(f"Image processing completed for content block")
-        return payload
-
-# ==============================================================================
-# SECTION 4: HELPER FUNCTIONS
+# SECTION 3: HELPER FUNCTIONS
 # ==============================================================================
 
 def get_moengage_basic_auth_token(username: str, password: str) -> str:
@@ -290,7 +110,7 @@ def fetch_braze_content_blocks(braze_credentials: BrazeCredentials) -> List[Dict
     while True:
         params = {'limit': limit, 'start': start, 'app_group_id': braze_credentials.app_group_id}
         try:
-            response = requests.get(braze_api_endpoint, headers=braze_headers, params=params)
+            response = get_http_session().get(braze_api_endpoint, headers=braze_headers, params=params)
             response.raise_for_status()
             data = response.json()
             # Handle both possible response structures
@@ -319,7 +139,7 @@ def fetch_braze_content_blocks(braze_credentials: BrazeCredentials) -> List[Dict
         try:
             # Fetch individual content block to get full content
             individual_url = f"{braze_credentials.base_url}/engagement/content_blocks/{block_id}"
-            individual_response = requests.get(individual_url, headers=braze_headers)
+            individual_response = get_http_session().get(individual_url, headers=braze_headers)
             
             if individual_response.status_code == 200:
                 individual_data = individual_response.json()
@@ -383,7 +203,7 @@ def migrate_single_content_block(
         
         # Process Braze CDN images and convert them to MoEngage CDN
         print(f"🖼️  Processing CDN images...")
-        processed_content = BrazeCdnToMoenageCdn.process_images(transformed_content, cdn_headers)
+        processed_content = BrazeCdnToMoenageCdn.process_images(transformed_content, cdn_headers, workspace=moengage_credentials.app_key)
         print(f"✅ Image processing completed")
         
         # Prepare MoEngage payload - simplified format that MoEngage accepts
@@ -423,7 +243,7 @@ def migrate_single_content_block(
         print(f"🌐 URL: {moengage_credentials.api_url}")
         print(f"🌐 Payload size: {len(json.dumps(moengage_payload))} bytes")
         
-        response = requests.post(
+        response = get_http_session().post(
             moengage_credentials.api_url, 
             headers=moengage_headers, 
             data=json.dumps(moengage_payload)
@@ -465,7 +285,7 @@ def migrate_single_content_block(
         }
 
 # ==============================================================================
-# SECTION 5: API ENDPOINTS
+# SECTION 4: API ENDPOINTS
 # ==============================================================================
 
 @app.get("/health")
@@ -473,6 +293,8 @@ def health_check():
     """Health check endpoint."""
     return {"status": "healthy", "service": "Content Block Migration API"}
 
+add_converter_service(app)
+
 @app.get("/braze/content-blocks")
 def get_braze_content_blocks(
     session_id: str = Query(..., description="Braze session ID"),
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Benchmark for Braze image URL extraction.
+
+Generates reproducible ~100 KB email HTML with Braze, Appboy and unrelated
+image URLs, and times extract_braze_image_urls() against the previous
+implementation (eight IGNORECASE findall scans over an unicode_escape +
+html.unescape copy), after checking that both find the same URLs.
+
+Usage (from the backend directory):
+    python benchmarks/bench_image_extraction.py
+    python benchmarks/bench_image_extraction.py --size 102400 --repeat 50 --min-speedup 2
+
+Exits with status 1 when the two disagree, or when the speedup is below
+--min-speedup.
+"""
+
+import re
+import sys
+import html
+import time
+import random
+import argparse
+from typing import Dict, List, Any
+
+from migration_core.image_pipeline import extract_braze_image_urls
+
+# ==============================================================================
+# 1. PREVIOUS IMPLEMENTATION
+# ==============================================================================
+LEGACY_PATTERNS = [
+    r"https:\/\/braze-images\.com\/[^\"\s,]+",
+    r"https:\/\/[a-zA-Z0-9-]+\.braze\.com\/[^\"\s,]+",
+    r"https:\/\/braze-social-icons\.s3\.amazonaws\.com\/[^\"\s,]+",
+    r"https:\/\/braze-[a-zA-Z0-9-]+\.s3\.amazonaws\.com\/[^\"\s,]+",
+    r"https:\/\/cdn[a-zA-Z0-9-]*\.braze\.com\/[^\"\s,]+",
+    r"https:\/\/assets[a-zA-Z0-9-]*\.braze\.com\/[^\"\s,]+",
+    r"https:\/\/[a-zA-Z0-9-]*braze[a-zA-Z0-9-]*\.[a-zA-Z0-9.-]+\/[^\"\s,]+",
+    r"https:\/\/[a-zA-Z0-9-]*appboy[a-zA-Z0-9-]*\.[a-zA-Z0-9.-]+\/[^\"\s,]+",
+]
+
+def legacy_extract_braze_image_urls(payload: str) -> List[str]:
+    decoded_payload = html.unescape(payload.encode().decode('unicode_escape'))
+    all_matches = []
+    for pattern in LEGACY_PATTERNS:
+        all_matches.extend(re.findall(pattern, decoded_payload, re.IGNORECASE))
+    image_extensions = ('.jpg', '.jpeg', '.png', '.gif', '.webp', '.svg', '.bmp', '.ico')
+    filtered_urls = []
+    for url in set(all_matches):
+        url = url.strip('\'"')
+        url_lower = url.lower()
+        if (any(ext in url_lower for ext in image_extensions) or 'image' in url_lower or 'icon' in url_lower
+                or 'logo' in url_lower or not url_lower.endswith('/')):
+            filtered_urls.append(url)
+    return filtered_urls
+
+# ==============================================================================
+# 2. CORPUS GENERATION
+# ==============================================================================
+IMAGE_HOSTS = [
+    'braze-images.com/appboy/communication/assets/image_assets/images',
+    'cdn.braze.com/appboy/communication/marketing/content_cards_message_variations/images',
+    'assets.braze.com/logos',
+    'braze-social-icons.s3.amazonaws.com/icons',
+    'appboy-images.com/appboy/communication/assets/image_assets/images',
+    'images.example.com/static',
+    'fonts.googleapis.com/css',
+]
+
+ROW = (
+    '<tr><td class="row-{n}" style="padding:12px 24px;font-family:Helvetica,Arial,sans-serif;color:#444">\n'
+    '<p style="margin:0 0 12px 0">Lorem ipsum dolor sit amet, consectetur adipiscing elit, sed do eiusmod '
+    'tempor incididunt ut labore et dolore magna aliqua.</p>\n'
+    '<img src="https://{host}/{n}.png?{cache_buster}" width="600" alt="">\n'
+    '<a href="https://example.com/offer?utm_source=braze&amp;utm_content=block-{n}">Shop now</a>\n'
+    '</td></tr>\n'
+)
+
+def generate_html(size: int, seed: int = 42) -> str:
+    """Builds email HTML of about `size` characters"""
+    rng = random.Random(seed)
+    parts = ['<html><head><style>body{margin:0}</style></head><body><table>\n']
+    length = len(parts[0])
+    n = 0
+    while length < size:
+        row = ROW.format(n=n, host=rng.choice(IMAGE_HOSTS), cache_buster=rng.randint(10 ** 9, 10 ** 10))
+        parts.append(row)
+        length += len(row)
+        n += 1
+    parts.append('</table></body></html>')
+    return ''.join(parts)
+
+# ==============================================================================
+# 3. MEASUREMENT
+# ==============================================================================
+def _best_time(extract, payload: str, repeat: int) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        extract(payload)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def run_benchmark(size: int, repeat: int) -> Dict[str, Any]:
+    payload = generate_html(size)
+    # A JSON-escaped copy takes the unicode_escape decoding path
+    escaped_payload = payload.replace('"', '\\"').replace('\n', '\\n')
+    results = {}
+    for name, text in (('html', payload), ('json_escaped_html', escaped_payload)):
+        legacy_urls = legacy_extract_braze_image_urls(text)
+        urls = extract_braze_image_urls(text)
+        legacy_seconds = _best_time(legacy_extract_braze_image_urls, text, repeat)
+        seconds = _best_time(extract_braze_image_urls, text, repeat)
+        results[name] = {
+            'bytes': len(text),
+            'urls': len(urls),
+            'same_urls': set(urls) == set(legacy_urls),
+            'legacy_ms': legacy_seconds * 1000,
+            'single_pass_ms': seconds * 1000,
+            'speedup': legacy_seconds / seconds if seconds else 0.0,
+        }
+    return results
+
+def print_report(results: Dict[str, Dict[str, Any]]) -> None:
+    print(f"{'payload':<20} {'bytes':>8} {'urls':>6} {'legacy ms':>10} {'1-pass ms':>10} {'speedup':>8}")
+    print("-" * 67)
+    for name, r in results.items():
+        print(f"{name:<20} {r['bytes']:>8} {r['urls']:>6} {r['legacy_ms']:>10.3f} {r['single_pass_ms']:>10.3f} {r['speedup']:>7.1f}x")
+
+# ==============================================================================
+# 4. COMMAND LINE
+# ==============================================================================
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark single-pass Braze image URL extraction against the previous eight-scan version.")
+    parser.add_argument('--size', type=int, default=100 * 1024, help="Payload size in characters")
+    parser.add_argument('--repeat', type=int, default=20, help="Times each extraction runs; the best time is kept")
+    parser.add_argument('--min-speedup', type=float, default=1.0, help="Fail when the speedup is below this")
+    args = parser.parse_args()
+
+    results = run_benchmark(args.size, args.repeat)
+    print_report(results)
+
+    failures = [name for name, r in results.items() if not r['same_urls']]
+    if failures:
+        print(f"\n❌ Extracted URLs differ from the previous implementation: {', '.join(failures)}")
+        return 1
+    slow = [name for name, r in results.items() if r['speedup'] < args.min_speedup]
+    if slow:
+        print(f"\n❌ Speedup below {args.min_speedup:.1f}x: {', '.join(slow)}")
+        return 1
+    print(f"\n✅ Same URLs as the previous implementation, at least {args.min_speedup:.1f}x faster")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
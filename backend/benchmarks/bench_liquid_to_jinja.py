@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+Offline benchmark for the Liquid -> Jinja converter.
+
+Generates a reproducible corpus of SMS bodies, push titles, 10 KB content
+blocks and 100 KB Liquid-dense email HTML, converts every template, and
+reports throughput (MB/s) and p50/p99 latency per size class.
+
+Usage (from the backend directory):
+    python benchmarks/bench_liquid_to_jinja.py
+    python benchmarks/bench_liquid_to_jinja.py --save-baseline baseline.json
+    python benchmarks/bench_liquid_to_jinja.py --baseline baseline.json --max-regression 15
+
+With --baseline, exits with status 1 when the throughput of any size class
+drops by more than --max-regression percent.
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import contextlib
+from typing import Dict, List, Any
+
+# The conversion cache would turn every repeat into a lookup
+os.environ.setdefault('LIQUID_CACHE_MAX_ENTRIES', '0')
+
+from migration_core.liquid_to_jinja import convert_liquid_to_jinja
+
+# ==============================================================================
+# 1. CORPUS GENERATION
+# ==============================================================================
+ATTRIBUTES = ['first_name', 'last_name', 'city', 'tier', 'points', 'language', 'last_order_id', 'plan-type']
+CAMPAIGN_WORDS = ['Your', 'exclusive', 'offer', 'ends', 'soon', 'New', 'arrivals', 'just', 'for', 'you', 'Save', 'today']
+
+SMS_TEMPLATES = [
+    "Hi {{{{custom_attribute.${{{attr}}}}}}}, your code {code} expires tonight. Reply STOP to opt out.",
+    "{{% if custom_attribute.${{{attr}}} == \"gold\" %}}Gold perks unlocked!{{% else %}}Earn {code} points today.{{% endif %}}",
+    "{{{{ {attr} | upcase }}}}: your order {code} has shipped. Track: https://example.com/t?utm_content=sms-{code}",
+]
+
+PUSH_TEMPLATES = [
+    "{word} {{{{custom_attribute.${{{attr}}}}}}}!",
+    "{{{{campaign.${{name}}}}}} - {word} {word2}",
+    "{{% if custom_attribute.${{{attr}}} %}}{word}{{% else %}}{word2}{{% endif %}}",
+]
+
+MARKUP_ROW = (
+    '<tr><td class="row-{n}" style="padding:12px 24px;font-family:Helvetica,Arial,sans-serif;color:#444">\n'
+    '<p style="margin:0 0 12px 0">Lorem ipsum dolor sit amet, consectetur adipiscing elit, sed do eiusmod '
+    'tempor incididunt ut labore et dolore magna aliqua.</p>\n'
+    '<img src="https://braze-images.com/appboy/communication/assets/image_assets/images/{n}.png" width="600" alt="">\n'
+    '</td></tr>\n'
+)
+
+LIQUID_ROW = (
+    '<tr><td class="block-{n}">\n'
+    '<p>Hi {{{{custom_attribute.${{{attr}}}}}}}, welcome back to {{{{campaign.${{name}}}}}}!</p>\n'
+    '{{% if custom_attribute.${{tier}} == "gold" %}}<span>Gold</span>'
+    '{{% elsif custom_attribute.${{tier}} == "silver" %}}<span>Silver</span>'
+    '{{% else %}}<span>Join</span>{{% endif %}}\n'
+    '{{% assign discount-{n} = {n} | times: 2 %}}\n'
+    '{{% case custom_attribute.${{language}} %}}{{% when "en" %}}Hello{{% when "fr" %}}Bonjour'
+    '{{% else %}}Hi{{% endcase %}}\n'
+    '{{% capture greeting_{n} %}}Dear {{{{ {attr} | capitalize }}}}{{% endcapture %}}\n'
+    '<a href="https://example.com/offer?utm_source=braze&utm_content=promo-block{n}">Shop now</a>\n'
+    '{{% comment %}} block {n} {{% endcomment %}}\n'
+    '</td></tr>\n'
+)
+
+def _fill(rng: random.Random, template: str, n: int = 0) -> str:
+    return template.format(
+        attr=rng.choice(ATTRIBUTES),
+        code=rng.randint(1000, 999999),
+        word=rng.choice(CAMPAIGN_WORDS),
+        word2=rng.choice(CAMPAIGN_WORDS),
+        n=n
+    )
+
+def _html_body(rng: random.Random, size: int, liquid_ratio: float) -> str:
+    parts = ['<html><head><style>body{margin:0}</style></head><body><table>\n']
+    length = len(parts[0])
+    n = 0
+    while length < size:
+        row = _fill(rng, LIQUID_ROW if rng.random() < liquid_ratio else MARKUP_ROW, n)
+        parts.append(row)
+        length += len(row)
+        n += 1
+    parts.append('</table></body></html>')
+    return ''.join(parts)
+
+def generate_corpus(seed: int = 42, samples: Dict[str, int] = None) -> Dict[str, List[str]]:
+    """Builds the benchmark corpus, keyed by size class"""
+    samples = samples or {'sms': 500, 'push_title': 500, 'content_block_10kb': 50, 'email_100kb': 10}
+    rng = random.Random(seed)
+    return {
+        'sms': [_fill(rng, rng.choice(SMS_TEMPLATES)) for _ in range(samples['sms'])],
+        'push_title': [_fill(rng, rng.choice(PUSH_TEMPLATES)) for _ in range(samples['push_title'])],
+        'content_block_10kb': [_html_body(rng, 10 * 1024, 0.3) for _ in range(samples['content_block_10kb'])],
+        'email_100kb': [_html_body(rng, 100 * 1024, 0.8) for _ in range(samples['email_100kb'])],
+    }
+
+# ==============================================================================
+# 2. MEASUREMENT
+# ==============================================================================
+def _percentile(sorted_values: List[float], fraction: float) -> float:
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+def run_benchmark(corpus: Dict[str, List[str]], repeat: int = 3) -> Dict[str, Dict[str, Any]]:
+    """Converts every template `repeat` times and summarizes each size class"""
+    results = {}
+    for size_class, templates in corpus.items():
+        latencies = []
+        total_bytes = 0
+        # Some filter conversions print debug output on every match
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            for _ in range(repeat):
+                for template in templates:
+                    start = time.perf_counter()
+                    convert_liquid_to_jinja(template)
+                    latencies.append(time.perf_counter() - start)
+                    total_bytes += len(template.encode('utf-8'))
+        latencies.sort()
+        total_seconds = sum(latencies)
+        results[size_class] = {
+            'templates': len(templates),
+            'avg_bytes': total_bytes // len(latencies),
+            'mb_per_s': (total_bytes / (1024 * 1024)) / total_seconds if total_seconds else 0.0,
+            'p50_ms': _percentile(latencies, 0.50) * 1000,
+            'p99_ms': _percentile(latencies, 0.99) * 1000,
+        }
+    return results
+
+def check_regression(results: Dict[str, Dict[str, Any]], baseline: Dict[str, Dict[str, Any]], max_regression: float) -> List[str]:
+    """Lists the size classes whose throughput fell more than max_regression percent below the baseline"""
+    failures = []
+    for size_class, base in baseline.items():
+        current = results.get(size_class)
+        if not current or not base.get('mb_per_s'):
+            continue
+        drop = (base['mb_per_s'] - current['mb_per_s']) / base['mb_per_s'] * 100
+        if drop > max_regression:
+            failures.append(
+                f"{size_class}: {current['mb_per_s']:.2f} MB/s vs baseline {base['mb_per_s']:.2f} MB/s "
+                f"({drop:.1f}% slower, limit {max_regression:.1f}%)"
+            )
+    return failures
+
+def print_report(results: Dict[str, Dict[str, Any]]) -> None:
+    print(f"{'size class':<20} {'templates':>9} {'avg bytes':>10} {'MB/s':>9} {'p50 ms':>9} {'p99 ms':>9}")
+    print("-" * 71)
+    for size_class, r in results.items():
+        print(f"{size_class:<20} {r['templates']:>9} {r['avg_bytes']:>10} {r['mb_per_s']:>9.2f} {r['p50_ms']:>9.3f} {r['p99_ms']:>9.3f}")
+
+# ==============================================================================
+# 3. COMMAND LINE
+# ==============================================================================
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the Liquid -> Jinja converter on a generated corpus.")
+    parser.add_argument('--seed', type=int, default=42, help="Corpus random seed")
+    parser.add_argument('--repeat', type=int, default=3, help="Times each template is converted")
+    parser.add_argument('--baseline', help="JSON results file to compare against")
+    parser.add_argument('--max-regression', type=float, default=10.0, help="Allowed throughput drop in percent")
+    parser.add_argument('--save-baseline', help="Write these results to a JSON file")
+    args = parser.parse_args()
+
+    corpus = generate_corpus(args.seed)
+    results = run_benchmark(corpus, args.repeat)
+    print_report(results)
+
+    if args.save_baseline:
+        with open(args.save_baseline, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"\n💾 Baseline written to {args.save_baseline}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        failures = check_regression(results, baseline, args.max_regression)
+        if failures:
+            print("\n❌ Throughput regression:")
+            for failure in failures:
+                print(f"   {failure}")
+            return 1
+        print(f"\n✅ No size class regressed by more than {args.max_regression:.1f}%")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Scaling benchmark for the Liquid -> Jinja converter on pathological input.
+
+Builds unbalanced blocks (case/capture/unless/comment with no closer),
+unterminated {% %} tags and {{ }} outputs, filter arguments that never
+close (string filters, assign/split, join, set/replace, set/split,
+for/in), long runs with no complete truncate filter and long URLs whose
+utm_content= values have no hyphen to rewrite, at increasing sizes up to
+1 MB, and checks that conversion time grows linearly with input size.
+convert_liquid_to_jinja() and convert_liquid_to_jinja_stream() are timed
+separately, since the first only streams bodies past LIQUID_STREAM_THRESHOLD.
+
+Usage (from the backend directory):
+    python benchmarks/bench_pathological.py
+    python benchmarks/bench_pathological.py --sizes 65536 262144 1048576 --max-growth 2
+    python benchmarks/bench_pathological.py --path stream
+
+Exits with status 1 when the time per byte at the largest size is more than
+--max-growth times the time per byte at the smallest, or when a single
+conversion takes longer than --time-limit seconds.
+"""
+
+import os
+import sys
+import time
+import argparse
+import contextlib
+from typing import Callable, Dict, List, Any
+
+# The conversion cache would turn every repeat into a lookup
+os.environ.setdefault('LIQUID_CACHE_MAX_ENTRIES', '0')
+# Otherwise convert_liquid_to_jinja() would switch to streaming part way up the sizes
+os.environ.setdefault('LIQUID_STREAM_THRESHOLD', str(2 ** 62))
+
+from migration_core.liquid_to_jinja import convert_liquid_to_jinja, convert_liquid_to_jinja_stream
+
+# ==============================================================================
+# 1. PATHOLOGICAL INPUTS
+# ==============================================================================
+def _repeat(head: str, unit: str, tail: str = '') -> Callable[[int], str]:
+    return lambda size: head + unit * max(1, (size - len(head) - len(tail)) // len(unit)) + tail
+
+# Each closer comes first, so no opener after it can ever be closed
+PATHOLOGICAL_INPUTS: Dict[str, Callable[[int], str]] = {
+    'unclosed_case': _repeat('{% endcase %}', '{% case x %}<p>a</p>\n'),
+    'unclosed_case_one_line': _repeat('{% endcase %}', '{% case x %}<p>a</p>'),
+    'unclosed_capture': _repeat('{% endcapture %}', '{% capture x %}<p>a</p>\n'),
+    'unclosed_unless': _repeat('{% endunless %}', '{% unless x %}<p>a</p>\n'),
+    'unclosed_comment': _repeat('{% endcomment %}', '{% comment %}<p>a</p>\n'),
+    'unterminated_tags': _repeat('{{ a }}', '{% if x <p>a</p>\n'),
+    'unterminated_tags_one_line': _repeat('{{ a }}', '{% if x <p>a</p>'),
+    'unterminated_outputs_one_line': _repeat('{% x %}', '{{ a | plus: <p>'),
+    'unterminated_string_filters_one_line': _repeat('{{ a }}', '{{ x | remove: a <b>y</b>'),
+    'unterminated_assign_split_one_line': _repeat('{{ a }}', '{% assign x = "a" | split: "b <p>'),
+    'unterminated_custom_attribute_join_one_line': _repeat('{{ a }}', '{{custom_attribute.${a}}} | join: "b <p>'),
+    'unterminated_set_replace_one_line': _repeat('{{ a }}', "{% set x = y | replace: 'a', 'b <p>"),
+    'unterminated_set_split_one_line': _repeat('{{ a }}', "{% set x = y | split: 'a <p>"),
+    'unterminated_for_in_one_line': _repeat('{{ a }}', '{% for x in y <p>'),
+    'unfiltered_truncate_run': _repeat('{{ a | truncate: 2 }}', '{{a|truncate:'),
+    # URL heads and utm_content= values the hyphen rewrite can never complete
+    'utm_content_after_url_heads': _repeat('', 'https://a', 'utm_content=x'),
+    'utm_content_repeated_in_one_value': _repeat('https://a.com/?', 'utm_content=', '&utm_content=a'),
+}
+
+DEFAULT_SIZES = [64 * 1024, 256 * 1024, 1024 * 1024]
+
+CONVERSION_PATHS: Dict[str, Callable[[str], str]] = {
+    'convert': convert_liquid_to_jinja,
+    'stream': lambda template: ''.join(convert_liquid_to_jinja_stream(template)),
+}
+
+# ==============================================================================
+# 2. MEASUREMENT
+# ==============================================================================
+def _time_conversion(convert: Callable[[str], str], template: str, repeat: int) -> float:
+    best = float('inf')
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        for _ in range(repeat):
+            start = time.perf_counter()
+            convert(template)
+            best = min(best, time.perf_counter() - start)
+    return best
+
+def run_benchmark(sizes: List[int], repeat: int = 3, time_limit: float = 10.0,
+                  convert: Callable[[str], str] = convert_liquid_to_jinja) -> Dict[str, Dict[str, Any]]:
+    """
+    Times convert on every pathological input at each size, smallest first.
+    An input that exceeds time_limit is not tried at the larger sizes.
+    """
+    results = {}
+    for name, build in PATHOLOGICAL_INPUTS.items():
+        timings = {}
+        for size in sorted(sizes):
+            template = build(size)
+            seconds = _time_conversion(convert, template, repeat)
+            timings[len(template)] = seconds
+            if seconds > time_limit:
+                break
+        smallest, largest = min(timings), max(timings)
+        growth = (timings[largest] / largest) / (timings[smallest] / smallest) if timings[smallest] else 0.0
+        results[name] = {
+            'timings': timings,
+            'growth': growth,
+            'timed_out': max(timings.values()) > time_limit,
+            'complete': len(timings) == len(sizes)
+        }
+    return results
+
+def check_scaling(results: Dict[str, Dict[str, Any]], max_growth: float) -> List[str]:
+    """Lists the inputs whose time per byte grew more than max_growth times, or that timed out"""
+    failures = []
+    for name, r in results.items():
+        if r['timed_out'] or not r['complete']:
+            failures.append(f"{name}: exceeded the time limit at {max(r['timings'])} bytes")
+        elif r['growth'] > max_growth:
+            failures.append(f"{name}: time per byte grew {r['growth']:.1f}x from smallest to largest input (limit {max_growth:.1f}x)")
+    return failures
+
+def print_report(results: Dict[str, Dict[str, Any]], sizes: List[int], path: str) -> None:
+    header = ''.join(f"{f'{size // 1024} KB':>12}" for size in sorted(sizes))
+    print(f"\n{path}")
+    print(f"{'input':<46}{header}{'growth':>9}")
+    print("-" * (55 + 12 * len(sizes)))
+    for name, r in results.items():
+        cells = ''.join(f"{seconds * 1000:>10.1f}ms" for seconds in r['timings'].values())
+        cells += ' ' * 12 * (len(sizes) - len(r['timings']))
+        print(f"{name:<46}{cells}{r['growth']:>8.2f}x")
+
+# ==============================================================================
+# 3. COMMAND LINE
+# ==============================================================================
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Check that the Liquid -> Jinja converter scales linearly on pathological input.")
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES, help="Input sizes in bytes")
+    parser.add_argument('--repeat', type=int, default=3, help="Times each input is converted; the best time is kept")
+    parser.add_argument('--max-growth', type=float, default=2.0, help="Allowed growth of time per byte from the smallest to the largest size")
+    parser.add_argument('--time-limit', type=float, default=10.0, help="Seconds a single conversion may take")
+    parser.add_argument('--path', choices=[*CONVERSION_PATHS, 'both'], default='both', help="Conversion path to time")
+    args = parser.parse_args()
+
+    failures = []
+    for path, convert in CONVERSION_PATHS.items():
+        if args.path not in (path, 'both'):
+            continue
+        results = run_benchmark(args.sizes, args.repeat, args.time_limit, convert)
+        print_report(results, args.sizes, path)
+        failures += [f"{path}: {failure}" for failure in check_scaling(results, args.max_growth)]
+
+    if failures:
+        print("\n❌ Super-linear scaling:")
+        for failure in failures:
+            print(f"   {failure}")
+        return 1
+    print(f"\n✅ Every input scaled within {args.max_growth:.1f}x of linear up to {max(args.sizes) // 1024} KB")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,13 +1,23 @@
 # braze_api.py
-import requests
+import os
 import json
 import time
-from typing import Dict, List, Any, Optional, Generator
+import asyncio
+import base64
+import bisect
+import hashlib
+from http.cookiejar import DefaultCookiePolicy
+from typing import Dict, List, Any, Optional, AsyncGenerator, Callable, Sequence
 from urllib.parse import urlparse
 
-from fastapi import FastAPI, Header, HTTPException, Request
+import httpx
+
+from fastapi import FastAPI, Header, HTTPException, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import StreamingResponse
+from fastapi.responses import JSONResponse, StreamingResponse
+
+# Shared conversion package (backend/migration_core), for its metrics
+from migration_core import add_converter_service
 
 # --- FastAPI App Initialization ---
 app = FastAPI(
@@ -27,17 +37,191 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Total-Count"],
 )
 
 
+# --- Async HTTP Client ---
+# One client per process keeps Braze connections alive across requests
+# without blocking the event loop, so one slow export stalls no one else
+HTTP_POOL_MAXSIZE = int(os.getenv('HTTP_POOL_MAXSIZE', '10'))
+HTTP_MAX_CONNECTIONS = int(os.getenv('HTTP_MAX_CONNECTIONS', '100'))
+HTTP_MAX_RETRIES = int(os.getenv('HTTP_MAX_RETRIES', '3'))
+
+_http_client: Optional[httpx.AsyncClient] = None
+
+def _get_http_client() -> httpx.AsyncClient:
+    global _http_client
+    if _http_client is None:
+        limits = httpx.Limits(max_connections=HTTP_MAX_CONNECTIONS, max_keepalive_connections=HTTP_POOL_MAXSIZE)
+        # Retries connection failures; HTTP errors are handled by the callers
+        transport = httpx.AsyncHTTPTransport(retries=HTTP_MAX_RETRIES, limits=limits)
+        _http_client = httpx.AsyncClient(transport=transport, timeout=30, follow_redirects=True)
+        # Shared by every user, so no response may set cookies for the next one
+        _http_client.cookies.jar.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+    return _http_client
+
+@app.on_event("shutdown")
+async def _close_http_client():
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+
+
+# --- Braze Authentication Cache ---
+# Credentials that passed the connection test are trusted for this long, so
+# per-campaign detail calls skip the test request; a 401 forgets them early
+BRAZE_AUTH_TTL_SECONDS = int(os.getenv('BRAZE_AUTH_TTL_SECONDS', '300'))
+BRAZE_AUTH_CACHE_MAX_ENTRIES = 1024
+
+# auth key -> (expiry time, base_url, headers)
+_braze_auth_cache: Dict[bytes, tuple[float, str, Dict[str, str]]] = {}
+
+class BrazeAuthError(Exception):
+    """Braze answered 401: the session expired or was revoked"""
+
+@app.exception_handler(BrazeAuthError)
+async def braze_auth_error_handler(request: Request, exc: BrazeAuthError):
+    return JSONResponse(
+        status_code=401,
+        content={"detail": f"Braze session is no longer valid. Log in to Braze again and retry. Error: {exc}"}
+    )
+
+def _braze_auth_key(base_url: str, headers: Dict[str, str], app_group_id: str) -> bytes:
+    # Hashed, so session ids are not kept as dictionary keys
+    return hashlib.sha256(f"{base_url}\0{headers['Cookie']}\0{app_group_id}".encode()).digest()
+
+def _remember_braze_auth(base_url: str, headers: Dict[str, str], app_group_id: str) -> None:
+    now = time.monotonic()
+    for key in [key for key, (expires, _, _) in _braze_auth_cache.items() if expires <= now]:
+        del _braze_auth_cache[key]
+    while len(_braze_auth_cache) >= BRAZE_AUTH_CACHE_MAX_ENTRIES:
+        del _braze_auth_cache[next(iter(_braze_auth_cache))]
+    _braze_auth_cache[_braze_auth_key(base_url, headers, app_group_id)] = (now + BRAZE_AUTH_TTL_SECONDS, base_url, headers)
+
+def _forget_braze_auth(base_url: str, headers: Dict[str, str], app_group_id: str) -> None:
+    _braze_auth_cache.pop(_braze_auth_key(base_url, headers, app_group_id), None)
+
+def _check_braze_auth(response: httpx.Response, base_url: str, headers: Dict[str, str], app_group_id: str) -> None:
+    """Forgets the cached authentication and raises BrazeAuthError on a 401"""
+    if response.status_code == 401:
+        _forget_braze_auth(base_url, headers, app_group_id)
+        raise BrazeAuthError(f"401 from {response.url}")
+
+
+# --- Braze Rate Limiting ---
+# Detail fetches run EXPORT_CONCURRENCY at a time, and every Braze cluster is
+# paced to BRAZE_REQUESTS_PER_SECOND, with bursts of up to BRAZE_REQUEST_BURST
+EXPORT_CONCURRENCY = int(os.getenv('EXPORT_CONCURRENCY', '8'))
+BRAZE_REQUESTS_PER_SECOND = float(os.getenv('BRAZE_REQUESTS_PER_SECOND', '10'))
+BRAZE_REQUEST_BURST = int(os.getenv('BRAZE_REQUEST_BURST', '10'))
+# Campaign list pages requested ahead of the one being read
+CAMPAIGN_LIST_PREFETCH_PAGES = int(os.getenv('CAMPAIGN_LIST_PREFETCH_PAGES', '4'))
+
+class TokenBucket:
+    """Lets calls through at rate per second on average, and up to capacity at once"""
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = max(1, capacity)
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self) -> None:
+        if self.rate <= 0:
+            return
+        # Waiters queue on the lock, so tokens go out first come, first served
+        async with self._lock:
+            self._refill()
+            if self._tokens < 1:
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+                self._refill()
+            self._tokens -= 1
+
+# base_url -> bucket shared by every request to that cluster
+_braze_rate_limiters: Dict[str, TokenBucket] = {}
+
+def _braze_rate_limiter(base_url: str) -> TokenBucket:
+    if base_url not in _braze_rate_limiters:
+        _braze_rate_limiters[base_url] = TokenBucket(BRAZE_REQUESTS_PER_SECOND, BRAZE_REQUEST_BURST)
+    return _braze_rate_limiters[base_url]
+
+
+# --- Detail Endpoint Learning ---
+# Clusters serve campaign details from one of these; the one that last
+# worked for a base_url is tried first, and every
+# DETAIL_ENDPOINT_REPROBE_SECONDS one fetch tries them in the default order
+# again in case the cluster changed
+DETAIL_ENDPOINT_FORMATS = ('/campaigns/details', '/engagement/campaign_data/{campaign_id}')
+DETAIL_ENDPOINT_REPROBE_SECONDS = int(os.getenv('DETAIL_ENDPOINT_REPROBE_SECONDS', '600'))
+
+class DetailEndpointStats:
+    """Which endpoint format works for one base_url, and how often the first try does"""
+
+    def __init__(self):
+        self.preferred: Optional[int] = None
+        self.learned_at = 0.0
+        self.fetches = 0
+        self.first_try_hits = 0
+        self.attempts = [0] * len(DETAIL_ENDPOINT_FORMATS)
+        self.successes = [0] * len(DETAIL_ENDPOINT_FORMATS)
+
+    def order(self) -> List[int]:
+        """Format indexes to try, learned one first unless a re-probe is due"""
+        default = list(range(len(DETAIL_ENDPOINT_FORMATS)))
+        if self.preferred is None:
+            return default
+        if time.monotonic() - self.learned_at >= DETAIL_ENDPOINT_REPROBE_SECONDS:
+            # Only this fetch re-probes; the others keep the learned order
+            self.learned_at = time.monotonic()
+            return default
+        return [self.preferred] + [i for i in default if i != self.preferred]
+
+    def record(self, index: int, tries: int) -> None:
+        self.fetches += 1
+        if tries == 1:
+            self.first_try_hits += 1
+        self.successes[index] += 1
+        if self.preferred != index:
+            print(f"♻️ Learned detail endpoint format {index + 1}: {DETAIL_ENDPOINT_FORMATS[index]}")
+            self.preferred = index
+            self.learned_at = time.monotonic()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'preferred_format': DETAIL_ENDPOINT_FORMATS[self.preferred] if self.preferred is not None else None,
+            'fetches': self.fetches,
+            'first_try_hits': self.first_try_hits,
+            'first_try_hit_rate': self.first_try_hits / self.fetches if self.fetches else 0.0,
+            'formats': [
+                {'format': path, 'attempts': self.attempts[i], 'successes': self.successes[i]}
+                for i, path in enumerate(DETAIL_ENDPOINT_FORMATS)
+            ]
+        }
+
+# base_url -> what its detail endpoints have done so far
+_detail_endpoint_stats: Dict[str, DetailEndpointStats] = {}
+
+def get_detail_endpoint_stats() -> Dict[str, Dict[str, Any]]:
+    return {base_url: stats.stats() for base_url, stats in _detail_endpoint_stats.items()}
+
+
 # --- Helper Functions (Internal Logic from the original class) ---
 
-def _get_braze_session(
+async def _get_braze_session(
     dashboard_url: str, session_id: str, app_group_id: str
-) -> tuple[requests.Session, str, Dict[str, str]]:
+) -> tuple[httpx.AsyncClient, str, Dict[str, str]]:
     """
-    Creates and authenticates a requests Session for Braze.
-    This function combines the configuration and connection testing.
+    Authenticates against Braze and returns the shared async client.
+    This function combines the configuration and connection testing; the
+    test is skipped for credentials that passed it within BRAZE_AUTH_TTL_SECONDS.
     """
     try:
         # 1. Configure paths and headers
@@ -52,19 +236,24 @@ def _get_braze_session(
             'Referer': f'{base_url}/engagement/campaigns/campaigns/',
             'Cookie': f'_session_id={session_id};'
         }
-        session = requests.Session()
+        session = _get_http_client()
+
+        cached = _braze_auth_cache.get(_braze_auth_key(base_url, headers, app_group_id))
+        if cached and cached[0] > time.monotonic():
+            return session, cached[1], dict(cached[2])
 
         # 2. Test the connection
         test_url = f"{base_url}/engagement/campaigns_data_v2"
         params = {'limit': 1, 'start': 0, 'app_group_id': app_group_id}
-        response = session.get(test_url, headers=headers, params=params, timeout=10)
+        response = await session.get(test_url, headers=headers, params=params, timeout=10)
         response.raise_for_status()
         
         if 'results' not in response.json():
             raise ConnectionError("Authentication test failed: 'results' key not in response.")
             
         print("✓ Authentication successful")
-        return session, base_url, headers
+        _remember_braze_auth(base_url, headers, app_group_id)
+        return session, base_url, dict(headers)
 
     except Exception as e:
         print(f"✗ Authentication failed: {e}")
@@ -73,18 +262,31 @@ def _get_braze_session(
             detail=f"Authentication failed. Check your credentials and dashboard URL. Error: {e}"
         )
 
-def _fetch_all_campaigns_list(
-    session: requests.Session, base_url: str, headers: Dict, app_group_id: str
-) -> List[Dict[str, Any]]:
+async def _fetch_campaign_list_pages(
+    session: httpx.AsyncClient, base_url: str, headers: Dict, app_group_id: str,
+    known: Optional[Dict[str, Any]] = None,
+    on_page: Optional[Callable[[List[Dict[str, Any]]], None]] = None
+) -> tuple[List[Dict[str, Any]], bool]:
     """
-    Fetches the complete list of campaign metadata using pagination.
+    Fetches campaign metadata page by page, most recently edited first, with
+    up to CAMPAIGN_LIST_PREFETCH_PAGES pages in flight under the cluster's
+    rate limit.
+
+    With known (campaign id -> last_edited of a cached list), stops at the
+    first campaign already known with the same last_edited, after any
+    others edited at that same time: everything past it is unchanged. Such
+    refreshes usually end on the first page, so they prefetch one page at
+    first and double that while whole pages keep changing.
+    on_page, if given, receives each page as soon as it is read.
+    Returns the campaigns and whether the walk finished without an error.
     """
     campaigns = []
-    start = 0
     limit_per_page = 250
+    max_in_flight = max(1, CAMPAIGN_LIST_PREFETCH_PAGES)
+    window = 1 if known else max_in_flight
+    limiter = _braze_rate_limiter(base_url)
     
-    print("Starting campaign list fetch...")
-    while True:
+    async def fetch_page(start: int) -> List[Dict[str, Any]]:
         url = f"{base_url}/engagement/campaigns_data_v2"
         params = {
             'limit': limit_per_page,
@@ -93,40 +295,182 @@ def _fetch_all_campaigns_list(
             'sortby': 'last_edited',
             'sortdir': -1
         }
-        
-        try:
-            response = session.get(url, headers=headers, params=params, timeout=30)
-            response.raise_for_status()
-            batch_data = response.json().get('results', [])
+        await limiter.acquire()
+        response = await session.get(url, headers=headers, params=params, timeout=30)
+        _check_braze_auth(response, base_url, headers, app_group_id)
+        response.raise_for_status()
+        return response.json().get('results', [])
+    
+    print("Starting campaign list fetch...")
+    next_start = 0
+    in_flight: List[asyncio.Task] = []
+    try:
+        while True:
+            while len(in_flight) < window:
+                in_flight.append(asyncio.create_task(fetch_page(next_start)))
+                next_start += limit_per_page
+            
+            try:
+                # Pages are consumed in offset order, whichever lands first
+                batch_data = await in_flight.pop(0)
+            except BrazeAuthError:
+                raise
+            except Exception as e:
+                print(f"Error during pagination: {e}")
+                # Return what we have so far
+                return campaigns, False
             
             if not batch_data:
                 print("No more campaigns to fetch.")
                 break
             
+            if known:
+                unchanged_at = None
+                for index, campaign in enumerate(batch_data):
+                    last_edited = campaign.get('last_edited')
+                    if unchanged_at is not None and last_edited != unchanged_at:
+                        batch_data = batch_data[:index]
+                        break
+                    if unchanged_at is None and known.get(campaign.get('id'), object()) == last_edited:
+                        unchanged_at = last_edited
+                if unchanged_at is not None:
+                    campaigns.extend(c for c in batch_data if known.get(c.get('id'), object()) != c.get('last_edited'))
+                    print(f"Reached unchanged campaigns. {len(campaigns)} new or edited.")
+                    break
+            
             campaigns.extend(batch_data)
+            if on_page:
+                on_page(batch_data)
             print(f"Fetched {len(batch_data)} campaigns. Total so far: {len(campaigns)}")
-            start += limit_per_page
-            time.sleep(0.1)
-        except Exception as e:
-            print(f"Error during pagination: {e}")
-            # Return what we have so far
-            break
+            window = min(max_in_flight, window * 2)
+    finally:
+        # Pages past the end, or past the unchanged campaigns, are not needed
+        for task in in_flight:
+            if task.done() and not task.cancelled():
+                task.exception()
+            task.cancel()
             
     print(f"Campaign list fetch complete. Total: {len(campaigns)} campaigns.")
+    return campaigns, True
+
+async def _fetch_all_campaigns_list(
+    session: httpx.AsyncClient, base_url: str, headers: Dict, app_group_id: str
+) -> List[Dict[str, Any]]:
+    """
+    Fetches the complete list of campaign metadata using pagination.
+    """
+    campaigns, _ = await _fetch_campaign_list_pages(session, base_url, headers, app_group_id)
     return campaigns
 
-def _get_single_campaign_details(
-    session: requests.Session, base_url: str, headers: Dict, app_group_id: str, campaign_id: str
+# --- Campaign List Cache ---
+# A list younger than CAMPAIGN_LIST_TTL_SECONDS is served as is; an older one
+# is refreshed from the top until unchanged campaigns are reached, and fully
+# re-fetched (to drop deleted campaigns) every CAMPAIGN_LIST_FULL_REFRESH_SECONDS
+CAMPAIGN_LIST_TTL_SECONDS = int(os.getenv('CAMPAIGN_LIST_TTL_SECONDS', '30'))
+CAMPAIGN_LIST_FULL_REFRESH_SECONDS = int(os.getenv('CAMPAIGN_LIST_FULL_REFRESH_SECONDS', '600'))
+
+class IndexedCampaignList:
+    """
+    A campaign list with its positions indexed by type and status and its
+    names lowercased once, so filters look up candidates instead of
+    scanning and lowercasing the whole list on every request.
+    """
+
+    # filter query parameter -> campaign field it must equal
+    INDEXED_FILTERS = {'campaign_type': 'campaign_type', 'status': 'status'}
+    FILTERS = (*INDEXED_FILTERS, 'name_contains')
+
+    def __init__(self, campaigns: List[Dict[str, Any]]):
+        self.campaigns = campaigns
+        self.id_positions = {c.get('id'): position for position, c in enumerate(campaigns)}
+        self.names_lower = [(c.get('campaign_name') or '').lower() for c in campaigns]
+        self.positions: Dict[str, Dict[Any, List[int]]] = {field: {} for field in self.INDEXED_FILTERS.values()}
+        for position, campaign in enumerate(campaigns):
+            for field, index in self.positions.items():
+                index.setdefault(campaign.get(field), []).append(position)
+
+    def __len__(self) -> int:
+        return len(self.campaigns)
+
+    def filter(self, filters: Dict[str, str]) -> List[Dict[str, Any]]:
+        """Campaigns matching every filter, in list order"""
+        positions = self.filter_positions(filters)
+        if positions is None:
+            return self.campaigns
+        return [self.campaigns[p] for p in positions]
+
+    def filter_positions(self, filters: Dict[str, str]) -> Optional[List[int]]:
+        """Ascending list positions of the campaigns matching every filter; None when nothing is filtered"""
+        positions = None
+        equal = [(field, filters[name]) for name, field in self.INDEXED_FILTERS.items() if name in filters]
+        if equal:
+            # Start from the smallest index entry and check the other fields directly
+            equal.sort(key=lambda fv: len(self.positions[fv[0]].get(fv[1], ())))
+            positions = self.positions[equal[0][0]].get(equal[0][1], [])
+            campaigns = self.campaigns
+            for field, value in equal[1:]:
+                positions = [p for p in positions if campaigns[p].get(field) == value]
+        if 'name_contains' in filters:
+            name_filter = filters['name_contains'].lower()
+            candidates = range(len(self.campaigns)) if positions is None else positions
+            names_lower = self.names_lower
+            positions = [p for p in candidates if name_filter in names_lower[p]]
+        return positions
+
+# (base_url, app_group_id) -> {'campaigns' (an IndexedCampaignList), 'fetched_at', 'full_fetched_at'}
+_campaign_list_cache: Dict[tuple[str, str], Dict[str, Any]] = {}
+_campaign_list_locks: Dict[tuple[str, str], asyncio.Lock] = {}
+
+async def _get_campaign_list(
+    session: httpx.AsyncClient, base_url: str, headers: Dict, app_group_id: str,
+    on_page: Optional[Callable[[List[Dict[str, Any]]], None]] = None
+) -> IndexedCampaignList:
+    """
+    The app group's campaign list, most recently edited first, from the cache
+    when possible. on_page receives the pages of a full fetch as they arrive;
+    it is never called when the list comes from the cache.
+    """
+    key = (base_url, app_group_id)
+    # One refresh per app group at a time; the others wait and reuse it
+    async with _campaign_list_locks.setdefault(key, asyncio.Lock()):
+        now = time.monotonic()
+        cached = _campaign_list_cache.get(key)
+        if cached and now - cached['fetched_at'] < CAMPAIGN_LIST_TTL_SECONDS:
+            print(f"Serving {len(cached['campaigns'])} cached campaigns.")
+            return cached['campaigns']
+        
+        if cached and now - cached['full_fetched_at'] < CAMPAIGN_LIST_FULL_REFRESH_SECONDS:
+            known = {c.get('id'): c.get('last_edited') for c in cached['campaigns'].campaigns}
+            changed, complete = await _fetch_campaign_list_pages(session, base_url, headers, app_group_id, known)
+            if not complete:
+                print("Refresh failed; serving the cached campaign list.")
+                return cached['campaigns']
+            changed_ids = {c.get('id') for c in changed}
+            campaigns = IndexedCampaignList(changed + [c for c in cached['campaigns'].campaigns if c.get('id') not in changed_ids])
+            _campaign_list_cache[key] = {'campaigns': campaigns, 'fetched_at': now, 'full_fetched_at': cached['full_fetched_at']}
+            return campaigns
+        
+        fetched, complete = await _fetch_campaign_list_pages(session, base_url, headers, app_group_id, on_page=on_page)
+        campaigns = IndexedCampaignList(fetched)
+        if complete:
+            _campaign_list_cache[key] = {'campaigns': campaigns, 'fetched_at': now, 'full_fetched_at': now}
+        elif cached:
+            print("Refresh failed; serving the cached campaign list.")
+            return cached['campaigns']
+        return campaigns
+
+async def _get_single_campaign_details(
+    session: httpx.AsyncClient, base_url: str, headers: Dict, app_group_id: str, campaign_id: str
 ) -> Optional[Dict[str, Any]]:
     """
-    Fetches detailed data for one campaign, trying multiple endpoint formats.
+    Fetches detailed data for one campaign, trying multiple endpoint formats,
+    starting with the one that last worked for this base_url.
     """
-    endpoint_formats = [
-        f"{base_url}/campaigns/details",
-        f"{base_url}/engagement/campaign_data/{campaign_id}",
-    ]
+    endpoint_stats = _detail_endpoint_stats.setdefault(base_url, DetailEndpointStats())
 
-    for i, campaign_url in enumerate(endpoint_formats, 1):
+    for tries, index in enumerate(endpoint_stats.order(), 1):
+        i = index + 1
+        campaign_url = base_url + DETAIL_ENDPOINT_FORMATS[index].format(campaign_id=campaign_id)
         try:
             params = {
                 'campaign_id': campaign_id if i == 1 else None,
@@ -135,10 +479,16 @@ def _get_single_campaign_details(
             # Remove None values from params
             params = {k: v for k, v in params.items() if v is not None}
 
-            response = session.get(campaign_url, headers=headers, params=params, timeout=30)
+            endpoint_stats.attempts[index] += 1
+            response = await session.get(campaign_url, headers=headers, params=params, timeout=30)
+            _check_braze_auth(response, base_url, headers, app_group_id)
             if response.status_code == 200:
+                details = response.json()
+                endpoint_stats.record(index, tries)
                 print(f"✓ Success fetching details for {campaign_id} with format {i}")
-                return response.json()
+                return details
+        except BrazeAuthError:
+            raise
         except Exception as e:
             print(f"✗ Error with endpoint format {i} for {campaign_id}: {e}")
             continue
@@ -146,17 +496,83 @@ def _get_single_campaign_details(
     print(f"✗ All endpoint formats failed for campaign {campaign_id}")
     return None
 
-def _filter_campaigns(campaigns: List[Dict[str, Any]], filters: Dict) -> List[Dict[str, Any]]:
-    """Filters a list of campaigns based on a dictionary of filter criteria."""
-    filtered = campaigns
-    if 'campaign_type' in filters:
-        filtered = [c for c in filtered if c.get('campaign_type') == filters['campaign_type']]
-    if 'status' in filters:
-        filtered = [c for c in filtered if c.get('status') == filters['status']]
-    if 'name_contains' in filters:
-        name_filter = filters['name_contains'].lower()
-        filtered = [c for c in filtered if name_filter in c.get('campaign_name', '').lower()]
-    return filtered
+async def _fetch_campaign_details_concurrently(
+    session: httpx.AsyncClient, base_url: str, headers: Dict, app_group_id: str,
+    campaign_ids: List[str], ordered: bool = True
+) -> AsyncGenerator[tuple[str, Optional[Dict[str, Any]]], None]:
+    """
+    Yields (campaign_id, details) with up to EXPORT_CONCURRENCY fetches in
+    flight, each paced by the cluster's rate limiter. Ordered output follows
+    campaign_ids; unordered output comes as soon as each fetch finishes.
+    """
+    limiter = _braze_rate_limiter(base_url)
+
+    async def fetch(campaign_id: str) -> tuple[str, Optional[Dict[str, Any]]]:
+        await limiter.acquire()
+        return campaign_id, await _get_single_campaign_details(session, base_url, headers, app_group_id, campaign_id)
+
+    pending_ids = iter(campaign_ids)
+    in_flight: List[asyncio.Task] = []
+    try:
+        for campaign_id in pending_ids:
+            in_flight.append(asyncio.create_task(fetch(campaign_id)))
+            if len(in_flight) >= max(1, EXPORT_CONCURRENCY):
+                break
+        while in_flight:
+            if ordered:
+                done = [in_flight.pop(0)]
+                await done[0]
+            else:
+                finished, _ = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+                done = [task for task in in_flight if task in finished]
+                in_flight = [task for task in in_flight if task not in finished]
+            for task in done:
+                # A BrazeAuthError surfaces here and ends the whole export
+                yield task.result()
+                next_id = next(pending_ids, None)
+                if next_id is not None:
+                    in_flight.append(asyncio.create_task(fetch(next_id)))
+    finally:
+        # The client went away or the session expired: stop the other fetches
+        for task in in_flight:
+            if task.done() and not task.cancelled():
+                task.exception()
+            task.cancel()
+
+def _campaign_filters(request: Request) -> Dict[str, str]:
+    """The filter criteria among the query parameters"""
+    return {k: v for k, v in request.query_params.items() if k in IndexedCampaignList.FILTERS}
+
+def _encode_cursor(campaign: Dict[str, Any], offset: int) -> str:
+    """Opaque cursor naming the last campaign of a page and where the next one starts"""
+    after = {'after': campaign.get('id'), 'last_edited': campaign.get('last_edited'), 'offset': offset}
+    return base64.urlsafe_b64encode(json.dumps(after).encode()).decode()
+
+def _cursor_start(cursor: Optional[str], campaigns: IndexedCampaignList, positions: Sequence[int]) -> int:
+    """
+    Index in positions where the page after cursor starts: right after the
+    cursor's campaign, so campaigns edited since the last page do not shift
+    the rest; at the recorded offset if that campaign was itself edited or
+    deleted since.
+    """
+    if not cursor:
+        return 0
+    try:
+        decoded = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        after, last_edited, offset = decoded['after'], decoded['last_edited'], int(decoded['offset'])
+    except (ValueError, TypeError, KeyError):
+        raise HTTPException(status_code=400, detail="Invalid cursor. Start again without one.")
+    position = campaigns.id_positions.get(after)
+    if position is not None and campaigns.campaigns[position].get('last_edited') == last_edited:
+        return bisect.bisect_right(positions, position)
+    return max(0, offset)
+
+def _summary_lines(campaigns: List[Dict[str, Any]]) -> str:
+    return ''.join(json.dumps(_get_campaign_summary(c)) + "\n" for c in campaigns)
+
+def _error_line(status_code: int, detail: str) -> str:
+    """The NDJSON record that ends a stream which failed after it started"""
+    return json.dumps({'error': {'status_code': status_code, 'detail': detail}}) + "\n"
 
 def _get_campaign_summary(campaign: Dict[str, Any]) -> Dict[str, Any]:
     """Extracts a readable summary from a campaign object."""
@@ -187,26 +603,145 @@ async def health_check():
         "port": 8082
     }
 
+# This service converts nothing itself, so the converter counters stay at zero
+add_converter_service(app)
+
+@app.get("/metrics/fetcher")
+async def fetcher_metrics():
+    """Per Braze cluster: the learned campaign detail endpoint and how often it works on the first try"""
+    return {'detail_endpoints': get_detail_endpoint_stats()}
+
 @app.get("/campaigns/", response_model=List[Dict[str, Any]])
 async def list_campaigns(
     request: Request,
+    response: Response,
     x_dashboard_url: str = Header(..., description="Your Braze Dashboard URL (e.g., https://dashboard-09.braze.com)"),
     x_session_id: str = Header(..., description="Your Braze _session_id cookie value"),
-    x_app_group_id: str = Header(..., description="Your Braze App Group ID")
+    x_app_group_id: str = Header(..., description="Your Braze App Group ID"),
+    limit: Optional[int] = Query(None, ge=1, description="Return at most this many campaigns"),
+    offset: int = Query(0, ge=0, description="Skip this many matching campaigns first")
 ):
     """
     Fetch a list of campaigns, with optional filtering via query parameters.
+    The X-Total-Count header holds the number of matches before limit/offset.
+    
+    Example filters: `/campaigns/?status=active&name_contains=Welcome&limit=50&offset=100`
+    """
+    session, base_url, headers = await _get_braze_session(x_dashboard_url, x_session_id, x_app_group_id)
+    
+    all_campaigns = await _get_campaign_list(session, base_url, headers, x_app_group_id)
     
-    Example filters: `/campaigns/?status=active&name_contains=Welcome`
+    filters = _campaign_filters(request)
+    final_campaigns = all_campaigns.filter(filters)
+    response.headers['X-Total-Count'] = str(len(final_campaigns))
+    
+    end = offset + limit if limit is not None else None
+    return [_get_campaign_summary(c) for c in final_campaigns[offset:end]]
+
+
+@app.get("/campaigns/page")
+async def list_campaigns_page(
+    request: Request,
+    x_dashboard_url: str = Header(..., description="Your Braze Dashboard URL"),
+    x_session_id: str = Header(..., description="Your Braze _session_id cookie value"),
+    x_app_group_id: str = Header(..., description="Your Braze App Group ID"),
+    limit: int = Query(100, ge=1, le=1000, description="Campaigns per page"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page")
+):
     """
-    session, base_url, headers = _get_braze_session(x_dashboard_url, x_session_id, x_app_group_id)
+    One page of campaign summaries, with the same filters as /campaigns/, and
+    the cursor for the next page (null after the last one).
     
-    all_campaigns = _fetch_all_campaigns_list(session, base_url, headers, x_app_group_id)
+    Example: `/campaigns/page?status=active&limit=100&cursor=...`
+    """
+    session, base_url, headers = await _get_braze_session(x_dashboard_url, x_session_id, x_app_group_id)
     
-    filters = dict(request.query_params)
-    final_campaigns = _filter_campaigns(all_campaigns, filters) if filters else all_campaigns
+    all_campaigns = await _get_campaign_list(session, base_url, headers, x_app_group_id)
     
-    return [_get_campaign_summary(c) for c in final_campaigns]
+    positions = all_campaigns.filter_positions(_campaign_filters(request))
+    if positions is None:
+        positions = range(len(all_campaigns))
+    start = _cursor_start(cursor, all_campaigns, positions)
+    page = [all_campaigns.campaigns[p] for p in positions[start:start + limit]]
+    end = start + len(page)
+    next_cursor = _encode_cursor(page[-1], end) if page and end < len(positions) else None
+    
+    # Returned as is: the summaries are plain dicts, so skip response model validation
+    return JSONResponse(content={
+        'campaigns': [_get_campaign_summary(c) for c in page],
+        'next_cursor': next_cursor,
+        'total': len(positions)
+    })
+
+
+@app.get("/campaigns/stream")
+async def stream_campaigns(
+    request: Request,
+    x_dashboard_url: str = Header(..., description="Your Braze Dashboard URL"),
+    x_session_id: str = Header(..., description="Your Braze _session_id cookie value"),
+    x_app_group_id: str = Header(..., description="Your Braze App Group ID")
+):
+    """
+    Streams the filtered campaign summaries of /campaigns/ as NDJSON, one per
+    line. When the list has to be fetched from Braze, each page is sent as
+    soon as it arrives; a cached list is sent at once.
+
+    The response starts once the first page or the whole list is in, so a
+    failure before that gets its status code. A failure after that ends the
+    stream with an {"error": {"status_code", "detail"}} line.
+    """
+    session, base_url, headers = await _get_braze_session(x_dashboard_url, x_session_id, x_app_group_id)
+    filters = _campaign_filters(request)
+
+    pages: asyncio.Queue = asyncio.Queue()
+    listing = asyncio.create_task(
+        _get_campaign_list(session, base_url, headers, x_app_group_id, on_page=pages.put_nowait)
+    )
+    # Left running if the client goes away, so the list still gets cached
+    listing.add_done_callback(lambda task: task.cancelled() or task.exception())
+    next_page = asyncio.create_task(pages.get())
+    await asyncio.wait({next_page, listing}, return_when=asyncio.FIRST_COMPLETED)
+    if listing.done() and listing.exception():
+        next_page.cancel()
+        # Nothing is sent yet, so a BrazeAuthError still becomes a 401
+        raise listing.exception()
+
+    async def stream_generator() -> AsyncGenerator[str, None]:
+        nonlocal next_page
+        sent_ids = set()
+
+        def page_lines(campaigns: List[Dict[str, Any]]) -> str:
+            sent_ids.update(c.get('id') for c in campaigns)
+            return _summary_lines(IndexedCampaignList(campaigns).filter(filters))
+
+        try:
+            while True:
+                if not next_page.done():
+                    await asyncio.wait({next_page, listing}, return_when=asyncio.FIRST_COMPLETED)
+                if not next_page.done():
+                    break
+                yield page_lines(next_page.result())
+                next_page = asyncio.create_task(pages.get())
+            while not pages.empty():
+                yield page_lines(pages.get_nowait())
+            all_campaigns = listing.result()
+        except BrazeAuthError as e:
+            print(f"✗ Braze session expired while streaming campaigns: {e}")
+            yield _error_line(401, "Braze session is no longer valid. Log in to Braze again and retry.")
+            return
+        except Exception as e:
+            print(f"✗ Campaign list fetch failed while streaming: {e}")
+            yield _error_line(502, f"Campaign list fetch failed: {e}")
+            return
+        finally:
+            next_page.cancel()
+        # A fetch that failed part-way falls back to the cached list, so
+        # send the campaigns its pages did not
+        remaining = [c for c in all_campaigns.campaigns if c.get('id') not in sent_ids]
+        if remaining:
+            yield _summary_lines(IndexedCampaignList(remaining).filter(filters))
+
+    return StreamingResponse(stream_generator(), media_type="application/x-ndjson")
 
 
 @app.get("/campaigns/{campaign_id}/", response_model=Dict[str, Any])
@@ -219,9 +754,9 @@ async def get_campaign_detail(
     """
     Fetch the full, detailed data for a single campaign by its ID.
     """
-    session, base_url, headers = _get_braze_session(x_dashboard_url, x_session_id, x_app_group_id)
+    session, base_url, headers = await _get_braze_session(x_dashboard_url, x_session_id, x_app_group_id)
     
-    details = _get_single_campaign_details(session, base_url, headers, x_app_group_id, campaign_id)
+    details = await _get_single_campaign_details(session, base_url, headers, x_app_group_id, campaign_id)
     
     if not details:
         raise HTTPException(status_code=404, detail=f"Campaign with ID '{campaign_id}' not found.")
@@ -234,32 +769,38 @@ async def export_campaigns_as_jsonl(
     request: Request,
     x_dashboard_url: str = Header(..., description="Your Braze Dashboard URL"),
     x_session_id: str = Header(..., description="Your Braze _session_id cookie value"),
-    x_app_group_id: str = Header(..., description="Your Braze App Group ID")
+    x_app_group_id: str = Header(..., description="Your Braze App Group ID"),
+    unordered: bool = Query(False, description="Stream each campaign as soon as it is fetched instead of in list order")
 ):
     """
     Exports filtered campaigns as a streaming JSONL (JSON Lines) response.
-    This fetches the *full details* for each campaign, which can be slow.
+    This fetches the *full details* for each campaign, EXPORT_CONCURRENCY at a time.
     """
-    session, base_url, headers = _get_braze_session(x_dashboard_url, x_session_id, x_app_group_id)
+    session, base_url, headers = await _get_braze_session(x_dashboard_url, x_session_id, x_app_group_id)
     
-    all_campaigns = _fetch_all_campaigns_list(session, base_url, headers, x_app_group_id)
+    all_campaigns = await _get_campaign_list(session, base_url, headers, x_app_group_id)
     
-    filters = dict(request.query_params)
-    filtered_campaigns = _filter_campaigns(all_campaigns, filters) if filters else all_campaigns
+    filtered_campaigns = all_campaigns.filter(_campaign_filters(request))
+    campaign_ids = [c.get('id') for c in filtered_campaigns if c.get('id')]
 
-    def stream_generator() -> Generator[str, None, None]:
+    async def stream_generator() -> AsyncGenerator[str, None]:
         count = 0
-        total = len(filtered_campaigns)
-        print(f"Starting export stream for {total} campaigns...")
-        for campaign_summary in filtered_campaigns:
-            campaign_id = campaign_summary.get('id')
-            if campaign_id:
-                details = _get_single_campaign_details(session, base_url, headers, x_app_group_id, campaign_id)
+        total = len(campaign_ids)
+        print(f"Starting {'unordered' if unordered else 'ordered'} export stream for {total} campaigns...")
+        details_stream = _fetch_campaign_details_concurrently(
+            session, base_url, headers, x_app_group_id, campaign_ids, ordered=not unordered
+        )
+        try:
+            async for campaign_id, details in details_stream:
                 if details:
                     yield json.dumps(details) + "\n"
                     count += 1
                     print(f"Streamed campaign {count}/{total}: {campaign_id}")
-            time.sleep(0.2) # Rate limit to be safe
+        except BrazeAuthError as e:
+            # The response has started, so the export just ends here
+            print(f"✗ Braze session expired after {count}/{total} campaigns: {e}")
+        finally:
+            await details_stream.aclose()
 
     # Set up headers for file download
     response_headers = {
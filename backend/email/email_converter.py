@@ -1,14 +1,11 @@
 import os
-import re
-import sys
 import json
-import html
 import time
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 from datetime import datetime, timedelta
 
 import requests
-from fastapi import FastAPI, HTTPException, Body
+from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel, Field
 
@@ -58,6 +55,7 @@ class MoEngageCredentials(BaseModel):
     refresh_token: str = Field(..., description="MoEngage Refresh Token")
     origin: str = Field(default="https://dashboard-01.moengage.com", description="MoEngage Origin URL")
     api_url: str = Field(default="https://dashboard-01.moengage.com/v1.0/campaigns/draft", description="MoEngage API URL")
+    app_key: Optional[str] = Field(default=None, description="MoEngage workspace App Key; uploaded images are reused across migrations only within it")
 
 class BrazeCampaign(BaseModel):
     campaign: Dict[str, Any] = Field(..., description="The root 'campaign' object from the Braze JSON export.")
@@ -73,188 +71,8 @@ class MigrationSuccessResponse(BaseModel):
 # 3. CORE MIGRATION LOGIC (REFACTORED FROM ORIGINAL SCRIPT)
 # ==============================================================================
 
-# --- Placeholder/External Modules ---
-try:
-    from liquid_to_jinja import convert_liquid_to_jinja
-except ImportError:
-    def convert_liquid_to_jinja(text):
-        if text is None: return ""
-        if not isinstance(text, str): text = str(text)
-        text = re.sub(r'\{\{ ?\$(.*?) ?\}\}', r'{{ \1 }}', text)
-        return text
-
-class BrazeCdnToMoenageCdn:
-    @staticmethod
-    def __extract_braze_image_urls(payload):
-        decoded_payload = payload.encode().decode('unicode_escape')
-        decoded_payload = html.unescape(decoded_payload)
-        
-        # Comprehensive patterns to catch ALL Braze-related image URLs
-        patterns = [
-            # Original braze-images.com domain
-            r"https:\/\/braze-images\.com\/[^\"\s,]+",
-            
-            # All braze.com subdomains (including cdn-staging, assets, etc.)
-            r"https:\/\/[a-zA-Z0-9-]+\.braze\.com\/[^\"\s,]+",
-            
-            # Braze social icons on S3
-            r"https:\/\/braze-social-icons\.s3\.amazonaws\.com\/[^\"\s,]+",
-            
-            # Other potential Braze S3 buckets
-            r"https:\/\/braze-[a-zA-Z0-9-]+\.s3\.amazonaws\.com\/[^\"\s,]+",
-            
-            # Braze CDN variations
-            r"https:\/\/cdn[a-zA-Z0-9-]*\.braze\.com\/[^\"\s,]+",
-            
-            # Assets subdomain variations
-            r"https:\/\/assets[a-zA-Z0-9-]*\.braze\.com\/[^\"\s,]+",
-            
-            # Any other braze-related domains
-            r"https:\/\/[a-zA-Z0-9-]*braze[a-zA-Z0-9-]*\.[a-zA-Z0-9.-]+\/[^\"\s,]+",
-            
-            # Appboy legacy domains (Braze was formerly Appboy)
-            r"https:\/\/[a-zA-Z0-9-]*appboy[a-zA-Z0-9-]*\.[a-zA-Z0-9.-]+\/[^\"\s,]+",
-        ]
-        
-        all_matches = []
-        for pattern in patterns:
-            matches = re.findall(pattern, decoded_payload, re.IGNORECASE)
-            all_matches.extend(matches)
-        
-        # Remove duplicates and filter for actual image files
-        unique_urls = list(set(all_matches))
-        
-        # Additional filtering for image file extensions and valid URLs
-        image_extensions = ('.jpg', '.jpeg', '.png', '.gif', '.webp', '.svg', '.bmp', '.ico')
-        filtered_urls = []
-        
-        for url in unique_urls:
-            # Remove any trailing quotes or spaces
-            url = url.strip('\'"')
-            
-            # Check if it's likely an image (has image extension or no extension but comes from image CDN)
-            url_lower = url.lower()
-            is_image = (
-                any(ext in url_lower for ext in image_extensions) or
-                'image' in url_lower or
-                'icon' in url_lower or
-                'logo' in url_lower or
-                'assets/images' in url_lower or
-                url_lower.endswith('/') == False  # Could be dynamic image URL without extension
-            )
-            
-            if is_image:
-                filtered_urls.append(url)
-        
-        return filtered_urls
-
-    @staticmethod
-    def __download_image(url):
-        try:
-            # Add headers to mimic a real browser request
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-                'Accept': 'image/webp,image/apng,image/svg+xml,image/*,*/*;q=0.8',
-                'Accept-Language': 'en-US,en;q=0.9',
-            }
-            
-            response = requests.get(url, headers=headers, timeout=30)
-            if response.status_code == 200:
-                # Try to get filename from URL
-                url_path = url.split('/')[-1].split('?')[0]
-                
-                # If no proper filename, generate one based on content type
-                if not url_path or '.' not in url_path:
-                    content_type = response.headers.get('content-type', '').lower()
-                    if 'image/jpeg' in content_type or 'image/jpg' in content_type:
-                        extension = '.jpg'
-                    elif 'image/png' in content_type:
-                        extension = '.png'
-                    elif 'image/gif' in content_type:
-                        extension = '.gif'
-                    elif 'image/webp' in content_type:
-                        extension = '.webp'
-                    elif 'image/svg' in content_type:
-                        extension = '.svg'
-                    else:
-                        extension = '.jpg'  # Default fallback
-                    
-                    file_name = f"braze_image_{int(time.time())}{extension}"
-                else:
-                    file_name = url_path
-                
-                # Ensure filename is safe
-                file_name = re.sub(r'[^\w\-_\.]', '_', file_name)
-                
-                with open(file_name, 'wb') as file:
-                    file.write(response.content)
-                return file_name
-            else:
-                print(f"Failed to download image from {url}: HTTP {response.status_code}")
-                return None
-        except Exception as e:
-            print(f"Error downloading image from {url}: {str(e)}")
-            return None
-
-    @staticmethod
-    def __upload_image(file_name, headers):
-        origin = headers.get('origin', 'https://dashboard-01.moengage.com').rstrip('/')
-        moe_image_cdn_url = f'{origin}/v1/platform/services/upload-file'
-        try:
-            with open(file_name, 'rb') as file:
-                files = {'file': (file_name, file)}
-                upload_headers = {k: v for k, v in headers.items() if k.lower() != 'content-type'}
-                response = requests.post(moe_image_cdn_url, headers=upload_headers, files=files, timeout=30)
-            if response.status_code == 201:
-                return response.json().get('url', '')
-            return None
-        except Exception:
-            return None
-
-    @staticmethod
-    def process_images(payload, headers):
-        if not payload or not isinstance(payload, str): 
-            return payload or ""
-        
-        print(f"Processing images in payload...")
-        image_urls = BrazeCdnToMoenageCdn.__extract_braze_image_urls(payload)
-        
-        if not image_urls:
-            print("No Braze image URLs found in payload")
-            return payload
-        
-        print(f"Found {len(image_urls)} Braze image URLs:")
-        for i, url in enumerate(image_urls, 1):
-            print(f"  {i}. {url}")
-        
-        for url in image_urls:
-            print(f"\nProcessing image: {url}")
-            
-            # Download the image
-            file_name = BrazeCdnToMoenageCdn.__download_image(url)
-            if file_name:
-                print(f"  ✅ Downloaded as: {file_name}")
-                
-                # Upload to MoEngage
-                moe_cdn_url = BrazeCdnToMoenageCdn.__upload_image(file_name, headers)
-                if moe_cdn_url:
-                    print(f"  ✅ Uploaded to MoEngage: {moe_cdn_url}")
-                    payload = payload.replace(url, moe_cdn_url)
-                    print(f"  ✅ Replaced in payload")
-                else:
-                    print(f"  ❌ Failed to upload to MoEngage")
-                
-                # Clean up downloaded file
-                try: 
-                    os.remove(file_name)
-                    print(f"  🗑️ Cleaned up temporary file")
-                except Exception as e:
-                    print(f"  ⚠️ Failed to clean up file {file_name}: {e}")
-            else:
-                print(f"  ❌ Failed to download image")
-        
-        print(f"Image processing completed")
-        return payload
+# --- Shared Conversion Modules (backend/migration_core) ---
+from migration_core import BrazeCdnToMoenageCdn, add_converter_service, convert_many, get_http_session
 
 class EmailCampaignMigrator:
     MAX_EMAIL_CONTENT_SIZE = 100000
@@ -264,6 +82,7 @@ class EmailCampaignMigrator:
     def __init__(self, config: Dict[str, Any], moengage_credentials: MoEngageCredentials):
         self.config = config
         self.api_url = moengage_credentials.api_url
+        self.app_key = moengage_credentials.app_key
         self.api_delay = config.get('api_delay', 0.5)
         self.headers = {
             'authorization': f"Bearer {moengage_credentials.bearer_token}",
@@ -490,11 +309,12 @@ class EmailCampaignMigrator:
             preheader = self._sanitize_content(email_message.get("preheader", ""), "preheader")
             html_content = self._sanitize_content(email_message.get("email_body", ""), "html")
             
-            processed_html = BrazeCdnToMoenageCdn.process_images(html_content, headers=self.headers)
+            processed_html = BrazeCdnToMoenageCdn.process_images(html_content, headers=self.headers, workspace=self.app_key)
             
-            camp_data["email_subject_html"] = convert_liquid_to_jinja(subject)
-            camp_data["email_preview_text_html"] = convert_liquid_to_jinja(preheader)
-            camp_data["email_content"] = convert_liquid_to_jinja(processed_html)
+            converted = convert_many({"subject": subject, "preheader": preheader, "content": processed_html})
+            camp_data["email_subject_html"] = converted["subject"]
+            camp_data["email_preview_text_html"] = converted["preheader"]
+            camp_data["email_content"] = converted["content"]
             camp_data["email_sender_name"] = email_message.get('from_display_name')
             camp_data["email_from_id"] = email_message.get('from_address')
             camp_data["email_reply_id"] = email_message.get('reply_to_address') or email_message.get('from_address')
@@ -504,7 +324,7 @@ class EmailCampaignMigrator:
     def create_campaign_in_moengage(self, payload: Dict[str, Any]) -> requests.Response:
         if self.api_delay > 0:
             time.sleep(self.api_delay)
-        response = requests.post(self.api_url, headers=self.headers, data=json.dumps(payload))
+        response = get_http_session().post(self.api_url, headers=self.headers, data=json.dumps(payload))
         return response
 
 # ==============================================================================
@@ -521,6 +341,8 @@ def health_check():
         "timestamp": datetime.now().isoformat()
     }
 
+add_converter_service(app, tags=["Health"])
+
 @app.post("/v1/migrate-campaign", response_model=MigrationSuccessResponse, tags=["Migration"])
 def migrate_campaign(request_body: BrazeCampaign):
     try:
@@ -0,0 +1,46 @@
+"""
+Shared conversion code for the Braze -> MoEngage migration services.
+
+Every service imports the Liquid -> Jinja converter and the Braze CDN image
+pipeline from here, so there is a single copy of each to maintain.
+"""
+from .liquid_to_jinja import (
+    convert_liquid_to_jinja,
+    convert_liquid_to_jinja_stream,
+    convert_many,
+    get_conversion_cache_stats,
+    clear_conversion_cache,
+    get_fast_path_stats,
+    clear_fast_path_stats,
+    profile_conversion,
+    set_rule_profiling,
+    get_rule_profile_stats,
+    clear_rule_profile,
+    get_converter_metrics,
+    verify_converter,
+)
+from .image_pipeline import BrazeCdnToMoenageCdn
+from .cdn_url_cache import get_cdn_url_cache_stats, clear_cdn_url_cache
+from .http_session import get_http_session
+from .service import add_converter_service
+
+__all__ = [
+    'convert_liquid_to_jinja',
+    'convert_liquid_to_jinja_stream',
+    'convert_many',
+    'get_conversion_cache_stats',
+    'clear_conversion_cache',
+    'get_fast_path_stats',
+    'clear_fast_path_stats',
+    'profile_conversion',
+    'set_rule_profiling',
+    'get_rule_profile_stats',
+    'clear_rule_profile',
+    'get_converter_metrics',
+    'verify_converter',
+    'BrazeCdnToMoenageCdn',
+    'get_cdn_url_cache_stats',
+    'clear_cdn_url_cache',
+    'get_http_session',
+    'add_converter_service',
+]
@@ -0,0 +1,212 @@
+import os
+import time
+import sqlite3
+import threading
+
+# Set IMAGE_URL_CACHE_PATH to an empty string to disable the cache
+DEFAULT_CACHE_PATH = os.path.join(os.path.expanduser('~'), '.campaign_migration', 'cdn_url_cache.sqlite3')
+
+
+class CdnUrlCache:
+    """
+    Durable mapping to the MoEngage CDN URL an image was uploaded as, scoped
+    per MoEngage workspace, in a local SQLite file. Images are found both by
+    their Braze URL and by a hash of their bytes, so differently addressed
+    copies of one image share an upload.
+
+    Entries expire ttl_seconds after the upload; past max_entries the least
+    recently used ones are evicted. The size is checked every trim_every
+    writes (default 1% of max_entries), so a table can briefly hold that many
+    extra entries. A store that cannot be opened or written only costs the
+    re-upload, never the migration.
+    """
+
+    # table -> column holding the lookup key
+    TABLES = {'cdn_urls': 'source_url', 'cdn_contents': 'content_hash'}
+    # PRAGMA user_version of the current layout; 1 scopes entries by workspace
+    SCHEMA_VERSION = 1
+
+    def __init__(self, path, ttl_seconds, max_entries, trim_every=None):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.trim_every = trim_every or max(1, max_entries // 100)
+        self._writes_since_trim = dict.fromkeys(self.TABLES, 0)
+        self.hits = 0
+        self.misses = 0
+        self.content_hits = 0
+        self.content_misses = 0
+        self._connection = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def scope_for(headers, workspace):
+        """
+        The workspace uploads land in: its app key on the dashboard the
+        headers point at. None without an app key, since the tokens alone do
+        not tell workspaces apart, and nothing is cached for such uploads.
+        """
+        if not workspace:
+            return None
+        origin = headers.get('origin', 'https://dashboard-01.moengage.com').rstrip('/').lower()
+        return f"{origin}|{workspace}"
+
+    @property
+    def enabled(self):
+        return bool(self.path) and self.max_entries > 0
+
+    def _connect(self):
+        if self._connection is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            connection = sqlite3.connect(self.path, check_same_thread=False)
+            for table, column in self.TABLES.items():
+                connection.execute(
+                    f'CREATE TABLE IF NOT EXISTS {table} ('
+                    f'scope TEXT NOT NULL, {column} TEXT NOT NULL, moe_cdn_url TEXT NOT NULL, '
+                    f'created_at REAL NOT NULL, last_used REAL NOT NULL, PRIMARY KEY (scope, {column}))'
+                )
+                connection.execute(f'CREATE INDEX IF NOT EXISTS {table}_last_used ON {table} (last_used)')
+            # Upgrades run once per file, not on every connection
+            if connection.execute('PRAGMA user_version').fetchone()[0] < self.SCHEMA_VERSION:
+                # Entries scoped by dashboard alone may belong to any workspace on it
+                for table in self.TABLES:
+                    connection.execute(f"DELETE FROM {table} WHERE instr(scope, '|') = 0")
+                connection.execute(f'PRAGMA user_version = {self.SCHEMA_VERSION}')
+            connection.commit()
+            self._connection = connection
+        return self._connection
+
+    def _lookup(self, table, scope, key):
+        column = self.TABLES[table]
+        now = time.time()
+        connection = self._connect()
+        row = connection.execute(
+            f'SELECT moe_cdn_url, created_at FROM {table} WHERE scope = ? AND {column} = ?',
+            (scope, key)
+        ).fetchone()
+        if row is not None and now - row[1] > self.ttl_seconds:
+            connection.execute(f'DELETE FROM {table} WHERE scope = ? AND {column} = ?', (scope, key))
+            connection.commit()
+            return None
+        if row is not None:
+            connection.execute(f'UPDATE {table} SET last_used = ? WHERE scope = ? AND {column} = ?', (now, scope, key))
+            connection.commit()
+            return row[0]
+        return None
+
+    def _store(self, table, scope, key, moe_cdn_url):
+        column = self.TABLES[table]
+        now = time.time()
+        connection = self._connect()
+        connection.execute(
+            f'INSERT OR REPLACE INTO {table} (scope, {column}, moe_cdn_url, created_at, last_used) VALUES (?, ?, ?, ?, ?)',
+            (scope, key, moe_cdn_url, now, now)
+        )
+        # Other services write to the same file, so the size is counted rather
+        # than tracked, and only every trim_every writes
+        self._writes_since_trim[table] += 1
+        if self._writes_since_trim[table] >= self.trim_every:
+            self._writes_since_trim[table] = 0
+            excess = connection.execute(f'SELECT COUNT(*) FROM {table}').fetchone()[0] - self.max_entries
+            if excess > 0:
+                connection.execute(
+                    f'DELETE FROM {table} WHERE rowid IN (SELECT rowid FROM {table} ORDER BY last_used LIMIT ?)',
+                    (excess,)
+                )
+        connection.commit()
+
+    def get(self, scope, source_url):
+        if not self.enabled or scope is None:
+            return None
+        with self._lock:
+            try:
+                moe_cdn_url = self._lookup('cdn_urls', scope, source_url)
+            except sqlite3.Error as e:
+                print(f"⚠️ CDN URL cache lookup failed: {e}")
+                moe_cdn_url = None
+            if moe_cdn_url is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return moe_cdn_url
+
+    def get_by_content(self, scope, content_hash):
+        if not self.enabled or scope is None:
+            return None
+        with self._lock:
+            try:
+                moe_cdn_url = self._lookup('cdn_contents', scope, content_hash)
+            except sqlite3.Error as e:
+                print(f"⚠️ CDN URL cache lookup failed: {e}")
+                moe_cdn_url = None
+            if moe_cdn_url is None:
+                self.content_misses += 1
+            else:
+                self.content_hits += 1
+            return moe_cdn_url
+
+    def put(self, scope, source_url, moe_cdn_url, content_hash=None):
+        if not self.enabled or scope is None or not moe_cdn_url:
+            return
+        with self._lock:
+            try:
+                self._store('cdn_urls', scope, source_url, moe_cdn_url)
+                if content_hash:
+                    self._store('cdn_contents', scope, content_hash, moe_cdn_url)
+            except sqlite3.Error as e:
+                print(f"⚠️ CDN URL cache write failed: {e}")
+
+    def clear(self):
+        with self._lock:
+            self.hits = self.misses = 0
+            self.content_hits = self.content_misses = 0
+            if not self.path:
+                return
+            try:
+                connection = self._connect()
+                for table in self.TABLES:
+                    connection.execute(f'DELETE FROM {table}')
+                connection.commit()
+            except sqlite3.Error as e:
+                print(f"⚠️ CDN URL cache clear failed: {e}")
+
+    def stats(self):
+        with self._lock:
+            counts = dict.fromkeys(self.TABLES, 0)
+            if self.path:
+                try:
+                    connection = self._connect()
+                    for table in self.TABLES:
+                        counts[table] = connection.execute(f'SELECT COUNT(*) FROM {table}').fetchone()[0]
+                except sqlite3.Error:
+                    pass
+            lookups = self.hits + self.misses
+            content_lookups = self.content_hits + self.content_misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'content_hits': self.content_hits,
+                'content_misses': self.content_misses,
+                'content_hit_rate': self.content_hits / content_lookups if content_lookups else 0.0,
+                'entries': counts['cdn_urls'],
+                'content_entries': counts['cdn_contents'],
+                'max_entries': self.max_entries,
+                'ttl_seconds': self.ttl_seconds,
+                'path': self.path
+            }
+
+# Shared by every service on the machine through the SQLite file
+CDN_URL_CACHE = CdnUrlCache(
+    path=os.getenv('IMAGE_URL_CACHE_PATH', DEFAULT_CACHE_PATH),
+    ttl_seconds=int(os.getenv('IMAGE_URL_CACHE_TTL_SECONDS', str(30 * 24 * 3600))),
+    max_entries=int(os.getenv('IMAGE_URL_CACHE_MAX_ENTRIES', '50000'))
+)
+
+def get_cdn_url_cache_stats():
+    return CDN_URL_CACHE.stats()
+
+def clear_cdn_url_cache():
+    CDN_URL_CACHE.clear()
@@ -0,0 +1,66 @@
+import os
+import threading
+from http.cookiejar import DefaultCookiePolicy
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Connection pools kept per host, and connections kept per pool
+HTTP_POOL_CONNECTIONS = int(os.getenv('HTTP_POOL_CONNECTIONS', '20'))
+HTTP_POOL_MAXSIZE = int(os.getenv('HTTP_POOL_MAXSIZE', '10'))
+# Per-host pool sizes, e.g. "braze-images.com=16,dashboard-01.moengage.com=8"
+HTTP_POOL_SIZES = os.getenv('HTTP_POOL_SIZES', '')
+# Retries for connection errors, and for 429/5xx answers to idempotent requests
+HTTP_MAX_RETRIES = int(os.getenv('HTTP_MAX_RETRIES', '3'))
+HTTP_RETRY_BACKOFF = float(os.getenv('HTTP_RETRY_BACKOFF', '0.5'))
+HTTP_RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+_session = None
+_session_lock = threading.Lock()
+
+def parse_pool_sizes(spec):
+    """Parses "host=size,host=size" into {host: size}, skipping malformed entries"""
+    sizes = {}
+    for entry in spec.split(','):
+        host, _, size = entry.strip().partition('=')
+        if host and size.strip().isdigit():
+            sizes[host.strip().lower()] = int(size)
+    return sizes
+
+def _adapter(pool_maxsize):
+    retry = Retry(
+        total=HTTP_MAX_RETRIES,
+        backoff_factor=HTTP_RETRY_BACKOFF,
+        status_forcelist=HTTP_RETRY_STATUSES,
+        respect_retry_after_header=True,
+        # Callers check the status code themselves
+        raise_on_status=False
+    )
+    return HTTPAdapter(pool_connections=HTTP_POOL_CONNECTIONS, pool_maxsize=pool_maxsize, max_retries=retry)
+
+def create_http_session():
+    session = requests.Session()
+    # One session serves every user of the process, so nothing one
+    # response sets may be sent on someone else's request
+    session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+    adapter = _adapter(HTTP_POOL_MAXSIZE)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    for host, size in parse_pool_sizes(HTTP_POOL_SIZES).items():
+        adapter = _adapter(size)
+        session.mount(f'https://{host}/', adapter)
+        session.mount(f'http://{host}/', adapter)
+    return session
+
+def get_http_session():
+    """
+    The process-wide session for outbound Braze and MoEngage calls, keeping
+    connections alive between requests instead of a handshake per call
+    """
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = create_http_session()
+    return _session
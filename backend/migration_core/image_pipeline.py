@@ -0,0 +1,413 @@
+import os
+import re
+import html
+import time
+import hashlib
+import tempfile
+import threading
+from urllib.parse import urlparse
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from .cdn_url_cache import CDN_URL_CACHE, CdnUrlCache
+from .http_session import get_http_session
+
+# Images of one payload are rehosted this many at a time, with at most
+# IMAGE_PER_HOST_LIMIT requests in flight to any one host across all payloads
+IMAGE_REHOST_CONCURRENCY = int(os.getenv('IMAGE_REHOST_CONCURRENCY', '8'))
+IMAGE_PER_HOST_LIMIT = int(os.getenv('IMAGE_PER_HOST_LIMIT', '4'))
+
+# Images are held in memory between download and upload; larger ones spill
+# to an anonymous temp file (never the working directory)
+IMAGE_SPOOL_MAX_BYTES = int(os.getenv('IMAGE_SPOOL_MAX_BYTES', str(8 * 1024 * 1024)))
+IMAGE_DOWNLOAD_CHUNK_SIZE = 64 * 1024
+
+_host_limits = {}
+_host_limits_lock = threading.Lock()
+
+def _host_limit(url):
+    host = urlparse(url).netloc.lower()
+    with _host_limits_lock:
+        limit = _host_limits.get(host)
+        if limit is None:
+            limit = _host_limits[host] = threading.BoundedSemaphore(max(1, IMAGE_PER_HOST_LIMIT))
+        return limit
+
+class _PayloadUploads:
+    """
+    Uploads of one payload by content hash, so byte-identical images behind
+    different URLs are uploaded once even while they download concurrently
+    """
+
+    def __init__(self):
+        self._uploads = {}
+        self._lock = threading.Lock()
+
+    def upload_once(self, content_hash, upload):
+        """Returns (MoEngage URL, whether an earlier upload of the same bytes was reused)"""
+        with self._lock:
+            pending = self._uploads.get(content_hash)
+            owner = pending is None
+            if owner:
+                pending = self._uploads[content_hash] = [threading.Event(), None]
+        if owner:
+            try:
+                pending[1] = upload()
+            finally:
+                pending[0].set()
+            return pending[1], False
+        pending[0].wait()
+        if pending[1]:
+            return pending[1], True
+        # That upload failed, so try this copy
+        return upload(), False
+
+
+# Hosts whose https://<host>/... URLs are Braze-related images, matched case-insensitively
+BRAZE_HOST_PATTERNS = [
+    # Original braze-images.com domain
+    r"braze-images\.com",
+    
+    # All braze.com subdomains (including cdn-staging, assets, etc.)
+    r"[a-zA-Z0-9-]+\.braze\.com",
+    
+    # Braze social icons on S3
+    r"braze-social-icons\.s3\.amazonaws\.com",
+    
+    # Other potential Braze S3 buckets
+    r"braze-[a-zA-Z0-9-]+\.s3\.amazonaws\.com",
+    
+    # Braze CDN variations
+    r"cdn[a-zA-Z0-9-]*\.braze\.com",
+    
+    # Assets subdomain variations
+    r"assets[a-zA-Z0-9-]*\.braze\.com",
+    
+    # Any other braze-related domains
+    r"[a-zA-Z0-9-]*braze[a-zA-Z0-9-]*\.[a-zA-Z0-9.-]+",
+    
+    # Appboy legacy domains (Braze was formerly Appboy)
+    r"[a-zA-Z0-9-]*appboy[a-zA-Z0-9-]*\.[a-zA-Z0-9.-]+",
+]
+
+_HOST_RES = [re.compile(pattern, re.IGNORECASE) for pattern in BRAZE_HOST_PATTERNS]
+_ANY_BRAZE_HOST_RE = re.compile('|'.join(f'(?:{pattern})' for pattern in BRAZE_HOST_PATTERNS), re.IGNORECASE)
+# Every host pattern is followed by "/" and a non-empty path, so the host is
+# the whole run of host characters after https://
+_URL_START_RE = re.compile(r'https://([a-zA-Z0-9.-]+)/(?=[^"\s,])', re.IGNORECASE)
+_URL_REST_RE = re.compile(r'[^"\s,]+')
+_SCHEME_RE = re.compile(r'https://', re.IGNORECASE)
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.gif', '.webp', '.svg', '.bmp', '.ico')
+
+def extract_braze_image_urls(payload):
+    """
+    Finds the Braze/Appboy image URLs in a payload, in order of first
+    appearance.
+
+    One scan visits every https:// and checks its host against all of
+    BRAZE_HOST_PATTERNS. A URL nested in another one's query string is
+    found when a different host pattern matched the outer URL, as it was
+    when each pattern scanned the payload on its own.
+    """
+    # Decoding is only needed when there are escapes to decode or non-ASCII
+    # text for unicode_escape to re-read as Latin-1
+    if '\\' in payload or not payload.isascii():
+        payload = payload.encode().decode('unicode_escape')
+    decoded_payload = html.unescape(payload)
+    
+    host_matches = {}
+    # Where each pattern's previous match ended; its matches never overlap
+    pattern_ends = [0] * len(_HOST_RES)
+    urls = []
+    for scheme in _SCHEME_RE.finditer(decoded_payload):
+        start = scheme.start()
+        url_start = _URL_START_RE.match(decoded_payload, start)
+        if not url_start:
+            continue
+        host = url_start.group(1)
+        matching = host_matches.get(host)
+        if matching is None:
+            matching = host_matches[host] = (
+                [index for index, host_re in enumerate(_HOST_RES) if host_re.fullmatch(host)]
+                if _ANY_BRAZE_HOST_RE.fullmatch(host) else []
+            )
+        if not matching:
+            continue
+        end = _URL_REST_RE.match(decoded_payload, url_start.end()).end()
+        found = False
+        for index in matching:
+            if start >= pattern_ends[index]:
+                pattern_ends[index] = end
+                found = True
+        if found:
+            urls.append(decoded_payload[start:end])
+    
+    filtered_urls = []
+    seen = set()
+    for url in urls:
+        # Remove any trailing quotes or spaces
+        url = url.strip('\'"')
+        if url in seen:
+            continue
+        seen.add(url)
+        
+        # Check if it's likely an image (has image extension or no extension but comes from image CDN)
+        url_lower = url.lower()
+        is_image = (
+            any(ext in url_lower for ext in IMAGE_EXTENSIONS) or
+            'image' in url_lower or
+            'icon' in url_lower or
+            'logo' in url_lower or
+            'assets/images' in url_lower or
+            url_lower.endswith('/') == False  # Could be dynamic image URL without extension
+        )
+        
+        if is_image:
+            filtered_urls.append(url)
+    
+    return filtered_urls
+
+# replace_urls() finds candidates by this many leading characters of each URL
+URL_PREFIX_LENGTH = 16
+
+def replace_urls(payload, replacements):
+    """
+    Replaces every URL in the replacements dict with its new URL in one
+    scan. At each position the longest URL wins, so a URL that is a prefix
+    of another never splits it.
+    """
+    replacements = {url: new_url for url, new_url in replacements.items() if url}
+    if not replacements:
+        return payload
+    prefix_length = min(URL_PREFIX_LENGTH, min(len(url) for url in replacements))
+    # URL lengths per leading characters, longest first
+    lengths = {}
+    for url in replacements:
+        lengths.setdefault(url[:prefix_length], set()).add(len(url))
+    lengths = {prefix: sorted(url_lengths, reverse=True) for prefix, url_lengths in lengths.items()}
+    prefix_re = re.compile('|'.join(re.escape(prefix) for prefix in lengths))
+
+    parts = []
+    last = pos = 0
+    while True:
+        candidate = prefix_re.search(payload, pos)
+        if not candidate:
+            break
+        start = candidate.start()
+        for length in lengths[candidate.group()]:
+            url = payload[start:start + length]
+            if url in replacements:
+                parts.append(payload[last:start])
+                parts.append(replacements[url])
+                last = pos = start + length
+                break
+        else:
+            pos = start + 1
+    if not parts:
+        return payload
+    parts.append(payload[last:])
+    return ''.join(parts)
+
+
+class BrazeCdnToMoenageCdn:
+    @staticmethod
+    def __extract_braze_image_urls(payload):
+        return extract_braze_image_urls(payload)
+
+    @staticmethod
+    def __download_image(url):
+        """Returns (file_name, buffer, content_hash) with the buffer rewound, or None; the caller closes the buffer"""
+        try:
+            # Add headers to mimic a real browser request
+            headers = {
+                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+                'Accept': 'image/webp,image/apng,image/svg+xml,image/*,*/*;q=0.8',
+                'Accept-Language': 'en-US,en;q=0.9',
+            }
+            
+            with _host_limit(url), get_http_session().get(url, headers=headers, timeout=30, stream=True) as response:
+                if response.status_code != 200:
+                    print(f"Failed to download image from {url}: HTTP {response.status_code}")
+                    return None
+                buffer = tempfile.SpooledTemporaryFile(max_size=IMAGE_SPOOL_MAX_BYTES)
+                content_hash = hashlib.sha256()
+                try:
+                    for chunk in response.iter_content(chunk_size=IMAGE_DOWNLOAD_CHUNK_SIZE):
+                        buffer.write(chunk)
+                        content_hash.update(chunk)
+                except Exception:
+                    buffer.close()
+                    raise
+                buffer.seek(0)
+            # Try to get filename from URL
+            url_path = url.split('/')[-1].split('?')[0]
+            
+            # If no proper filename, generate one based on content type
+            if not url_path or '.' not in url_path:
+                content_type = response.headers.get('content-type', '').lower()
+                if 'image/jpeg' in content_type or 'image/jpg' in content_type:
+                    extension = '.jpg'
+                elif 'image/png' in content_type:
+                    extension = '.png'
+                elif 'image/gif' in content_type:
+                    extension = '.gif'
+                elif 'image/webp' in content_type:
+                    extension = '.webp'
+                elif 'image/svg' in content_type:
+                    extension = '.svg'
+                else:
+                    extension = '.jpg'  # Default fallback
+            
+                file_name = f"braze_image_{int(time.time())}{extension}"
+            else:
+                file_name = url_path
+            
+            # Ensure filename is safe
+            file_name = re.sub(r'[^\w\-_\.]', '_', file_name)
+            
+            return file_name, buffer, content_hash.hexdigest()
+        except Exception as e:
+            print(f"Error downloading image from {url}: {str(e)}")
+            return None
+
+    @staticmethod
+    def __upload_image(file_name, buffer, headers):
+        origin = headers.get('origin', 'https://dashboard-01.moengage.com').rstrip('/')
+        moe_image_cdn_url = f'{origin}/v1/platform/services/upload-file'
+        try:
+            files = {'file': (file_name, buffer)}
+            upload_headers = {k: v for k, v in headers.items() if k.lower() != 'content-type'}
+            with _host_limit(moe_image_cdn_url):
+                response = get_http_session().post(moe_image_cdn_url, headers=upload_headers, files=files, timeout=30)
+            if response.status_code == 201:
+                return response.json().get('url', '')
+            return None
+        except Exception:
+            return None
+
+    @staticmethod
+    def __rehost_image(url, headers, scope, uploads):
+        """
+        Downloads one image and uploads it to MoEngage, timing each step. An
+        image whose bytes were already uploaded in this payload, or to the
+        scope's workspace in an earlier migration, reuses that upload.
+        """
+        result = {'downloaded': False, 'moe_cdn_url': None, 'content_hash': None, 'reused_upload': False,
+                  'download_seconds': 0.0, 'upload_seconds': 0.0}
+        start = time.perf_counter()
+        download = BrazeCdnToMoenageCdn.__download_image(url)
+        downloaded = time.perf_counter()
+        result['download_seconds'] = downloaded - start
+        if download:
+            file_name, buffer, content_hash = download
+            result['downloaded'] = True
+            result['content_hash'] = content_hash
+            with buffer:
+                moe_cdn_url = CDN_URL_CACHE.get_by_content(scope, content_hash)
+                if moe_cdn_url:
+                    result['reused_upload'] = True
+                else:
+                    moe_cdn_url, result['reused_upload'] = uploads.upload_once(
+                        content_hash,
+                        lambda: BrazeCdnToMoenageCdn.__upload_image(file_name, buffer, headers)
+                    )
+                result['moe_cdn_url'] = moe_cdn_url
+            result['upload_seconds'] = time.perf_counter() - downloaded
+        result['total_seconds'] = time.perf_counter() - start
+        return result
+
+    @staticmethod
+    def process_images(payload, headers, workspace=None):
+        """
+        Rehosts the Braze CDN images of payload on MoEngage. workspace is the
+        MoEngage app key; uploads are only reused across calls within it.
+        """
+        if not payload or not isinstance(payload, str): 
+            return payload or ""
+        
+        print("Processing images in payload...")
+        image_urls = BrazeCdnToMoenageCdn.__extract_braze_image_urls(payload)
+        
+        if not image_urls:
+            print("No Braze image URLs found in payload")
+            return payload
+        
+        print(f"Found {len(image_urls)} Braze image URLs:")
+        for i, url in enumerate(image_urls, 1):
+            print(f"  {i}. {url}")
+        
+        # Images uploaded to this workspace before need no request at all
+        scope = CdnUrlCache.scope_for(headers, workspace)
+        results = {}
+        for url in image_urls:
+            moe_cdn_url = CDN_URL_CACHE.get(scope, url)
+            if moe_cdn_url:
+                results[url] = {'moe_cdn_url': moe_cdn_url}
+                print(f"♻️ Reusing MoEngage URL for {url}: {moe_cdn_url}")
+        pending_urls = [url for url in image_urls if url not in results]
+        
+        # Downloads and uploads of different images overlap
+        if pending_urls:
+            workers = max(1, min(IMAGE_REHOST_CONCURRENCY, len(pending_urls)))
+            uploads = _PayloadUploads()
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                futures = {executor.submit(BrazeCdnToMoenageCdn.__rehost_image, url, headers, scope, uploads): url for url in pending_urls}
+                for future in as_completed(futures):
+                    url = futures[future]
+                    results[url] = result = future.result()
+                    print(f"\nProcessed image: {url}")
+                    if not result['downloaded']:
+                        print("  ❌ Failed to download image")
+                    elif not result['moe_cdn_url']:
+                        print("  ❌ Failed to upload to MoEngage")
+                    else:
+                        if result['reused_upload']:
+                            print(f"  ♻️ Same image already on MoEngage: {result['moe_cdn_url']}")
+                        else:
+                            print(f"  ✅ Uploaded to MoEngage: {result['moe_cdn_url']}")
+                        CDN_URL_CACHE.put(scope, url, result['moe_cdn_url'], result['content_hash'])
+                    print(f"  ⏱️ Download {result['download_seconds']:.2f}s, upload {result['upload_seconds']:.2f}s, total {result['total_seconds']:.2f}s")
+        
+        payload = replace_urls(payload, {url: result['moe_cdn_url'] for url, result in results.items() if result['moe_cdn_url']})
+        
+        print("Image processing completed")
+        return payload
+
+    @staticmethod
+    def process_single_image_url(image_url, headers, workspace=None):
+        """Process a single image URL for conversion from Braze CDN to MoEngage CDN"""
+        if not image_url:
+            return ""
+        
+        print(f"Processing single image: {image_url}")
+        
+        scope = CdnUrlCache.scope_for(headers, workspace)
+        moe_cdn_url = CDN_URL_CACHE.get(scope, image_url)
+        if moe_cdn_url:
+            print(f"  ♻️ Reusing MoEngage URL: {moe_cdn_url}")
+            return moe_cdn_url
+        
+        # Download the image
+        download = BrazeCdnToMoenageCdn.__download_image(image_url)
+        if download:
+            file_name, buffer, content_hash = download
+            print(f"  ✅ Downloaded as: {file_name}")
+            
+            # Upload to MoEngage straight from the buffer, unless the same bytes are there already
+            with buffer:
+                moe_cdn_url = CDN_URL_CACHE.get_by_content(scope, content_hash)
+                if moe_cdn_url:
+                    print("  ♻️ Same image already on MoEngage")
+                else:
+                    moe_cdn_url = BrazeCdnToMoenageCdn.__upload_image(file_name, buffer, headers)
+            
+            if moe_cdn_url:
+                print(f"  ✅ Uploaded to MoEngage: {moe_cdn_url}")
+                CDN_URL_CACHE.put(scope, image_url, moe_cdn_url, content_hash)
+                return moe_cdn_url
+            else:
+                print("  ❌ Failed to upload to MoEngage")
+        else:
+            print("  ❌ Failed to download image")
+        
+        return image_url  # Return original URL if processing fails
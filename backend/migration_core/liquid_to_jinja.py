@@ -0,0 +1,1424 @@
+import os
+import re
+import sys
+import time
+import hashlib
+import threading
+import contextlib
+import multiprocessing
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+
+# Set LIQUID_STRICT_PATTERNS=true to fail at import when a pattern does not
+# compile, instead of printing the error and disabling that pattern
+STRICT_PATTERNS = os.getenv('LIQUID_STRICT_PATTERNS', 'false').lower() == 'true'
+
+_NEVER_MATCHES = re.compile(r'(?!)')
+
+def compile_pattern(pattern, flags=0):
+    """Compiles a pattern once at import time, like safe_re_sub but up front"""
+    try:
+        return re.compile(pattern, flags)
+    except re.error as e:
+        if STRICT_PATTERNS:
+            raise
+        print(f"Regex error with pattern {pattern}: {str(e)}")
+        return _NEVER_MATCHES
+
+# Patterns used by the helper functions below, as (pattern, flags)
+HELPER_PATTERN_SOURCES = {
+    'unless_contains': (r'(\w+)\s+contains\s+(.*)', 0),
+    'case_when': (r'{%\s*when\s+(.*?)\s*%}', 0),
+    'case_else': (r'{%\s*else\s*%}(.+?){%\s*endcase\s*%}', re.DOTALL),
+    'braced_placeholder': (r'\{\{\${(\w+)}\}\}', 0),
+    'inner_double_curly': (r'\{\{(.*?)\}\}', 0),
+    'hyphen_assign_set': (r'({%\s*(assign|set)\s+[\w]*\w)-([\w]+\s*=)', 0),
+    'hyphen_double_curly': (r'({{[\s]*[\w]+)-([\w]+[\s]*}})', 0),
+    # The value stops at the end of the URL, not only at the next "&"
+    'hyphen_utm_content': (r'(https?://[^ \t\n\r\f\v"\'<]+?utm_content=)([^& \t\n\r\f\v"\'<]*\w)-(\w+)', 0),
+    'date_filter': (r'\|\s*date:\s*"([^"]+)"', 0),
+}
+
+HELPER_PATTERNS = {
+    name: compile_pattern(pattern, flags)
+    for name, (pattern, flags) in HELPER_PATTERN_SOURCES.items()
+}
+
+# Numeric filters handled by replacement(), in the order they are applied
+MATH_FILTERS = {
+    'plus': '+',
+    'minus': '-',
+    'times': '*',
+    'divided_by': '//',
+    'modulo': '%'
+}
+
+MATH_FILTER_PATTERNS = [
+    (compile_pattern(rf"\|\s*{liquid_filter}:\s*(\w+)"), rf"{python_op}\1")
+    for liquid_filter, python_op in MATH_FILTERS.items()
+]
+
+def safe_re_sub(pattern, repl, string, *args, **kwargs):
+    """Safe regex substitution that handles None values"""
+    if string is None:
+        return ''
+    if not isinstance(string, str):
+        string = str(string)
+    try:
+        return re.sub(pattern, repl, string, *args, **kwargs)
+    except Exception as e:
+        print(f"Regex error with pattern {pattern}: {str(e)}")
+        return string
+
+def convert_capture_to_set(match):
+    variable_name = match.group(1).strip()
+    content = match.group(2).strip()
+    return f"{{% set {variable_name} %}}{content}{{% endset %}}"
+
+def convert_number_with_delimiter(match):
+    liquid_variable = match.group(1).strip()
+    liquid_variable2 = match.group(2).strip()
+    return f"{{% set {liquid_variable} = '{{:,}}'.format({liquid_variable2}) %}}"
+
+def convert_unless_to_if_not(match):
+    condition = match.group(1).strip()
+    # Convert the 'contains' condition into an 'in' or 'not in' condition
+    condition = HELPER_PATTERNS['unless_contains'].sub(r"\2 not in \1", condition)
+    contents = match.group(2).strip()
+    return f"{{% if {condition} %}}{contents}{{% endif %}}"
+
+def convert_case_to_if_elif(match):
+    case_variable = match.group(1).strip()
+    contents = match.group(2).strip()
+    when_clauses = HELPER_PATTERNS['case_when'].split(contents)
+    when_clauses = [w.strip() for w in when_clauses if w.strip()]
+    # Only search when it can match, since it rescans the body from every else
+    else_clause = HELPER_PATTERNS['case_else'].search(contents) if 'endcase' in contents else None
+    jinja_clauses = []
+    for i in range(len(when_clauses)//2):
+        condition = when_clauses[i*2].strip("'\"")
+        jinja_clauses.append(f"{{% elif {case_variable} == {condition} %}}{when_clauses[i*2+1]}")
+    if jinja_clauses:
+        jinja_clauses[0] = jinja_clauses[0].replace('elif', 'if', 1)
+    if else_clause:
+        jinja_clauses.append(f"{{% else %}}{else_clause.group(1)}")
+    jinja_clauses.append("{% endif %}")
+    return '\n'.join(jinja_clauses)
+
+def convert_variables_in_conditions(match):
+    keyword = match.group(1)
+    condition = match.group(2)
+    condition = HELPER_PATTERNS['braced_placeholder'].sub(r'\1', condition) # Keep variable placeholders for later Jinja conversion
+    return f'{{% {keyword} {condition} %}}'
+
+def convert_variables_in_loops(match):
+    loop_variable = match.group(1)
+    iterable = match.group(2)
+    iterable = HELPER_PATTERNS['braced_placeholder'].sub(r'{{\1}}', iterable) # Keep variable placeholders for later Jinja conversion
+    return f'{{% for {loop_variable} in {iterable} %}}'
+
+def remove_inner_double_curly_braces(match):
+    text_inside = match.group(0)
+    cleaned_text = HELPER_PATTERNS['inner_double_curly'].sub(r'\1', text_inside)
+    return cleaned_text
+
+def convert_replace_filter(match):
+    variable = match.group(1)
+    old_string = match.group(2).replace('"', '')
+    new_string = match.group(3).replace('"', '')
+    return f"{{% set {variable} = {variable} | replace('{old_string}', '{new_string}') %}}"
+
+# Add this new function inside your existing script
+def convert_dot_first_to_index_zero(match):
+    variable_name = match.group(1).strip()
+    variable_name1 = match.group(2).strip()
+    return f"{{% set {variable_name} = {variable_name1}[0] %}}"
+
+def convert_increment_decrement(match):
+    operation = "set"  # Default to set for increment and decrement
+    variable_name = match.group(1).strip()
+    if match.group(0).startswith("{% increment"):
+        return f"{{%{operation} {variable_name} = {variable_name} + 1%}}"
+    elif match.group(0).startswith("{% decrement"):
+        return f"{{%{operation} {variable_name} = {variable_name} - 1%}}"
+    return match.group(0) # Fallback if not increment or decrement
+
+def convert_string_filters(match):
+    variable = match.group(1)
+    filter_name = match.group(2)
+    filter_args = match.group(3) if match.group(3) else ''
+    if filter_name == 'downcase':
+        return f"{{{{ {variable}|lower }}}}"
+    elif filter_name == 'upcase':
+        return f"{{{{ {variable}|upper }}}}"
+    elif filter_name == 'capitalize':
+        return f"{{{{ {variable}|capitalize }}}}"
+    elif filter_name == 'strip':
+        return f"{{{{ {variable}|trim }}}}" # Jinja 'trim' is similar to Liquid 'strip'
+    elif filter_name == 'escape':
+        return f"{{{{ {variable}|e }}}}" # Jinja 'e' is the escape filter
+    elif filter_name == 'url_encode':
+        return f"{{{{ {variable}|urlencode }}}}"
+    elif filter_name == 'newline_to_br':
+        return f"{{{{ {variable}|replace('\\n', '<br>')|safe }}}}" # Basic replacement, consider better HTML generation if needed
+    # elif filter_name == 'replace':
+        # print("here")
+        # filter_args = match.group(3).strip() if match.group(3) else ''
+        # print(filter_args)
+        # if filter_name == 'replace':
+        #     parts = re.split(r",(?=(?:[^\"]*\"[^\"]*\")*[^\"]*$)", filter_args)
+        #     if len(parts) >= 2:
+        #         old_str = parts[0].strip().strip("'\"")
+        #         new_str = parts[1].strip().strip("'\"")
+        #         return f"{{{{ {variable}|replace('{old_str}', '{new_str}') }}}}"
+        # old_string = match.group(2).replace('"', '')
+        # new_string = match.group(3).replace('"', '')
+        # return f"{{% set {variable} = {variable} | replace('{old_string}', '{new_string}') %}}"
+    elif filter_name == 'slice':
+        slice_arg = match.group(3).strip()
+        if slice_arg:
+            parts = [part.strip() for part in slice_arg.split(',')]
+            if len(parts) == 2:
+                start, length = parts
+                return f"{{{{ {variable}[{start}:{int(start) + int(length)}] }}}}" # Python slicing
+    variable = match.group(1)
+    filter_name = match.group(2)
+    filter_args = match.group(3) if match.group(3) else ''
+    
+    if filter_name == 'remove':
+        remove_arg = filter_args.strip().strip('"')  # Remove any double quotes around the argument
+        # Escape single quotes correctly
+        if remove_arg == "'":
+            return f'{{{{ {variable}|replace("{remove_arg}", "") }}}}'
+        else:
+            return f"{{{{ {variable}|replace('{remove_arg}', '') }}}}"
+    return match.group(0) # Fallback if filter not handled
+
+def _replace_variable_hyphens(input_string):
+    # Replace hyphens with underscores in variables after 'assign' or 'set'
+    replaced_string = HELPER_PATTERNS['hyphen_assign_set'].sub(lambda match: f"{match.group(1)}_{match.group(3)}", input_string)
+    
+    # Replace hyphens with underscores in variable names inside double curly braces
+    return HELPER_PATTERNS['hyphen_double_curly'].sub(lambda match: f"{match.group(1)}_{match.group(2)}", replaced_string)
+
+def _replace_utm_content_hyphens(input_string):
+    # Replace hyphens with underscores in utm_content parameter value in URLs, avoiding hrefs
+    return sub_utm_content_hyphens(HELPER_PATTERNS['hyphen_utm_content'], input_string)
+
+def replace_hyphens_with_underscores(input_string):
+    return _replace_utm_content_hyphens(_replace_variable_hyphens(input_string))
+
+def replace_with_operator(match):
+    math_filters_to_operators = {
+        'plus': '+',
+        'minus': '-',
+        'times': '*',
+        'divided_by': '/',
+        'modulo': '%'  # Added modulo filter
+    }
+    variable_assigned = match.group(1)
+    first_operand = match.group(2)
+    math_filter = match.group(3)
+    second_operand = match.group(4)
+    operator = math_filters_to_operators[math_filter]
+    # Using f-string instead of .format()
+    return f"{{% set {variable_assigned} = {first_operand} {operator} {second_operand} %}}"
+
+def replacement(match):
+    variable_assigned = match.group(1)
+    filters_part = match.group(2)
+
+    # Replace 'date' filter and similar string filters
+    filters_part = HELPER_PATTERNS['date_filter'].sub(r"|dateTimeFormatter(toFormat='\1')|int", filters_part)
+    
+    # Replace numeric filters 'plus', 'minus', 'times', 'divided_by', 'modulo'
+    for pattern, repl in MATH_FILTER_PATTERNS:
+        filters_part = pattern.sub(repl, filters_part)
+
+    # Using f-string instead of .format()
+    return f"{{% set {variable_assigned} = today(){filters_part} %}}"
+
+def _expand(match, repl):
+    return repl(match) if callable(repl) else match.expand(repl)
+
+_WHITESPACE_RUN = re.compile(r'\s*')
+
+# The scanners below cost more per match than re.sub, whose worst case only
+# matters on longer text, so shorter text goes straight to re.sub
+SCAN_MIN_LENGTH = 512
+
+def block_sub(opener, closer, min_body=0):
+    """
+    Returns a substitution function for a DOTALL block rule such as
+    {% case x %}...{% endcase %}, with the same result as re.sub.
+
+    re.sub retries the lazy body from every opener that has no closer after
+    it, scanning to the end of the text each time, so unbalanced blocks take
+    quadratic time (cubic when the tag header is lazy too). Here each opener
+    is paired with the first closer past its tag using forward-only scans,
+    and the full pattern only runs over a span it is known to match.
+    """
+    opener_re = compile_pattern(opener)
+    closer_re = compile_pattern(closer)
+
+    def sub(pattern, repl, string):
+        if len(string) < SCAN_MIN_LENGTH:
+            return pattern.sub(repl, string)
+        parts = []
+        last = pos = 0
+        close = None
+        while True:
+            open_match = opener_re.search(string, pos)
+            if not open_match:
+                break
+            start = open_match.start()
+            if open_match.group().endswith('%}'):
+                body_start = open_match.end()
+            else:
+                # A lazy tag header ends at the first "%}"
+                tag_close = string.find('%}', open_match.end())
+                if tag_close == -1:
+                    break
+                body_start = tag_close + 2
+            # Bodies only start later for later openers, so a closer found
+            # for an earlier one is reused until the scan passes it
+            if close is None or close.start() < body_start + min_body:
+                close = closer_re.search(string, body_start + min_body)
+                if not close:
+                    break
+            match = pattern.match(string, start, close.end())
+            if not match:
+                pos = start + 1
+                continue
+            parts.append(string[last:start])
+            parts.append(_expand(match, repl))
+            last = pos = match.end()
+        if not parts:
+            return string
+        parts.append(string[last:])
+        return ''.join(parts)
+
+    return sub
+
+def lazy_tail_sub(prefix, tail):
+    """
+    Returns a substitution function for a single-line rule shaped like
+    prefix(.*?)tail, such as {% if (.*?) %}, with the same result as re.sub.
+
+    re.sub rescans the rest of the line from every prefix that no tail
+    follows, which is quadratic on long minified lines with unterminated
+    tags. The lazy group always stops at the first tail after the prefix, so
+    that one is found with a forward-only scan and the prefix is skipped when
+    it lies on a later line.
+    """
+    prefix_re = compile_pattern(prefix)
+    tail_re = compile_pattern(tail)
+
+    def sub(pattern, repl, string):
+        if len(string) < SCAN_MIN_LENGTH:
+            return pattern.sub(repl, string)
+        parts = []
+        last = pos = 0
+        length = len(string)
+        line_end = -1
+        tail_match = None
+        tail_from = length + 1
+        while True:
+            head = prefix_re.search(string, pos)
+            if not head:
+                break
+            start = head.start()
+            pos = start + 1
+            if line_end < head.end():
+                line_end = string.find('\n', head.end())
+                if line_end == -1:
+                    line_end = length
+            if tail_from > head.end() or (tail_match and tail_match.start() < head.end()):
+                tail_match = tail_re.search(string, head.end())
+                tail_from = head.end()
+            if not tail_match:
+                break
+            if tail_match.start() > line_end:
+                continue
+            match = pattern.match(string, start, tail_match.end())
+            if not match:
+                continue
+            parts.append(string[last:start])
+            parts.append(_expand(match, repl))
+            last = pos = match.end()
+        if not parts:
+            return string
+        parts.append(string[last:])
+        return ''.join(parts)
+
+    return sub
+
+def lazy_chain_sub(prefix, *links):
+    """
+    Returns a substitution function for a single-line rule shaped like
+    prefix(.*?)link(.*?)link..., such as {% assign x = "(.*?)" | split: "(.*?)" %},
+    with the same result as re.sub. Links are only tried at their greedy
+    length, which is all re.sub needs for links whose only variable parts
+    are whitespace runs.
+
+    re.sub retries every lazy gap from every prefix, each try scanning to
+    the end of the line, which is quadratic or worse on long minified lines
+    with unterminated tags. A gap stops at the first occurrence of its link
+    from which the rest of the chain completes on that line, and whether it
+    completes depends only on the occurrence, so each level remembers the
+    first completing occurrence it found and only searches forward from it.
+    """
+    prefix_re = compile_pattern(prefix)
+    link_res = [compile_pattern(link) for link in links]
+
+    def sub(pattern, repl, string):
+        if len(string) < SCAN_MIN_LENGTH:
+            return pattern.sub(repl, string)
+        length = len(string)
+        # level -> (searched from, start, end) of the first completing occurrence
+        found = [None] * len(link_res)
+
+        def first_completing(level, at):
+            while True:
+                link = link_res[level].search(string, at)
+                if not link:
+                    return None, -1
+                if level == len(link_res) - 1:
+                    return link.start(), link.end()
+                end = chain_end(level + 1, link.end())
+                if end != -1:
+                    return link.start(), end
+                at = link.start() + 1
+
+        def chain_end(level, at):
+            """End of the chain from this level's gap starting at `at`, or -1"""
+            cached = found[level]
+            if cached is None or cached[0] > at or (cached[1] is not None and cached[1] < at):
+                cached = found[level] = (at, *first_completing(level, at))
+            start, end = cached[1], cached[2]
+            if start is None:
+                return -1
+            line_end = string.find('\n', at)
+            # The gap cannot cross a line
+            if line_end != -1 and start > line_end:
+                return -1
+            return end
+
+        parts = []
+        last = pos = 0
+        while pos < length:
+            head = prefix_re.search(string, pos)
+            if not head:
+                break
+            start = head.start()
+            pos = start + 1
+            end = chain_end(0, head.end())
+            if end == -1:
+                if found[0][1] is None:
+                    # No occurrence completes past here, so no later prefix matches
+                    break
+                continue
+            match = pattern.match(string, start, end)
+            if not match:
+                continue
+            parts.append(string[last:start])
+            parts.append(_expand(match, repl))
+            last = pos = match.end()
+        if not parts:
+            return string
+        parts.append(string[last:])
+        return ''.join(parts)
+
+    return sub
+
+_OUTPUT_OPEN_RE = re.compile(r'{{\s*')
+_NON_SPACE_RUN_RE = re.compile(r'\S*')
+_TRUNCATE_TAIL_RE = re.compile(r'\s*\|\s*truncate:\s*\d+\s*}}')
+
+def sub_truncate_outputs(pattern, repl, string):
+    r"""
+    re.sub for the {{ (\S+) | truncate: n }} rule.
+
+    The greedy (\S+) runs to the end of the non-space run and backs off a
+    character at a time, from every "{{" in the run, which is quadratic on
+    long runs with no truncate filter. It stops at the last point of the run
+    that the filter follows, the same point for every "{{" before it, so
+    that point is found once per run.
+    """
+    if len(string) < SCAN_MIN_LENGTH:
+        return pattern.sub(repl, string)
+    parts = []
+    last = pos = 0
+    run_start = run_end = filter_at = -1
+    while True:
+        start = string.find('{{', pos)
+        if start == -1:
+            break
+        pos = start + 1
+        word = _OUTPUT_OPEN_RE.match(string, start).end()
+        if not run_start <= word < run_end:
+            run_start = word
+            run_end = _NON_SPACE_RUN_RE.match(string, word).end()
+            filter_at = -1
+            if run_end > word and _TRUNCATE_TAIL_RE.match(string, run_end):
+                filter_at = run_end
+            else:
+                bar = string.rfind('|', word + 1, run_end)
+                while bar != -1 and not _TRUNCATE_TAIL_RE.match(string, bar):
+                    bar = string.rfind('|', word + 1, bar)
+                filter_at = bar
+        if filter_at <= word:
+            continue
+        match = pattern.match(string, start, _TRUNCATE_TAIL_RE.match(string, filter_at).end())
+        if not match:
+            continue
+        parts.append(string[last:start])
+        parts.append(_expand(match, repl))
+        last = pos = match.end()
+    if not parts:
+        return string
+    parts.append(string[last:])
+    return ''.join(parts)
+
+def sub_outputs_in_tags(pattern, repl, string):
+    """
+    re.sub for the rule that unwraps a {{ }} output inside a {% %} tag.
+
+    The pattern's lazy gaps rescan the rest of the line from every "{%" that
+    is not followed by "{{", "}}" and "%}" in turn, which is quadratic on
+    long minified lines. Those are checked with forward-only scans instead,
+    and the pattern only runs where it is known to match.
+    """
+    if len(string) < SCAN_MIN_LENGTH:
+        return pattern.sub(repl, string)
+    parts = []
+    last = pos = 0
+    length = len(string)
+    found = {}
+
+    def find_from(token, at):
+        # Lookups only move forward, so each token's text is scanned once
+        cached = found.get(token)
+        if cached is None or cached < at:
+            cached = string.find(token, at)
+            if cached == -1:
+                cached = length
+            found[token] = cached
+        return cached
+
+    while True:
+        start = string.find('{%', pos)
+        if start == -1:
+            break
+        pos = start + 1
+        # Whitespace after "{%" and before "%}" may span lines, nothing else may
+        head = _WHITESPACE_RUN.match(string, start + 2).end()
+        line_end = find_from('\n', head)
+        output_open = find_from('{{', head)
+        if output_open >= line_end:
+            continue
+        output_close = find_from('}}', output_open + 2)
+        if output_close >= line_end:
+            continue
+        tag_close = find_from('%}', output_close + 2)
+        if tag_close >= line_end:
+            tag_close = _WHITESPACE_RUN.match(string, line_end).end()
+            if line_end == length or not string.startswith('%}', tag_close):
+                continue
+        match = pattern.match(string, start, tag_close + 2)
+        if not match:
+            continue
+        parts.append(string[last:start])
+        parts.append(_expand(match, repl))
+        last = pos = match.end()
+    if not parts:
+        return string
+    parts.append(string[last:])
+    return ''.join(parts)
+
+def sub_before_last_tag_close(pattern, repl, string):
+    """
+    re.sub for a pattern whose matches end in "%}", skipping the text after
+    the last "%}" where every attempt would scan to the end and fail.
+    """
+    end = string.rfind('%}')
+    if end == -1:
+        return string
+    end += 2
+    return pattern.sub(repl, string[:end]) + string[end:]
+
+_URL_END_CHARS = ' \t\n\r\f\v"\'<'
+_URL_HEAD_RE = re.compile(r'https?://')
+_URL_END_RE = re.compile(f'[{re.escape(_URL_END_CHARS)}]')
+_UTM_VALUE_END_RE = re.compile(f'[&{re.escape(_URL_END_CHARS)}]')
+_WORD_CHAR_RE = re.compile(r'\w')
+_WORD_RUN_RE = re.compile(r'\w+')
+
+def sub_utm_content_hyphens(pattern, string):
+    """
+    re.sub for the utm_content hyphen rewrite, which turns the last hyphen
+    between word characters in a URL's first utm_content= value that has
+    one into "_".
+
+    The lazy URL head rescans the rest of the URL from every "http://" in
+    it, and the value from every utm_content= it passes, which is quadratic
+    on long URLs. Whether a value has such a hyphen does not depend on the
+    URL it is reached from, so each utm_content= is checked once, and each
+    value's last hyphen is found once.
+    """
+    if len(string) < SCAN_MIN_LENGTH:
+        return pattern.sub(lambda match: f"{match.group(1)}{match.group(2)}_{match.group(3)}", string)
+    value_end = last_hyphen = -1
+
+    def value_hyphen(at):
+        # Values are checked left to right, so the end and last hyphen found
+        # for an earlier utm_content= in the same value hold for this one too
+        nonlocal value_end, last_hyphen
+        value_start = at + len('utm_content=')
+        if value_end < value_start:
+            found = _UTM_VALUE_END_RE.search(string, value_start)
+            value_end = found.start() if found else len(string)
+            last_hyphen = string.rfind('-', value_start + 1, value_end)
+            while last_hyphen != -1 and not (_WORD_CHAR_RE.match(string, last_hyphen - 1) and _WORD_CHAR_RE.match(string, last_hyphen + 1)):
+                last_hyphen = string.rfind('-', value_start + 1, last_hyphen)
+        return last_hyphen if last_hyphen > value_start else -1
+
+    parts = []
+    last = pos = 0
+    run_end = -1
+    at = string.find('utm_content=')
+    while at != -1:
+        head = _URL_HEAD_RE.search(string, pos)
+        if not head:
+            break
+        pos = head.start() + 1
+        if run_end <= head.start():
+            url_end = _URL_END_RE.search(string, head.start())
+            run_end = url_end.start() if url_end else len(string)
+        # At least one character lies between the head and utm_content=
+        if at <= head.end():
+            at = string.find('utm_content=', head.end() + 1)
+        # A value without a hyphen to rewrite fails for every head
+        while at != -1 and at < run_end and value_hyphen(at) == -1:
+            at = string.find('utm_content=', at + 1)
+        if at == -1:
+            break
+        if at >= run_end:
+            # Every other head in this URL stops at the same point
+            pos = run_end
+            continue
+        hyphen = value_hyphen(at)
+        parts.append(string[last:hyphen])
+        parts.append('_')
+        last = hyphen + 1
+        pos = _WORD_RUN_RE.match(string, last).end()
+    if not parts:
+        return string
+    parts.append(string[last:])
+    return ''.join(parts)
+
+# Every Liquid -> Jinja rewrite, in the order it is applied. Each entry is
+# (required literals, pattern, replacement, flags, substitution function).
+# A rule is skipped when one of its literals is missing from the text, since
+# the pattern cannot match without it.
+LIQUID_REWRITE_RULES = [
+    # Convert comments
+    (('endcomment',), r'{%-?\s*comment\s*-?%}(.+?){%-?\s*endcomment\s*-?%}', r'{# \1 #}', re.DOTALL,
+     block_sub(r'{%-?\s*comment\s*-?%}', r'{%-?\s*endcomment\s*-?%}', min_body=1)),
+    (('truncate:',), r'{{\s*(\w+)\s*\|\s*truncate:\s*(\d+)\s*}}', r'{{ \1[:\2] }}', 0, safe_re_sub),
+    (('assign', 'split:'), r'{%\s*assign\s+(\w+)\s*=\s*"(.*?)"\s*\|\s*split:\s*"(.*?)"\s*%}', r"{% set \1 = '\2'.split('\3') %}", 0,
+     lazy_chain_sub(r'{%\s*assign\s+\w+\s*=\s*"', r'"\s*\|\s*split:\s*"', r'"\s*%}')),
+    (('custom_attribute.${', 'join:'), r"\{\{custom_attribute\.\$\{(\w+)\}\}\}\s*\|\s*join:\s*['\"](.*?)['\"]\}\}", r"{{\1.join('\2')}}", 0,
+     lazy_tail_sub(r"\{\{custom_attribute\.\$\{\w+\}\}\}\s*\|\s*join:\s*['\"]", r"['\"]\}\}")),
+    # Convert increment and decrement
+    (('crement',), r'{%\s*(increment|decrement)\s+(\w+)\s*%}', convert_increment_decrement, 0, re.sub),
+    # Convert conditions (if, elsif, else)
+    (('if',), r'{%\s*(if|elsif)\s+(.*?)\s*%}', convert_variables_in_conditions, 0,
+     lazy_tail_sub(r'{%\s*(?:if|elsif)\s+', r'\s*%}')),
+    (('else',), r'{%\s*else\s*%}', '{% else %}', 0, re.sub),
+    # Convert loops
+    (('for', 'in'), r'{%\s*for\s+(.*?)\s*in\s+(.*?)\s*%}', convert_variables_in_loops, 0,
+     lazy_chain_sub(r'{%\s*for\s+', r'\s*in\s+', r'\s*%}')),
+    # Convert set with string slicing
+    (('set', '[:'), r'{%\s*set\s+(\w+)\s*=\s*(\w+\.\w+)\s*\[:(\d+)\]\s*%}', r'{%set \1 = \2[:\3]%}', 0, re.sub),
+    # Convert the multiply (`times`) filter
+    (('assign', 'times:'), r'{%\s*assign\s+(\w+)\s*=\s*(\d+)\s*\|\s*times:\s*(\d+)\s*%}', r'{%set \1 = \2 * \3%}', 0, re.sub),
+    # Convert the truncate filter with indices first
+    (('truncate:',), r'{{\s*(\w+)\[(\d+)\]\s*\|\s*truncate:\s*(\d+)\s*}}', r'{{\1[\2][:\3]}}', 0, re.sub),
+    # Convert the split filter
+    (('split',), r'{{\s*(\w+)\[(\d+)\]\s*\|\s*split\s*:\s*"([^"]+)"\s*}}', r'{{\1[\2].split("\3")}}', 0, re.sub),
+    (('split',), r'{{\s*(\w+)\s*\|\s*split\s*:\s*"([^"]+)"\s*}}', r'{{\1.split("\2")}}', 0, re.sub),
+    # Convert custom_attribute.${variable_name}
+    (('custom_attribute.${',), r'\{\{\s*custom_attribute\.\$\{(\w+)\}\s*\}\}', r"{{UserAttribute['\1']}}", 0, re.sub),
+    (('campaign.${name}',), r'\{\{\s*campaign\.\$\{name\}\s*\}\}', r"{{CampaignAttribute['c_n']}}", 0, re.sub),
+    (('content_blocks.${',), r'\{\{\s*content_blocks\.\$\{(\w+)\}\s*\}\}', r"{{ContentBlock['\1']}}", 0, re.sub),
+    # Convert string filters (downcase, upcase, capitalize, strip, escape, url_encode, newline_to_br, replace, remove, slice)
+    (('{{', '|'), r'\{\{\s*(\w+)\s*\|\s*(downcase|upcase|capitalize|strip|escape|url_encode|newline_to_br|replace|remove|slice)(?::(.*?))?\s*\}\}', convert_string_filters, 0,
+     lazy_tail_sub(r'\{\{\s*\w+\s*\|\s*(?:downcase|upcase|capitalize|strip|escape|url_encode|newline_to_br|replace|remove|slice)', r'\s*\}\}')),
+    (('.first',), r"{%\s*set\s+(\w+)\s*=\s*(\w+)\.first\s*%}", convert_dot_first_to_index_zero, 0, re.sub),
+    # Convert general assign statements; this should be placed after the specific times and truncate ones
+    (('assign',), r'{%\s*assign\s+(\w+)\s*=(.*?)\s*%}', r'{% set \1 = \2%}', 0,
+     lazy_tail_sub(r'{%\s*assign\s+\w+\s*=', r'\s*%}')),
+    # Convert case and capture blocks
+    (('endcase',), r'{%\s*case\s+(.*?)\s*%}(.*?){%\s*endcase\s*%}', convert_case_to_if_elif, re.DOTALL,
+     block_sub(r'{%\s*case\s+', r'{%\s*endcase\s*%}')),
+    (('endcapture',), r'{%\s*capture\s+(\w+)\s*%}(.+?){%\s*endcapture\s*%}', convert_capture_to_set, re.DOTALL,
+     block_sub(r'{%\s*capture\s+(\w+)\s*%}', r'{%\s*endcapture\s*%}', min_body=1)),
+    # Clean up variable references
+    (('{{',), r'{{\s*(\w+)\s*}}', r'{{ \1 }}', 0, re.sub),
+    # Fallback conversion for truncate filters (keep this as it worked)
+    (('truncate:',), r'\|\s*truncate:\s*(\d+)\s*%}', r'[:\1]%}', 0, re.sub),
+    # Broader fallback conversion for any remaining assign statements
+    (('assign',), r'{%\s*assign\s+(.*?)\s*%}', r'{% set \1 %}', 0, lazy_tail_sub(r'{%\s*assign\s+', r'\s*%}')),
+    # Fallback for removing only {{ and }} inside {% ... %}
+    (('{%', '{{'), r'({%\s*.*?)(\{\{(.*?)\}\})(.*?\s*%})', r'\1\3\4', 0, sub_outputs_in_tags),
+    # Fallback for removing all {{ and }} inside {% ... %}
+    (('{%', '{{'), r'{%.*?%}', remove_inner_double_curly_braces, re.DOTALL, sub_before_last_tag_close),
+    # Removal of | append: ""
+    (('append:',), r'\|\s*append:\s*""', '', 0, re.sub),
+    # Removal of {% break %}
+    (('break',), r'{%\s*break\s*%}', '', 0, re.sub),
+    (('truncate:',), r'{{\s*(\S+)\s*\|\s*truncate:\s*(\d+)\s*}}', r'{{ \1[:\2] }}', 0, sub_truncate_outputs),
+    (('endunless',), r'{%\s*unless\s+(.*?)\s*%}(.*?){%\s*endunless\s*%}', convert_unless_to_if_not, re.DOTALL,
+     block_sub(r'{%\s*unless\s+', r'{%\s*endunless\s*%}')),
+    (('replace:',), r"{%\s*set\s+(\w+)\s*=\s*([\w\.]+)\s*\|\s*replace:\s*'(.*?)'\s*,\s*'(.*?)'\s*%}", r"{% set \1 = \2 | replace('\3', '\4') %}", 0,
+     lazy_chain_sub(r"{%\s*set\s+\w+\s*=\s*[\w\.]+\s*\|\s*replace:\s*'", r"'\s*,\s*'", r"'\s*%}")),
+    (('number_with_delimiter',), r"{%\s*set\s+(\w+)\s*=\s*(\w+)\s*\|\s*number_with_delimiter\s*%}", convert_number_with_delimiter, 0, re.sub),
+    (('split:',), r"{%\s*set\s+(\w+)\s*=\s*([\w\.]+)\s*\|\s*split:\s*'(\S+)'\s*%}", r"{% set \1 = \2.split('\3') %}", 0, re.sub),
+    (('times:',), r"{%\s*set\s+(\w+)\s*=\s*([\w\.]+)\s*\|\s*times:\s*(\d+)\s*%}", r"{% set \1 = \2*\3 %}", 0, re.sub),
+    (('plus:',), r"{{\s*(.*?)\s*\|\s*plus:\s*(\d+)\s*}}", r"{{\1 + \2}}", 0,
+     lazy_tail_sub(r'{{\s*', r'\s*\|\s*plus:\s*\d+\s*}}')),
+    (('minus:',), r"{{\s*(.*?)\s*\|\s*minus:\s*(\d+)\s*}}", r"{{\1 - \2}}", 0,
+     lazy_tail_sub(r'{{\s*', r'\s*\|\s*minus:\s*\d+\s*}}')),
+    (('truncate:',), r"(\w+)\s*\|\s*truncate:(\d+)", r"\1[:\2]", 0, re.sub),
+    (('truncate:',), r'{%\s*set\s+(\w+)\s*=\s*(\w+)(\.[\w\.]*)?\s*\|\s*truncate:\s*(\d+)\s*%}', r"{% set \1 = \2\3[:\4] %}", 0, re.sub),
+    (("'now'", 'date:'), r"{%\s*set\s+(\w+)\s*=\s*'now'\s*\|\s*date:\s*\"([^\"]+)\"\s*%}", r"{% set \1 = today()|dateTimeFormatter(toFormat = '\2') %}", 0, re.sub),
+    (('"now"',), r'{%\s*set\s+(\w+)\s*=\s*"now"(.*?)%}', replacement, 0,
+     lazy_tail_sub(r'{%\s*set\s+\w+\s*=\s*"now"', r'%}')),
+    (('"now"', '%Y-%m-%d'), r"{%\s*set\s+(\w+)\s*=\s*\"now\"\s*\|\s*date:\s*('|\")%Y-%m-%d('|\")\s*%}", r"{% set \1 = today()|dateTimeFormatter(toFormat='%Y-%m-%d') %}", 0, re.sub),
+    (('split:',), r"{%\s*set\s+(\w+)\s*=\s*(\w+)\s*\|\s*split:\s*['\"](.*?)['\"]\s*%}", r"{% set \1 = \2.split('\3') %}", 0,
+     lazy_tail_sub(r"{%\s*set\s+\w+\s*=\s*\w+\s*\|\s*split:\s*['\"]", r"['\"]\s*%}")),
+    (('minus:',), r"{%\s*set\s+(\w+)\s*=\s*(\w+)\s*\|\s*minus:\s*(\w+)\s*%}", r"{% set \1 = \2 - \3 %}", 0, re.sub),
+    (('slice:',), r"{%\s*set\s+(\w+)\s*=\s*(\w+)\s*\[\s*(\d+)\s*\]\s*\|\s*strip\s*\|\s*slice:\s*(\d+),\s*(\d+)\s*%}", r"{% set \1 = \2[\3].strip()[\4:\5] %}", 0, re.sub),
+    (('set', '|'), r"{%\s*set\s+(\w+)\s*=\s*(\w+)\s*\|\s*(plus|minus|times|divided_by|modulo):\s*(\w+)\s*%}", replace_with_operator, 0, re.sub),
+]
+
+_COMPILED_REWRITE_RULES = [
+    (literals, compile_pattern(pattern, flags), repl, sub)
+    for literals, pattern, repl, flags, sub in LIQUID_REWRITE_RULES
+]
+
+# Tag/output openers and the quoted arguments of split/date filters, which
+# are the only places a rewrite can reach across a line.
+_LIQUID_TAG_RE = re.compile(r'\{(?=[{%])')
+_LIQUID_TOKEN_RE = re.compile(r'\{(?=[{%])|(?:split\s*:|date:)\s*"')
+_BLOCK_OPEN_RE = re.compile(r'\{%-?\s*(comment|case|capture|unless)')
+_BREAK_TAG_RE = re.compile(r'{%\s*break\s*%}')
+_APPEND_EMPTY_RE = re.compile(r'\|\s*append:\s*""')
+_BLOCK_CLOSE_RES = {
+    'comment': re.compile(r'{%-?\s*endcomment\s*-?%}'),
+    'case': re.compile(r'{%\s*endcase\s*%}'),
+    'capture': re.compile(r'{%\s*endcapture\s*%}'),
+    'unless': re.compile(r'{%\s*endunless\s*%}'),
+}
+
+def _is_safe_break(template, pos):
+    """
+    Checks that no rewrite rule can continue across the line break at pos.
+
+    Rules such as "{{ x | plus: 1 }}" or "| truncate: 5 %}" allow whitespace,
+    newlines included, around "|", ":", ",", "in", "%}" and "}}", so a break
+    touching one of those must stay inside its segment. {% break %} and
+    | append: "" are skipped over since the rules delete them.
+    """
+    before = pos
+    while True:
+        while before > 0 and template[before - 1].isspace():
+            before -= 1
+        if template.endswith('%}', 0, before):
+            start = template.rfind('{%', 0, before)
+            if start != -1 and _BREAK_TAG_RE.fullmatch(template, start, before):
+                before = start
+                continue
+        elif template.endswith('""', 0, before):
+            start = template.rfind('|', 0, before)
+            if start != -1 and _APPEND_EMPTY_RE.fullmatch(template, start, before):
+                before = start
+                continue
+        break
+    after = pos + 1
+    while True:
+        while after < len(template) and template[after].isspace():
+            after += 1
+        removed = _BREAK_TAG_RE.match(template, after) or _APPEND_EMPTY_RE.match(template, after)
+        if not removed:
+            break
+        after = removed.end()
+    if before > 0 and template[before - 1] in '|:,':
+        return False
+    if after < len(template) and template[after] in '|,%}':
+        return False
+    # "{% for x in y %}" may have its "in" keyword on either side of the break
+    line_start = template.rfind('\n', 0, before) + 1
+    if template.find('for', line_start, before) != -1:
+        if template.endswith('in', line_start, before) or template.startswith('in', after):
+            return False
+    return True
+
+def _first_safe_break(template, start, end):
+    pos = template.find('\n', start, end)
+    while pos != -1 and not _is_safe_break(template, pos):
+        pos = template.find('\n', pos + 1, end)
+    return pos
+
+def _last_safe_break(template, start, end):
+    pos = template.rfind('\n', start, end)
+    while pos != -1 and not _is_safe_break(template, pos):
+        pos = template.rfind('\n', start, pos)
+    return pos
+
+def split_liquid_segments(template):
+    """
+    Splits a template into segments that can be converted independently,
+    which is where convert_liquid_to_jinja_stream() may cut its input.
+
+    Scans the template once, tracking open {% %} tags, {{ }} outputs,
+    comment/case/capture/unless blocks and quoted split/date arguments. In
+    each stretch of text that none of them spans, it cuts after the first
+    and the last safe line break, so runs of plain markup end up in
+    segments of their own. Returns a list of strings that join back to the
+    template.
+    """
+    cuts = [0]
+    hold_until = 0
+    tag_close = output_close = -1
+    block_closes = {}
+
+    def cut_gap(end):
+        first = _first_safe_break(template, hold_until, end)
+        if first == -1:
+            return
+        if first + 1 > cuts[-1]:
+            cuts.append(first + 1)
+        last = _last_safe_break(template, first + 1, end)
+        if last != -1:
+            cuts.append(last + 1)
+
+    # Quoted split/date arguments only need tracking when they can occur
+    has_quoted_args = 'split' in template or 'date:' in template
+    token_re = _LIQUID_TOKEN_RE if has_quoted_args else _LIQUID_TAG_RE
+    for match in token_re.finditer(template):
+        pos = match.start()
+        if pos > hold_until:
+            cut_gap(pos)
+        if match.group() == '{':
+            if template[pos + 1] == '%':
+                if tag_close < pos + 2:
+                    tag_close = template.find('%}', pos + 2)
+                    if tag_close == -1:
+                        tag_close = len(template)
+                hold_until = max(hold_until, tag_close + 2)
+                # A "{%" nested in an unclosed tag can lose its "%}" to an
+                # earlier rewrite and then pair with any later one
+                if template.find('{%', pos + 2, tag_close) != -1:
+                    hold_until = len(template)
+                block = _BLOCK_OPEN_RE.match(template, pos)
+                if block:
+                    kind = block.group(1)
+                    # Capture and comment bodies must be non-empty, so the
+                    # closer is looked for past the opening tag
+                    body_start = tag_close + 3
+                    close_start, close_end = block_closes.get(kind, (-1, -1))
+                    if close_start < body_start:
+                        close = _BLOCK_CLOSE_RES[kind].search(template, body_start)
+                        close_start, close_end = (close.start(), close.end()) if close else (len(template), len(template))
+                        block_closes[kind] = (close_start, close_end)
+                    hold_until = max(hold_until, close_end)
+                    # Overlapping blocks can have a closer consumed by an
+                    # earlier block rewrite, moving the pairing arbitrarily far
+                    if _BLOCK_OPEN_RE.search(template, pos + 2, close_start):
+                        hold_until = len(template)
+            else:
+                if output_close < pos + 2:
+                    output_close = template.find('}}', pos + 2)
+                    if output_close == -1:
+                        output_close = len(template)
+                hold_until = max(hold_until, output_close + 2)
+                # Same for nested outputs, and for a "%}" that a string
+                # filter rewrite would drop along with its arguments
+                if template.find('{{', pos + 2, output_close) != -1 or template.find('%}', pos + 2, output_close) != -1:
+                    hold_until = len(template)
+        else:
+            quote_close = template.find('"', match.end())
+            hold_until = max(hold_until, len(template) if quote_close == -1 else quote_close + 1)
+    if hold_until < len(template):
+        cut_gap(len(template))
+    cuts.append(len(template))
+    return [template[start:end] for start, end in zip(cuts, cuts[1:]) if end > start]
+
+class RuleProfile:
+    """
+    Wall time, match count and bytes changed per rewrite rule, keyed by the
+    rule's position in LIQUID_REWRITE_RULES. A match only adds to
+    bytes_changed (the UTF-8 length of the matched text) when its
+    replacement differs from it.
+    """
+
+    def __init__(self):
+        self._rules = {}
+        self._lock = threading.Lock()
+
+    def record(self, index, seconds, matches, bytes_changed):
+        with self._lock:
+            entry = self._rules.setdefault(index, [0, 0.0, 0, 0])
+            entry[0] += 1
+            entry[1] += seconds
+            entry[2] += matches
+            entry[3] += bytes_changed
+
+    def clear(self):
+        with self._lock:
+            self._rules.clear()
+
+    def stats(self):
+        """Every rule, slowest first; rules that never ran are listed with zeros"""
+        with self._lock:
+            totals = {index: tuple(entry) for index, entry in self._rules.items()}
+        rules = []
+        for index, rule in enumerate(LIQUID_REWRITE_RULES):
+            runs, seconds, matches, bytes_changed = totals.get(index, (0, 0.0, 0, 0))
+            rules.append({
+                'rule': index,
+                'pattern': rule[1],
+                'runs': runs,
+                'seconds': seconds,
+                'matches': matches,
+                'bytes_changed': bytes_changed
+            })
+        rules.sort(key=lambda rule: rule['seconds'], reverse=True)
+        return {
+            'total_seconds': sum(rule['seconds'] for rule in rules),
+            'rules': rules
+        }
+
+# Set LIQUID_PROFILE_RULES=true to record every conversion in the process into
+# AGGREGATE_PROFILE; profile_conversion() records single calls
+AGGREGATE_PROFILE = RuleProfile()
+_aggregate_profiling = os.getenv('LIQUID_PROFILE_RULES', 'false').lower() == 'true'
+_profile_state = threading.local()
+
+def set_rule_profiling(enabled):
+    global _aggregate_profiling
+    _aggregate_profiling = bool(enabled)
+
+def get_rule_profile_stats():
+    return {'enabled': _aggregate_profiling, **AGGREGATE_PROFILE.stats()}
+
+def clear_rule_profile():
+    AGGREGATE_PROFILE.clear()
+
+@contextlib.contextmanager
+def profile_conversion():
+    """
+    Profiles the conversions this thread runs inside the with block, e.g. to
+    see where a slow template spends its time. The conversion cache is
+    bypassed meanwhile; templates convert_many() sends to worker processes
+    are not recorded.
+    """
+    profile = RuleProfile()
+    previous = getattr(_profile_state, 'profiles', ())
+    _profile_state.profiles = previous + (profile,)
+    try:
+        yield profile
+    finally:
+        _profile_state.profiles = previous
+
+def _active_profiles():
+    profiles = getattr(_profile_state, 'profiles', ())
+    if _aggregate_profiling:
+        return profiles + (AGGREGATE_PROFILE,)
+    return profiles
+
+def _apply_rewrite_rules_profiled(text, profiles):
+    for index, (literals, pattern, repl, sub) in enumerate(_COMPILED_REWRITE_RULES):
+        if not all(literal in text for literal in literals):
+            continue
+        counts = [0, 0]
+        def counting_repl(match, repl=repl):
+            replaced = _expand(match, repl)
+            counts[0] += 1
+            if replaced != match.group():
+                counts[1] += len(match.group().encode('utf-8', 'surrogatepass'))
+            return replaced
+        start = time.perf_counter()
+        text = sub(pattern, counting_repl, text)
+        seconds = time.perf_counter() - start
+        for profile in profiles:
+            profile.record(index, seconds, counts[0], counts[1])
+    return text
+
+def _apply_rewrite_rules(text):
+    # Every rule needs one of these to match, so plain HTML passes through untouched
+    if '{{' not in text and '{%' not in text and '|' not in text:
+        return text
+    profiles = _active_profiles()
+    if profiles:
+        return _apply_rewrite_rules_profiled(text, profiles)
+    for literals, pattern, repl, sub in _COMPILED_REWRITE_RULES:
+        for literal in literals:
+            if literal not in text:
+                break
+        else:
+            text = sub(pattern, repl, text)
+    return text
+
+class ConversionCache:
+    """
+    LRU cache of converted templates keyed by a hash of the Liquid source.
+
+    Bounded both by entry count and by the memory the cached outputs take,
+    in bytes as sys.getsizeof() reports them (a non-ASCII character takes 2
+    or 4), so a few huge email bodies cannot crowd out everything else.
+    Counts hits and misses for monitoring.
+    """
+    def __init__(self, max_entries, max_bytes):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key_for(text):
+        return hashlib.blake2b(text.encode('utf-8', 'surrogatepass'), digest_size=16).digest()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, value):
+        size = sys.getsizeof(value)
+        if size > self.max_bytes or self.max_entries <= 0:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous[1]
+            self._entries[key] = (value, size)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_entries': self.max_entries,
+                'max_bytes': self.max_bytes
+            }
+
+# Shared by every caller in the process; set LIQUID_CACHE_MAX_ENTRIES=0 to disable
+CONVERSION_CACHE = ConversionCache(
+    max_entries=int(os.getenv('LIQUID_CACHE_MAX_ENTRIES', '4096')),
+    max_bytes=int(os.getenv('LIQUID_CACHE_MAX_BYTES', str(64 * 1024 * 1024)))
+)
+
+def get_conversion_cache_stats():
+    return CONVERSION_CACHE.stats()
+
+def clear_conversion_cache():
+    CONVERSION_CACHE.clear()
+
+# Substrings every conversion rule needs; utm_content= is the hyphen rewrite for
+# plain-text URLs, the one rule that works without Liquid delimiters
+LIQUID_MARKERS = ('{%', '{{', '|', 'utm_content=')
+
+def has_liquid_syntax(text):
+    """Cheap pre-scan: False means converting text only strips it"""
+    return any(marker in text for marker in LIQUID_MARKERS)
+
+_fast_path_lock = threading.Lock()
+_fast_path_counts = {'calls': 0, 'fast_path': 0}
+
+def _count_call(fast_path):
+    with _fast_path_lock:
+        _fast_path_counts['calls'] += 1
+        if fast_path:
+            _fast_path_counts['fast_path'] += 1
+
+def get_fast_path_stats():
+    """How many non-blank conversions skipped the rule chain for having no Liquid syntax"""
+    with _fast_path_lock:
+        calls = _fast_path_counts['calls']
+        fast_path = _fast_path_counts['fast_path']
+    return {
+        'calls': calls,
+        'fast_path': fast_path,
+        'fast_path_rate': fast_path / calls if calls else 0.0
+    }
+
+def clear_fast_path_stats():
+    with _fast_path_lock:
+        _fast_path_counts['calls'] = 0
+        _fast_path_counts['fast_path'] = 0
+
+def get_converter_metrics():
+    """Cache, fast-path and per-rule profiling counters, as served on /metrics/converter"""
+    return {
+        'cache': get_conversion_cache_stats(),
+        'fast_path': get_fast_path_stats(),
+        'rule_profile': get_rule_profile_stats()
+    }
+
+def convert_liquid_to_jinja(liquid_template):
+    # Handle None or non-string inputs
+    if liquid_template is None:
+        return ''
+    
+    # Convert to string if not already a string
+    if not isinstance(liquid_template, str):
+        liquid_template = str(liquid_template)
+    
+    # Handle empty strings
+    if not liquid_template.strip():
+        return liquid_template
+
+    # Plain push titles, SMS bodies and names need no rule at all
+    if not has_liquid_syntax(liquid_template):
+        _count_call(True)
+        return liquid_template.strip()
+    _count_call(False)
+
+    # Shared footers, content blocks and per-platform push copies repeat a lot
+    cache_key = ConversionCache.key_for(liquid_template)
+    # A profiled call has to run the rules to be of any use
+    cached = None if getattr(_profile_state, 'profiles', ()) else CONVERSION_CACHE.get(cache_key)
+    if cached is not None:
+        return cached
+
+    if len(liquid_template) >= STREAM_THRESHOLD:
+        # Keeps the intermediate copies of very large bodies chunk-sized
+        jinja_template = ''.join(convert_liquid_to_jinja_stream(liquid_template))
+    else:
+        jinja_template = replace_hyphens_with_underscores(_apply_rewrite_rules(liquid_template)).strip()
+
+    # Ensure final value is a string
+    jinja_template = jinja_template or ''
+    CONVERSION_CACHE.put(cache_key, jinja_template)
+    return jinja_template
+
+# Templates at least this long are converted by convert_liquid_to_jinja()
+# through convert_liquid_to_jinja_stream(), STREAM_CHUNK_SIZE characters at a time
+STREAM_THRESHOLD = int(os.getenv('LIQUID_STREAM_THRESHOLD', str(256 * 1024)))
+STREAM_CHUNK_SIZE = int(os.getenv('LIQUID_STREAM_CHUNK_SIZE', str(64 * 1024)))
+
+def _is_final_cut(buffer, cut):
+    """
+    Checks that a segment boundary found in buffer stays one whatever text
+    is read after it. _is_safe_break() looks past the line break for "|",
+    "%}", "in" and removable {% break %} / | append: "" tags, which may be
+    cut off by the end of the buffer, and a split filter may have its ":"
+    on the next line.
+    """
+    before = cut
+    while before > 0 and buffer[before - 1].isspace():
+        before -= 1
+    if buffer.endswith('split', 0, before):
+        return False
+    after = cut
+    while True:
+        after = _WHITESPACE_RUN.match(buffer, after).end()
+        if after + 2 > len(buffer):
+            return False
+        removed = _BREAK_TAG_RE.match(buffer, after) or _APPEND_EMPTY_RE.match(buffer, after)
+        if not removed:
+            break
+        after = removed.end()
+    if buffer[after] == '{' and buffer.find('%}', after) == -1:
+        return False
+    if buffer[after] == '|' and buffer.find('""', after) == -1:
+        return False
+    return True
+
+def _final_segment_batches(pieces, chunk_size):
+    """
+    Reads text from pieces and yields lists of segments as soon as no later
+    text can change them. The text after the last final cut is kept and
+    segmented again once more has been read; the last list holds the rest.
+    """
+    pending = []
+    pending_length = 0
+    retry_at = chunk_size
+    held_segments = None
+    for piece in pieces:
+        pending.append(piece)
+        pending_length += len(piece)
+        held_segments = None
+        if pending_length < retry_at:
+            continue
+        buffer = ''.join(pending)
+        segments = split_liquid_segments(buffer)
+        ends = []
+        end = 0
+        for segment in segments:
+            end += len(segment)
+            ends.append(end)
+        final = len(segments) - 1
+        while final > 0 and not _is_final_cut(buffer, ends[final - 1]):
+            final -= 1
+        if final == 0:
+            # An unclosed tag or block holds everything; wait for four times
+            # as much text so the buffer is not segmented over and over
+            pending = [buffer]
+            retry_at = 4 * pending_length
+            held_segments = segments
+            continue
+        yield segments[:final]
+        rest = buffer[ends[final - 1]:]
+        pending = [rest]
+        pending_length = len(rest)
+        retry_at = pending_length + chunk_size
+    if held_segments is not None:
+        # Nothing was read since the last attempt, so its segments stand
+        yield held_segments
+        return
+    buffer = ''.join(pending)
+    if buffer:
+        yield split_liquid_segments(buffer)
+
+def _last_url_end(parts):
+    """
+    Returns (index, offset) just past the last URL end character in parts,
+    or None if there is none. A utm_content hyphen rewrite never spans one,
+    so the text up to there converts the same whatever follows it.
+    """
+    for index in range(len(parts) - 1, -1, -1):
+        offset = max(parts[index].rfind(char) for char in _URL_END_CHARS) + 1
+        if offset:
+            return index, offset
+    return None
+
+def convert_liquid_to_jinja_stream(liquid_template, chunk_size=None):
+    """
+    Converts a Liquid template piece by piece, yielding the Jinja output.
+
+    Accepts a string, a text file object or an iterable of strings. The input
+    is only cut at segment boundaries that later text cannot move, so the
+    joined output is exactly what convert_liquid_to_jinja() returns, while
+    memory stays proportional to chunk_size plus any tag or block still open.
+    The conversion cache is not used.
+    """
+    chunk_size = chunk_size or STREAM_CHUNK_SIZE
+    if liquid_template is None:
+        return
+    if isinstance(liquid_template, str):
+        pieces = (liquid_template[i:i + chunk_size] for i in range(0, len(liquid_template), chunk_size))
+    elif hasattr(liquid_template, 'read'):
+        pieces = iter(lambda: liquid_template.read(chunk_size), '')
+    else:
+        pieces = liquid_template
+
+    # Whitespace-only templates come back unchanged rather than stripped
+    blank_input = []
+    def track_blank_input(pieces):
+        nonlocal blank_input
+        for piece in pieces:
+            if blank_input is not None:
+                if piece.strip():
+                    blank_input = None
+                else:
+                    blank_input.append(piece)
+            yield piece
+
+    started = False
+    trailing = ''
+    def strip_edges(text):
+        # The output is stripped as a whole, so trailing whitespace is held
+        # back until more text follows it
+        nonlocal started, trailing
+        if not started:
+            text = text.lstrip()
+            if not text:
+                return ''
+            started = True
+        body = text.rstrip()
+        if not body:
+            trailing += text
+            return ''
+        text, trailing = trailing + body, text[len(body):]
+        return text
+
+    # Variable hyphens never cross a segment boundary, utm_content ones can,
+    # but not the end of their URL. held never contains a URL end character,
+    # so only the newly converted segments are searched for one
+    held = []
+    for segments in _final_segment_batches(track_blank_input(pieces), chunk_size):
+        converted = [_replace_variable_hyphens(_apply_rewrite_rules(segment)) for segment in segments]
+        cut = _last_url_end(converted)
+        if cut is None:
+            held.extend(converted)
+            continue
+        index, offset = cut
+        held.extend(converted[:index])
+        held.append(converted[index][:offset])
+        text = strip_edges(_replace_utm_content_hyphens(''.join(held)))
+        held = [converted[index][offset:]] + converted[index + 1:]
+        if text:
+            yield text
+    text = strip_edges(_replace_utm_content_hyphens(''.join(held)))
+    if text:
+        yield text
+    elif blank_input:
+        yield ''.join(blank_input)
+
+# Unique templates at least this long are converted in worker processes by
+# convert_many(); shorter ones are cheaper to convert than to ship to a worker
+BATCH_PROCESS_THRESHOLD = int(os.getenv('LIQUID_BATCH_PROCESS_THRESHOLD', '20000'))
+# Every service process gets a pool of its own, so keep it small
+BATCH_MAX_WORKERS = int(os.getenv('LIQUID_BATCH_MAX_WORKERS', '2'))
+# Seconds to wait for each worker result before converting that template inline
+BATCH_TIMEOUT_SECONDS = float(os.getenv('LIQUID_BATCH_TIMEOUT_SECONDS', '30'))
+# Forking a multi-threaded server process can copy a lock held by another
+# thread into the worker, so workers start from a clean interpreter instead
+BATCH_START_METHOD = os.getenv('LIQUID_BATCH_START_METHOD') or (
+    'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+)
+
+_process_pool = None
+_process_pool_lock = threading.Lock()
+
+def _init_worker():
+    # Results are cached by the process that called convert_many()
+    CONVERSION_CACHE.max_entries = 0
+
+def _get_process_pool():
+    global _process_pool
+    with _process_pool_lock:
+        if _process_pool is None:
+            _process_pool = ProcessPoolExecutor(
+                max_workers=BATCH_MAX_WORKERS,
+                mp_context=multiprocessing.get_context(BATCH_START_METHOD),
+                initializer=_init_worker
+            )
+        return _process_pool
+
+def _reset_process_pool():
+    global _process_pool
+    with _process_pool_lock:
+        if _process_pool is not None:
+            _process_pool.shutdown(wait=False, cancel_futures=True)
+        _process_pool = None
+
+def _convert_in_pool(texts):
+    """
+    Converts texts in the process pool. A template whose worker fails, or
+    does not answer within BATCH_TIMEOUT_SECONDS, is converted inline, and
+    the pool is replaced before the next batch.
+    """
+    try:
+        pool = _get_process_pool()
+        futures = [pool.submit(convert_liquid_to_jinja, text) for text in texts]
+    except (BrokenProcessPool, RuntimeError) as e:
+        print(f"Conversion worker pool failed, converting inline: {str(e)}")
+        _reset_process_pool()
+        return [convert_liquid_to_jinja(text) for text in texts]
+
+    converted = []
+    pool_failed = False
+    for text, future in zip(texts, futures):
+        try:
+            converted.append(future.result(timeout=BATCH_TIMEOUT_SECONDS))
+            continue
+        except FutureTimeoutError:
+            print(f"⏱️ Conversion worker timed out after {BATCH_TIMEOUT_SECONDS}s, converting inline")
+        except BrokenProcessPool as e:
+            print(f"Conversion worker pool failed, converting inline: {str(e)}")
+        pool_failed = True
+        future.cancel()
+        converted.append(convert_liquid_to_jinja(text))
+    if pool_failed:
+        _reset_process_pool()
+    return converted
+
+def convert_many(templates):
+    """
+    Converts a list or dict of Liquid templates in one call.
+
+    Identical templates are converted once. Unique templates of at least
+    BATCH_PROCESS_THRESHOLD characters that have Liquid syntax and are not
+    already cached are converted in a process pool of BATCH_MAX_WORKERS
+    workers (0 converts everything inline), the rest inline.
+    Returns the results in input order: a list for a list, a dict with the
+    same keys for a dict.
+    """
+    if isinstance(templates, dict):
+        keys = list(templates.keys())
+        values = list(templates.values())
+    else:
+        keys = None
+        values = list(templates)
+
+    # None and non-string inputs are normalized exactly as convert_liquid_to_jinja does
+    texts = ['' if value is None else value if isinstance(value, str) else str(value) for value in values]
+    results = dict.fromkeys(texts)
+
+    large_texts = []
+    for text in results:
+        if BATCH_MAX_WORKERS > 0 and len(text) >= BATCH_PROCESS_THRESHOLD and has_liquid_syntax(text):
+            cache_key = ConversionCache.key_for(text)
+            cached = CONVERSION_CACHE.get(cache_key)
+            if cached is not None:
+                results[text] = cached
+            else:
+                large_texts.append(text)
+        else:
+            results[text] = convert_liquid_to_jinja(text)
+
+    if large_texts:
+        for text, jinja_template in zip(large_texts, _convert_in_pool(large_texts)):
+            results[text] = jinja_template
+            # Workers do not cache, so keep the result here
+            CONVERSION_CACHE.put(ConversionCache.key_for(text), jinja_template)
+
+    if keys is None:
+        return [results[text] for text in texts]
+    return {key: results[text] for key, text in zip(keys, texts)}
+
+# Known conversions the regex stub the services used to fall back on gets wrong
+CONVERTER_SELF_CHECKS = [
+    ('{% assign first-name = "x" %}Hi {{custom_attribute.${first_name}}}', "{% set first_name = \"x\" %}Hi {{UserAttribute['first_name']}}"),
+    ('{% case a %}{% when 1 %}one{% endcase %}', '{% if a == 1 %}one\n{% endif %}'),
+]
+
+def verify_converter():
+    """Raises RuntimeError unless the full Liquid -> Jinja converter is in use"""
+    for liquid_template, expected in CONVERTER_SELF_CHECKS:
+        converted = convert_liquid_to_jinja(liquid_template)
+        if converted != expected:
+            raise RuntimeError(
+                f"Liquid converter self-check failed for {liquid_template!r}: "
+                f"expected {expected!r}, got {converted!r}"
+            )
+    return True
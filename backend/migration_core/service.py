@@ -0,0 +1,22 @@
+"""
+FastAPI wiring shared by the migration services.
+
+Takes the app rather than importing FastAPI, so the package itself only
+depends on requests.
+"""
+from .liquid_to_jinja import get_converter_metrics, verify_converter
+
+
+def add_converter_service(app, tags=None):
+    """
+    Refuses to start with anything but the real converter, then serves its
+    cache, fast-path and per-rule profiling counters on GET /metrics/converter.
+    """
+    verify_converter()
+
+    @app.get("/metrics/converter", tags=tags)
+    def converter_metrics():
+        """Liquid -> Jinja converter cache, fast-path and per-rule profiling counters."""
+        return get_converter_metrics()
+
+    return app
@@ -1,13 +1,10 @@
 import os
 import re
-import sys
 import json
-import time
-import html
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 from datetime import datetime, timedelta
 import requests
-from fastapi import FastAPI, HTTPException, Body
+from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel, Field
 
@@ -59,6 +56,7 @@ class MoEngageCredentials(BaseModel):
     refresh_token: str = Field(..., description="MoEngage Refresh Token")
     origin: str = Field(default="https://dashboard-01.moengage.com", description="MoEngage Origin URL")
     api_url: str = Field(default="https://dashboard-01.moengage.com/v1.0/campaigns/draft", description="MoEngage API URL for creating drafts")
+    app_key: Optional[str] = Field(default=None, description="MoEngage workspace App Key; uploaded images are reused across migrations only within it")
 
 class PushMigrationRequest(BaseModel):
     campaign: Dict[str, Any] = Field(..., description="The root 'campaign' object from the Braze push JSON export.")
@@ -68,222 +66,8 @@ class PushMigrationRequest(BaseModel):
 # 3. CORE MIGRATION LOGIC (Adapted from the script)
 # ==============================================================================
 
-# --- Placeholder/External Modules ---
-try:
-    from liquid_to_jinja import convert_liquid_to_jinja
-except ImportError:
-    def convert_liquid_to_jinja(text):
-        if text is None: return ""
-        if not isinstance(text, str): text = str(text)
-        text = re.sub(r'\{\{ ?\$(.*?) ?\}\}', r'{{ \1 }}', text)
-        return text
-
-# --- NEW: Full BrazeCdnToMoenageCdn class is now integrated here ---
-class BrazeCdnToMoenageCdn:
-    @staticmethod
-    def __extract_braze_image_urls(payload):
-        decoded_payload = payload.encode().decode('unicode_escape')
-        decoded_payload = html.unescape(decoded_payload)
-        
-        # Comprehensive patterns to catch ALL Braze-related image URLs
-        patterns = [
-            # Original braze-images.com domain
-            r"https:\/\/braze-images\.com\/[^\"\s,]+",
-            
-            # All braze.com subdomains (including cdn-staging, assets, etc.)
-            r"https:\/\/[a-zA-Z0-9-]+\.braze\.com\/[^\"\s,]+",
-            
-            # Braze social icons on S3
-            r"https:\/\/braze-social-icons\.s3\.amazonaws\.com\/[^\"\s,]+",
-            
-            # Other potential Braze S3 buckets
-            r"https:\/\/braze-[a-zA-Z0-9-]+\.s3\.amazonaws\.com\/[^\"\s,]+",
-            
-            # Braze CDN variations
-            r"https:\/\/cdn[a-zA-Z0-9-]*\.braze\.com\/[^\"\s,]+",
-            
-            # Assets subdomain variations
-            r"https:\/\/assets[a-zA-Z0-9-]*\.braze\.com\/[^\"\s,]+",
-            
-            # Any other braze-related domains
-            r"https:\/\/[a-zA-Z0-9-]*braze[a-zA-Z0-9-]*\.[a-zA-Z0-9.-]+\/[^\"\s,]+",
-            
-            # Appboy legacy domains (Braze was formerly Appboy)
-            r"https:\/\/[a-zA-Z0-9-]*appboy[a-zA-Z0-9-]*\.[a-zA-Z0-9.-]+\/[^\"\s,]+",
-        ]
-
-        all_matches = []
-        for pattern in patterns:
-            matches = re.findall(pattern, decoded_payload, re.IGNORECASE)
-            all_matches.extend(matches)
-        
-        # Remove duplicates and filter for actual image files
-        unique_urls = list(set(all_matches))
-        
-        # Additional filtering for image file extensions and valid URLs
-        image_extensions = ('.jpg', '.jpeg', '.png', '.gif', '.webp', '.svg', '.bmp', '.ico')
-        filtered_urls = []
-        
-        for url in unique_urls:
-            # Remove any trailing quotes or spaces
-            url = url.strip('\'"')
-            
-            # Check if it's likely an image (has image extension or no extension but comes from image CDN)
-            url_lower = url.lower()
-            is_image = (
-                any(ext in url_lower for ext in image_extensions) or
-                'image' in url_lower or
-                'icon' in url_lower or
-                'logo' in url_lower or
-                'assets/images' in url_lower or
-                url_lower.endswith('/') == False  # Could be dynamic image URL without extension
-            )
-            
-            if is_image:
-                filtered_urls.append(url)
-        
-        return filtered_urls
-
-    @staticmethod
-    def __download_image(url):
-        try:
-            # Add headers to mimic a real browser request
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-                'Accept': 'image/webp,image/apng,image/svg+xml,image/*,*/*;q=0.8',
-                'Accept-Language': 'en-US,en;q=0.9',
-            }
-            
-            response = requests.get(url, headers=headers, timeout=30)
-            if response.status_code == 200:
-                # Try to get filename from URL
-                url_path = url.split('/')[-1].split('?')[0]
-                
-                # If no proper filename, generate one based on content type
-                if not url_path or '.' not in url_path:
-                    content_type = response.headers.get('content-type', '').lower()
-                    if 'image/jpeg' in content_type or 'image/jpg' in content_type:
-                        extension = '.jpg'
-                    elif 'image/png' in content_type:
-                        extension = '.png'
-                    elif 'image/gif' in content_type:
-                        extension = '.gif'
-                    elif 'image/webp' in content_type:
-                        extension = '.webp'
-                    elif 'image/svg' in content_type:
-                        extension = '.svg'
-                    else:
-                        extension = '.jpg'  # Default fallback
-                    
-                    file_name = f"braze_image_{int(time.time())}{extension}"
-                else:
-                    file_name = url_path
-                
-                # Ensure filename is safe
-                file_name = re.sub(r'[^\w\-_\.]', '_', file_name)
-                
-                with open(file_name, 'wb') as file:
-                    file.write(response.content)
-                return file_name
-            else:
-                print(f"Failed to download image from {url}: HTTP {response.status_code}")
-                return None
-        except Exception as e:
-            print(f"Error downloading image from {url}: {str(e)}")
-            return None
-
-    @staticmethod
-    def __upload_image(file_name, headers):
-        origin = headers.get('origin', 'https://dashboard-01.moengage.com').rstrip('/')
-        moe_image_cdn_url = f'{origin}/v1/platform/services/upload-file'
-        try:
-            with open(file_name, 'rb') as file:
-                files = {'file': (file_name, file)}
-                upload_headers = {k: v for k, v in headers.items() if k.lower() != 'content-type'}
-                response = requests.post(moe_image_cdn_url, headers=upload_headers, files=files, timeout=30)
-            if response.status_code == 201:
-                return response.json().get('url', '')
-            return None
-        except Exception:
-            return None
-
-    @staticmethod
-    def process_images(payload, headers):
-        if not payload or not isinstance(payload, str): 
-            return payload or ""
-        
-        print(f"Processing images in payload...")
-        image_urls = BrazeCdnToMoenageCdn.__extract_braze_image_urls(payload)
-        
-        if not image_urls:
-            print("No Braze image URLs found in payload")
-            return payload
-        
-        print(f"Found {len(image_urls)} Braze image URLs:")
-        for i, url in enumerate(image_urls, 1):
-            print(f"  {i}. {url}")
-        
-        for url in image_urls:
-            print(f"\nProcessing image: {url}")
-            
-            # Download the image
-            file_name = BrazeCdnToMoenageCdn.__download_image(url)
-            if file_name:
-                print(f"  ✅ Downloaded as: {file_name}")
-                
-                # Upload to MoEngage
-                moe_cdn_url = BrazeCdnToMoenageCdn.__upload_image(file_name, headers)
-                if moe_cdn_url:
-                    print(f"  ✅ Uploaded to MoEngage: {moe_cdn_url}")
-                    payload = payload.replace(url, moe_cdn_url)
-                    print(f"  ✅ Replaced in payload")
-                else:
-                    print(f"  ❌ Failed to upload to MoEngage")
-                
-                # Clean up downloaded file
-                try: 
-                    os.remove(file_name)
-                    print(f"  🗑️ Cleaned up temporary file")
-                except Exception as e:
-                    print(f"  ⚠️ Failed to clean up file {file_name}: {e}")
-            else:
-                print(f"  ❌ Failed to download image")
-        
-        print(f"Image processing completed")
-        return payload
-
-    @staticmethod
-    def process_single_image_url(image_url, headers):
-        """Process a single image URL for conversion from Braze CDN to MoEngage CDN"""
-        if not image_url:
-            return ""
-        
-        print(f"Processing single image: {image_url}")
-        
-        # Download the image
-        file_name = BrazeCdnToMoenageCdn.__download_image(image_url)
-        if file_name:
-            print(f"  ✅ Downloaded as: {file_name}")
-            
-            # Upload to MoEngage
-            moe_cdn_url = BrazeCdnToMoenageCdn.__upload_image(file_name, headers)
-            if moe_cdn_url:
-                print(f"  ✅ Uploaded to MoEngage: {moe_cdn_url}")
-                
-                # Clean up downloaded file
-                try: 
-                    os.remove(file_name)
-                    print(f"  🗑️ Cleaned up temporary file")
-                except Exception as e:
-                    print(f"  ⚠️ Failed to clean up file {file_name}: {e}")
-                
-                return moe_cdn_url
-            else:
-                print(f"  ❌ Failed to upload to MoEngage")
-        else:
-            print(f"  ❌ Failed to download image")
-        
-        return image_url  # Return original URL if processing fails
+# --- Shared Conversion Modules (backend/migration_core) ---
+from migration_core import BrazeCdnToMoenageCdn, add_converter_service, convert_liquid_to_jinja, get_http_session
 
 class PushCampaignMigrator: #
     """
@@ -298,6 +82,7 @@ class PushCampaignMigrator: #
         self.config = config #
         self.preview_mode = config.get('preview_mode', False) #
         self.api_url = config['moengage']['api_url'] #
+        self.app_key = config['moengage'].get('app_key')
         self.headers = { #
             'authorization': f"Bearer {config['moengage']['bearer_token']}", #
             'origin': config['moengage']['origin'], #
@@ -501,7 +286,7 @@ class PushCampaignMigrator: #
         # Handle image
         image_url = android_action.get("image_url") #
         if image_url: #
-            final_image_url = BrazeCdnToMoenageCdn.process_single_image_url(image_url, self.cdn_headers) #
+            final_image_url = BrazeCdnToMoenageCdn.process_single_image_url(image_url, self.cdn_headers, workspace=self.app_key) #
             android_config["widgetArray"] = [{"WidgetName": "image", "inputImageURL": final_image_url, "selectedImageUploadType": "url"}] #
         
         # Handle buttons
@@ -525,7 +310,7 @@ class PushCampaignMigrator: #
         # Handle image
         image_url = ios_action.get("ios_image_url") #
         if image_url: #
-            final_image_url = BrazeCdnToMoenageCdn.process_single_image_url(image_url, self.cdn_headers) #
+            final_image_url = BrazeCdnToMoenageCdn.process_single_image_url(image_url, self.cdn_headers, workspace=self.app_key) #
             ios_config["widgetArray"] = [{"WidgetName": "image", "inputImageURL": final_image_url, "selectedImageUploadType": "url"}] #
         
         # Handle buttons
@@ -551,7 +336,7 @@ class PushCampaignMigrator: #
         # Handle image
         image_url = web_action.get("image_url") or web_action.get("large_image_url")
         if image_url:
-            final_image_url = BrazeCdnToMoenageCdn.process_single_image_url(image_url, self.cdn_headers)
+            final_image_url = BrazeCdnToMoenageCdn.process_single_image_url(image_url, self.cdn_headers, workspace=self.app_key)
             web_config["imageUrl"] = final_image_url
             web_config["widgetArray"] = [{"WidgetName": "image", "inputImageURL": final_image_url, "selectedImageUploadType": "url"}]
 
@@ -716,6 +501,8 @@ class PushCampaignMigrator: #
 # 4. API ENDPOINT
 # ==============================================================================
 
+add_converter_service(app, tags=["Health"])
+
 @app.post("/v1/migrate-push-campaign", response_model=Dict[str, Any], tags=["Push Migration"])
 def migrate_push_campaign(request_body: PushMigrationRequest):
     """
@@ -745,7 +532,7 @@ def migrate_push_campaign(request_body: PushMigrationRequest):
         }
         
         # Make API call to create draft
-        response = requests.post(
+        response = get_http_session().post(
             request_body.moengage_credentials.api_url,
             json=moengage_payload,
             headers=headers,
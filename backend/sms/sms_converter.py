@@ -1,13 +1,11 @@
 import os
-import re
-import sys
 import json
 import time
 from typing import Dict, Any, List
 from datetime import datetime, timedelta
 
 import requests
-from fastapi import FastAPI, HTTPException, Body
+from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel, Field
 
@@ -72,15 +70,8 @@ class MigrationSuccessResponse(BaseModel):
 # 3. CORE MIGRATION LOGIC
 # ==============================================================================
 
-# --- Helper Function ---
-try:
-    from liquid_to_jinja import convert_liquid_to_jinja
-except ImportError:
-    def convert_liquid_to_jinja(text):
-        if text is None: return ""
-        if not isinstance(text, str): text = str(text)
-        text = re.sub(r'\{\{ ?\$(.*?) ?\}\}', r'{{ \1 }}', text)
-        return text
+# --- Shared Conversion Modules (backend/migration_core) ---
+from migration_core import add_converter_service, convert_liquid_to_jinja, get_http_session
 
 class SmsCampaignMigrator:
     """Handles the migration of Braze SMS campaigns to MoEngage."""
@@ -121,7 +112,7 @@ class SmsCampaignMigrator:
         """Fetches the default SMS sender settings from the MoEngage API."""
         sender_api_url = f"{self.credentials.origin}/v2/settings/sms?api=1"
         try:
-            response = requests.get(sender_api_url, headers=self.headers, timeout=30)
+            response = get_http_session().get(sender_api_url, headers=self.headers, timeout=30)
             response.raise_for_status()  # Raises an HTTPError for bad responses (4xx or 5xx)
             settings = response.json()
             if settings.get("status") == "success" and "generalSettings" in settings:
@@ -374,7 +365,7 @@ class SmsCampaignMigrator:
     def create_campaign_in_moengage(self, payload: Dict[str, Any]) -> requests.Response:
         if self.api_delay > 0:
             time.sleep(self.api_delay)
-        return requests.post(self.api_url, headers=self.headers, data=json.dumps(payload))
+        return get_http_session().post(self.api_url, headers=self.headers, data=json.dumps(payload))
 
 
 # ==============================================================================
@@ -391,6 +382,8 @@ def health_check():
         "port": 8083
     }
 
+add_converter_service(app, tags=["Health"])
+
 @app.post("/v1/migrate-sms-campaign", response_model=MigrationSuccessResponse, tags=["Migration"])
 def migrate_sms_campaign(request_body: BrazeCampaign):
     """Migrates a Braze SMS campaign to a MoEngage draft."""
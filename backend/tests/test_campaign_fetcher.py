@@ -0,0 +1,206 @@
+"""
+Tests for the Braze campaign fetcher against a fake Braze served through
+httpx.MockTransport, so no request leaves the process.
+
+Usage (from the backend directory):
+    python -m pytest tests
+"""
+
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from campaign_fetcher import braze_campaign_fetcher as fetcher
+
+HEADERS = {
+    'x-dashboard-url': 'https://dashboard-09.braze.com',
+    'x-session-id': 'session',
+    'x-app-group-id': 'app-group'
+}
+
+def _campaign(number, last_edited=None, status='active'):
+    return {
+        'id': f'c{number}',
+        'campaign_name': f'Campaign {number}',
+        'campaign_type': 'email',
+        'status': status,
+        'last_edited': 100000 - number if last_edited is None else last_edited
+    }
+
+class _FakeBraze:
+    """campaigns_data_v2 and /campaigns/details over a list kept most recently edited first"""
+
+    def __init__(self, campaigns):
+        self.campaigns = campaigns
+        self.detail_delays = {}
+        self.list_starts = []
+        self.details_finished = []
+        self.details_in_flight = 0
+        self.max_details_in_flight = 0
+
+    def edit(self, campaign_id, last_edited):
+        campaign = next(c for c in self.campaigns if c['id'] == campaign_id)
+        self.campaigns.remove(campaign)
+        self.campaigns.insert(0, {**campaign, 'last_edited': last_edited})
+
+    async def handle(self, request):
+        params = request.url.params
+        if request.url.path == '/engagement/campaigns_data_v2':
+            start, limit = int(params['start']), int(params['limit'])
+            # The authentication test asks for one unsorted campaign
+            if 'sortby' in params:
+                self.list_starts.append(start)
+            return httpx.Response(200, json={'results': self.campaigns[start:start + limit]})
+        if request.url.path == '/campaigns/details':
+            campaign_id = params['campaign_id']
+            self.details_in_flight += 1
+            self.max_details_in_flight = max(self.max_details_in_flight, self.details_in_flight)
+            await asyncio.sleep(self.detail_delays.get(campaign_id, 0))
+            self.details_in_flight -= 1
+            self.details_finished.append(campaign_id)
+            return httpx.Response(200, json={'campaign': {'id': campaign_id}})
+        return httpx.Response(404)
+
+@pytest.fixture
+def braze(monkeypatch):
+    fake = _FakeBraze([_campaign(number) for number in range(600)])
+    for name in ('_campaign_list_cache', '_campaign_list_locks', '_braze_rate_limiters',
+                 '_braze_auth_cache', '_detail_endpoint_stats'):
+        monkeypatch.setattr(fetcher, name, {})
+    monkeypatch.setattr(fetcher, 'BRAZE_REQUESTS_PER_SECOND', 0)
+    monkeypatch.setattr(fetcher, '_http_client', httpx.AsyncClient(transport=httpx.MockTransport(fake.handle)))
+    return fake
+
+def _run(test):
+    """Runs test(client) with a client of the fetcher app, all on one event loop"""
+    async def main():
+        transport = httpx.ASGITransport(app=fetcher.app)
+        async with httpx.AsyncClient(transport=transport, base_url='http://fetcher', headers=HEADERS) as client:
+            return await test(client)
+    return asyncio.run(main())
+
+def _ids(response):
+    return [summary['id'] for summary in response.json()]
+
+# --- Campaign list cache ---
+
+def test_refresh_reads_only_new_and_edited_campaigns(braze, monkeypatch):
+    monkeypatch.setattr(fetcher, 'CAMPAIGN_LIST_TTL_SECONDS', 3600)
+
+    async def test(client):
+        first = await client.get('/campaigns/')
+        assert _ids(first) == [f'c{number}' for number in range(600)]
+
+        # Filter changes are served from the cached list
+        braze.list_starts.clear()
+        active = await client.get('/campaigns/', params={'status': 'active', 'limit': 5})
+        assert _ids(active) == ['c0', 'c1', 'c2', 'c3', 'c4']
+        assert braze.list_starts == []
+
+        monkeypatch.setattr(fetcher, 'CAMPAIGN_LIST_TTL_SECONDS', 0)
+        braze.edit('c300', 200000)
+        braze.campaigns.insert(0, _campaign(600, last_edited=200001))
+        return await client.get('/campaigns/')
+
+    refreshed = _run(test)
+
+    assert braze.list_starts == [0]
+    assert _ids(refreshed) == ['c600', 'c300'] + [f'c{number}' for number in range(600) if number != 300]
+    assert refreshed.headers['X-Total-Count'] == '601'
+    summaries = {summary['id']: summary for summary in refreshed.json()}
+    assert summaries['c300']['last_edited'] == 200000
+    assert summaries['c299']['last_edited'] == 100000 - 299
+
+def test_refresh_without_changes_reads_one_page(braze, monkeypatch):
+    monkeypatch.setattr(fetcher, 'CAMPAIGN_LIST_TTL_SECONDS', 0)
+
+    async def test(client):
+        first = await client.get('/campaigns/')
+        braze.list_starts.clear()
+        return first, await client.get('/campaigns/')
+
+    first, refreshed = _run(test)
+
+    assert braze.list_starts == [0]
+    assert refreshed.json() == first.json()
+
+# --- JSONL export ---
+
+def _export_ids(response):
+    return [json.loads(line)['campaign']['id'] for line in response.text.splitlines()]
+
+def test_export_keeps_list_order_while_details_finish_out_of_order(braze, monkeypatch):
+    monkeypatch.setattr(fetcher, 'EXPORT_CONCURRENCY', 8)
+    braze.campaigns = [_campaign(number) for number in range(6)]
+    # The first campaign of the list is the slowest to fetch
+    braze.detail_delays = {f'c{number}': (6 - number) * 0.02 for number in range(6)}
+
+    response = _run(lambda client: client.get('/campaigns/export/jsonl'))
+
+    assert _export_ids(response) == ['c0', 'c1', 'c2', 'c3', 'c4', 'c5']
+    assert braze.details_finished == ['c5', 'c4', 'c3', 'c2', 'c1', 'c0']
+
+def test_unordered_export_streams_details_as_they_finish(braze, monkeypatch):
+    monkeypatch.setattr(fetcher, 'EXPORT_CONCURRENCY', 8)
+    braze.campaigns = [_campaign(number) for number in range(6)]
+    braze.detail_delays = {f'c{number}': (6 - number) * 0.02 for number in range(6)}
+
+    response = _run(lambda client: client.get('/campaigns/export/jsonl', params={'unordered': 'true'}))
+
+    assert _export_ids(response) == braze.details_finished == ['c5', 'c4', 'c3', 'c2', 'c1', 'c0']
+
+def test_export_never_runs_more_than_the_concurrency_limit(braze, monkeypatch):
+    monkeypatch.setattr(fetcher, 'EXPORT_CONCURRENCY', 3)
+    braze.campaigns = [_campaign(number) for number in range(10)]
+    braze.detail_delays = {f'c{number}': 0.01 for number in range(10)}
+
+    response = _run(lambda client: client.get('/campaigns/export/jsonl'))
+
+    assert _export_ids(response) == [f'c{number}' for number in range(10)]
+    assert braze.max_details_in_flight == 3
+
+# --- Cursor pagination ---
+
+async def _walk_pages(client, params, between_pages=None):
+    """Every campaign id of a cursor walk, calling between_pages() after each page"""
+    ids = []
+    cursor = None
+    while True:
+        page = (await client.get('/campaigns/page', params={**params, **({'cursor': cursor} if cursor else {})})).json()
+        ids.extend(summary['id'] for summary in page['campaigns'])
+        cursor = page['next_cursor']
+        if cursor is None:
+            return ids
+        if between_pages:
+            between_pages()
+
+def test_cursor_walk_returns_every_campaign_once(braze, monkeypatch):
+    monkeypatch.setattr(fetcher, 'CAMPAIGN_LIST_TTL_SECONDS', 3600)
+
+    ids = _run(lambda client: _walk_pages(client, {'limit': 7}))
+
+    assert ids == [f'c{number}' for number in range(600)]
+
+def test_cursor_walk_has_no_duplicates_while_campaigns_are_edited(braze, monkeypatch):
+    monkeypatch.setattr(fetcher, 'CAMPAIGN_LIST_TTL_SECONDS', 0)
+    braze.campaigns = [_campaign(number, status='active' if number % 3 else 'draft') for number in range(30)]
+    edits = iter([('c1', 200000), ('c20', 200001), ('c7', 200002), ('c29', 200003)])
+
+    def edit_next():
+        campaign_id, last_edited = next(edits, (None, None))
+        if campaign_id:
+            braze.edit(campaign_id, last_edited)
+
+    ids = _run(lambda client: _walk_pages(client, {'limit': 4, 'status': 'active'}, edit_next))
+
+    assert len(ids) == len(set(ids))
+    # Campaigns edited before the walk reached them move behind the cursor
+    active = {f'c{number}' for number in range(30) if number % 3}
+    assert active - set(ids) <= {'c20', 'c29'}
+    assert set(ids) <= active
+
+def test_invalid_cursor_is_rejected(braze):
+    response = _run(lambda client: client.get('/campaigns/page', params={'cursor': 'not a cursor'}))
+    assert response.status_code == 400
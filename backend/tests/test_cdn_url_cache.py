@@ -0,0 +1,121 @@
+"""
+Tests for CdnUrlCache, the SQLite store of uploaded image URLs.
+
+Usage (from the backend directory):
+    python -m pytest tests
+"""
+
+import sqlite3
+
+import pytest
+
+from migration_core import cdn_url_cache
+from migration_core.cdn_url_cache import CdnUrlCache
+
+HEADERS = {'origin': 'https://dashboard-01.moengage.com'}
+
+class _Clock:
+    def __init__(self):
+        self.now = 1_700_000_000.0
+
+    def time(self):
+        return self.now
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = _Clock()
+    monkeypatch.setattr(cdn_url_cache, 'time', fake)
+    return fake
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / 'cdn_url_cache.sqlite3')
+
+def test_entries_expire_after_ttl(path, clock):
+    cache = CdnUrlCache(path, ttl_seconds=60, max_entries=100)
+    scope = CdnUrlCache.scope_for(HEADERS, 'app-a')
+    cache.put(scope, 'https://braze-images.com/a.png', 'https://cdn.moengage.com/a.png', 'hash-a')
+
+    clock.now += 59
+    assert cache.get(scope, 'https://braze-images.com/a.png') == 'https://cdn.moengage.com/a.png'
+    assert cache.get_by_content(scope, 'hash-a') == 'https://cdn.moengage.com/a.png'
+
+    clock.now += 2
+    assert cache.get(scope, 'https://braze-images.com/a.png') is None
+    assert cache.get_by_content(scope, 'hash-a') is None
+    assert cache.stats()['entries'] == 0
+
+def test_evicts_least_recently_used_past_max_entries(path, clock):
+    cache = CdnUrlCache(path, ttl_seconds=3600, max_entries=3)
+    scope = CdnUrlCache.scope_for(HEADERS, 'app-a')
+    for name in ('a', 'b', 'c'):
+        clock.now += 1
+        cache.put(scope, f'https://braze-images.com/{name}.png', f'https://cdn.moengage.com/{name}.png')
+    # Reading "a" makes "b" the least recently used
+    clock.now += 1
+    assert cache.get(scope, 'https://braze-images.com/a.png')
+    clock.now += 1
+    cache.put(scope, 'https://braze-images.com/d.png', 'https://cdn.moengage.com/d.png')
+
+    assert cache.get(scope, 'https://braze-images.com/b.png') is None
+    for name in ('a', 'c', 'd'):
+        assert cache.get(scope, f'https://braze-images.com/{name}.png') == f'https://cdn.moengage.com/{name}.png'
+    assert cache.stats()['entries'] == 3
+
+def test_trims_only_every_trim_every_writes(path, clock):
+    cache = CdnUrlCache(path, ttl_seconds=3600, max_entries=2, trim_every=3)
+    scope = CdnUrlCache.scope_for(HEADERS, 'app-a')
+    entries = []
+    for i in range(6):
+        clock.now += 1
+        cache.put(scope, f'https://braze-images.com/{i}.png', f'https://cdn.moengage.com/{i}.png')
+        entries.append(cache.stats()['entries'])
+
+    assert entries == [1, 2, 2, 3, 4, 2]
+    assert cache.get(scope, 'https://braze-images.com/5.png') == 'https://cdn.moengage.com/5.png'
+    assert cache.get(scope, 'https://braze-images.com/3.png') is None
+
+def test_scopes_are_isolated_by_app_key(path, clock):
+    cache = CdnUrlCache(path, ttl_seconds=3600, max_entries=100)
+    workspace_a = CdnUrlCache.scope_for(HEADERS, 'app-a')
+    workspace_b = CdnUrlCache.scope_for(HEADERS, 'app-b')
+    cache.put(workspace_a, 'https://braze-images.com/a.png', 'https://cdn.moengage.com/a.png', 'hash-a')
+
+    assert cache.get(workspace_b, 'https://braze-images.com/a.png') is None
+    assert cache.get_by_content(workspace_b, 'hash-a') is None
+    assert cache.get(workspace_a, 'https://braze-images.com/a.png') == 'https://cdn.moengage.com/a.png'
+
+def test_same_app_key_on_another_dashboard_is_another_scope():
+    other_dashboard = {'origin': 'https://dashboard-02.moengage.com'}
+    assert CdnUrlCache.scope_for(HEADERS, 'app-a') != CdnUrlCache.scope_for(other_dashboard, 'app-a')
+
+def test_nothing_is_cached_without_an_app_key(path, clock):
+    cache = CdnUrlCache(path, ttl_seconds=3600, max_entries=100)
+    scope = CdnUrlCache.scope_for(HEADERS, None)
+    assert scope is None
+    cache.put(scope, 'https://braze-images.com/a.png', 'https://cdn.moengage.com/a.png', 'hash-a')
+
+    assert cache.get(scope, 'https://braze-images.com/a.png') is None
+    assert cache.stats()['entries'] == 0
+
+def test_unscoped_entries_are_purged_once_per_file(path, clock):
+    connection = sqlite3.connect(path)
+    connection.execute(
+        'CREATE TABLE cdn_urls (scope TEXT NOT NULL, source_url TEXT NOT NULL, moe_cdn_url TEXT NOT NULL, '
+        'created_at REAL NOT NULL, last_used REAL NOT NULL, PRIMARY KEY (scope, source_url))'
+    )
+    connection.execute("INSERT INTO cdn_urls VALUES ('https://dashboard-01.moengage.com', 'old', 'x', 0, 0)")
+    connection.commit()
+    connection.close()
+
+    CdnUrlCache(path, ttl_seconds=3600, max_entries=100).stats()
+
+    connection = sqlite3.connect(path)
+    assert connection.execute('SELECT COUNT(*) FROM cdn_urls').fetchone()[0] == 0
+    assert connection.execute('PRAGMA user_version').fetchone()[0] == CdnUrlCache.SCHEMA_VERSION
+    # A row no current version writes, to show the purge does not run again
+    connection.execute("INSERT INTO cdn_urls VALUES ('https://dashboard-01.moengage.com', 'old', 'x', 0, 0)")
+    connection.commit()
+    connection.close()
+
+    assert CdnUrlCache(path, ttl_seconds=3600, max_entries=100).stats()['entries'] == 1
@@ -0,0 +1,82 @@
+"""
+Tests for ConversionCache, the LRU cache behind convert_liquid_to_jinja().
+
+Usage (from the backend directory):
+    python -m pytest tests
+"""
+
+import sys
+
+from migration_core.liquid_to_jinja import ConversionCache
+
+def _key(name):
+    return ConversionCache.key_for(name)
+
+def test_evicts_least_recently_used_past_max_entries():
+    cache = ConversionCache(max_entries=3, max_bytes=1 << 20)
+    for name in ('a', 'b', 'c'):
+        cache.put(_key(name), name.upper())
+    # Reading "a" makes "b" the least recently used
+    assert cache.get(_key('a')) == 'A'
+    cache.put(_key('d'), 'D')
+
+    assert cache.get(_key('b')) is None
+    assert [cache.get(_key(name)) for name in ('a', 'c', 'd')] == ['A', 'C', 'D']
+    assert cache.stats()['entries'] == 3
+
+def test_evicts_oldest_past_max_bytes():
+    value = 'x' * 1000
+    size = sys.getsizeof(value)
+    cache = ConversionCache(max_entries=100, max_bytes=2 * size)
+    cache.put(_key('a'), value)
+    cache.put(_key('b'), value)
+    cache.put(_key('c'), value)
+
+    assert cache.get(_key('a')) is None
+    assert cache.get(_key('b')) == value
+    assert cache.stats()['bytes'] == 2 * size
+
+def test_charges_memory_not_characters():
+    ascii_value = 'a' * 1000
+    emoji_value = '\U0001F680' * 1000
+    cache = ConversionCache(max_entries=10, max_bytes=1 << 20)
+    cache.put(_key('ascii'), ascii_value)
+    ascii_bytes = cache.stats()['bytes']
+    cache.put(_key('emoji'), emoji_value)
+
+    assert cache.stats()['bytes'] - ascii_bytes >= 4 * len(emoji_value)
+
+def test_skips_values_larger_than_max_bytes():
+    cache = ConversionCache(max_entries=10, max_bytes=100)
+    cache.put(_key('a'), 'x' * 1000)
+    assert cache.get(_key('a')) is None
+    assert cache.stats()['entries'] == 0
+
+def test_replacing_a_key_keeps_one_entry():
+    cache = ConversionCache(max_entries=10, max_bytes=1 << 20)
+    cache.put(_key('a'), 'first')
+    cache.put(_key('a'), 'second')
+    assert cache.get(_key('a')) == 'second'
+    assert cache.stats()['entries'] == 1
+    assert cache.stats()['bytes'] == sys.getsizeof('second')
+
+def test_counts_hits_and_misses():
+    cache = ConversionCache(max_entries=10, max_bytes=1 << 20)
+    cache.get(_key('a'))
+    cache.put(_key('a'), 'A')
+    cache.get(_key('a'))
+    cache.get(_key('a'))
+    cache.get(_key('b'))
+
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses']) == (2, 2)
+    assert stats['hit_rate'] == 0.5
+
+    cache.clear()
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses'], stats['entries'], stats['bytes']) == (0, 0, 0, 0)
+
+def test_disabled_with_zero_entries():
+    cache = ConversionCache(max_entries=0, max_bytes=1 << 20)
+    cache.put(_key('a'), 'A')
+    assert cache.get(_key('a')) is None
@@ -0,0 +1,210 @@
+"""
+Tests for the Braze CDN -> MoEngage CDN image pipeline, run against a stub
+HTTP session so no request leaves the process.
+
+Usage (from the backend directory):
+    python -m pytest tests
+"""
+
+import time
+import threading
+
+import pytest
+
+from migration_core import image_pipeline
+from migration_core.cdn_url_cache import CdnUrlCache
+from migration_core.image_pipeline import BrazeCdnToMoenageCdn, _PayloadUploads, extract_braze_image_urls, replace_urls
+
+HEADERS = {'authorization': 'Bearer token', 'origin': 'https://dashboard-01.moengage.com'}
+
+class _StubResponse:
+    def __init__(self, status_code, content=b'', body=None):
+        self.status_code = status_code
+        self.content = content
+        self.headers = {'content-type': 'image/png'}
+        self._body = body
+
+    def iter_content(self, chunk_size):
+        for start in range(0, len(self.content), chunk_size):
+            yield self.content[start:start + chunk_size]
+
+    def json(self):
+        return self._body
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+class _StubSession:
+    """Serves images from a dict and answers every upload with a new CDN URL"""
+
+    def __init__(self, images, delay=0.0):
+        self.images = images
+        self.delay = delay
+        self.uploads = []
+        self.in_flight = {}
+        self.max_in_flight = {}
+        self._lock = threading.Lock()
+
+    def _enter(self, host):
+        with self._lock:
+            self.in_flight[host] = self.in_flight.get(host, 0) + 1
+            self.max_in_flight[host] = max(self.max_in_flight.get(host, 0), self.in_flight[host])
+
+    def _leave(self, host):
+        with self._lock:
+            self.in_flight[host] -= 1
+
+    def get(self, url, headers=None, timeout=None, stream=False):
+        host = url.split('/')[2]
+        self._enter(host)
+        try:
+            time.sleep(self.delay)
+        finally:
+            self._leave(host)
+        if url not in self.images:
+            return _StubResponse(404)
+        return _StubResponse(200, self.images[url])
+
+    def post(self, url, headers=None, files=None, timeout=None):
+        data = files['file'][1].read()
+        with self._lock:
+            self.uploads.append(data)
+            number = len(self.uploads)
+        return _StubResponse(201, body={'url': f'https://cdn.moengage.com/{number}.png'})
+
+@pytest.fixture
+def session(monkeypatch):
+    stub = _StubSession({})
+    monkeypatch.setattr(image_pipeline, 'get_http_session', lambda: stub)
+    # Neither read nor write the SQLite store of the machine running the tests
+    monkeypatch.setattr(image_pipeline, 'CDN_URL_CACHE', CdnUrlCache('', ttl_seconds=60, max_entries=0))
+    monkeypatch.setattr(image_pipeline, '_host_limits', {})
+    return stub
+
+# --- Per-host limit ---
+
+def test_requests_to_one_host_stay_within_the_limit(session, monkeypatch):
+    monkeypatch.setattr(image_pipeline, 'IMAGE_PER_HOST_LIMIT', 2)
+    monkeypatch.setattr(image_pipeline, 'IMAGE_REHOST_CONCURRENCY', 8)
+    session.delay = 0.05
+    urls = [f'https://braze-images.com/{i}.png' for i in range(8)]
+    session.images = {url: url.encode() for url in urls}
+
+    BrazeCdnToMoenageCdn.process_images(' '.join(urls), HEADERS)
+
+    assert session.max_in_flight['braze-images.com'] == 2
+    assert len(session.uploads) == 8
+
+def test_hosts_have_separate_limits(session, monkeypatch):
+    monkeypatch.setattr(image_pipeline, 'IMAGE_PER_HOST_LIMIT', 1)
+    session.delay = 0.05
+    urls = [f'https://braze-images.com/{i}.png' for i in range(3)] + [f'https://appboy-images.com/{i}.png' for i in range(3)]
+    session.images = {url: url.encode() for url in urls}
+
+    BrazeCdnToMoenageCdn.process_images(' '.join(urls), HEADERS)
+
+    assert session.max_in_flight == {'braze-images.com': 1, 'appboy-images.com': 1}
+
+# --- Uploads of identical bytes ---
+
+def test_identical_images_are_uploaded_once(session):
+    same = [f'https://braze-images.com/banner.png?{version}' for version in (1, 2, 3)]
+    other = 'https://braze-images.com/logo.png'
+    session.images = {**{url: b'banner bytes' for url in same}, other: b'logo bytes'}
+
+    payload = BrazeCdnToMoenageCdn.process_images(' '.join(same + [other]), HEADERS)
+
+    assert sorted(session.uploads) == [b'banner bytes', b'logo bytes']
+    rehosted = payload.split(' ')
+    assert len(set(rehosted[:3])) == 1
+    assert rehosted[3] != rehosted[0]
+    assert all(url.startswith('https://cdn.moengage.com/') for url in rehosted)
+
+def test_upload_once_runs_one_upload_per_hash():
+    uploads = _PayloadUploads()
+    calls = []
+    started = threading.Event()
+
+    def upload():
+        calls.append(1)
+        started.set()
+        time.sleep(0.05)
+        return 'https://cdn.moengage.com/a.png'
+
+    results = []
+    def worker():
+        results.append(uploads.upload_once('hash', upload))
+
+    first = threading.Thread(target=worker)
+    first.start()
+    started.wait()
+    others = [threading.Thread(target=worker) for _ in range(3)]
+    for thread in others:
+        thread.start()
+    for thread in [first] + others:
+        thread.join()
+
+    assert len(calls) == 1
+    assert sorted(results) == [('https://cdn.moengage.com/a.png', False)] + [('https://cdn.moengage.com/a.png', True)] * 3
+
+def test_upload_once_retries_after_a_failed_upload():
+    uploads = _PayloadUploads()
+    assert uploads.upload_once('hash', lambda: None) == (None, False)
+    assert uploads.upload_once('hash', lambda: 'https://cdn.moengage.com/b.png') == ('https://cdn.moengage.com/b.png', False)
+
+# --- URL replacement ---
+
+def test_replace_urls_prefers_the_longest_url():
+    short = 'https://braze-images.com/a.png'
+    long = 'https://braze-images.com/a.png?v=2'
+    payload = f'<img src="{long}"><img src="{short}">'
+
+    replaced = replace_urls(payload, {short: 'SHORT', long: 'LONG'})
+
+    assert replaced == '<img src="LONG"><img src="SHORT">'
+
+def test_replace_urls_leaves_a_longer_unknown_url_partly_replaced_like_str_replace():
+    short = 'https://braze-images.com/a.png'
+    payload = f'{short}?v=9 {short}'
+    assert replace_urls(payload, {short: 'NEW'}) == payload.replace(short, 'NEW')
+
+def test_replace_urls_handles_urls_shorter_than_the_prefix():
+    assert replace_urls('x https://b.co/ y https://b.co/a z', {'https://b.co/': 'ROOT', 'https://b.co/a': 'A'}) == 'x ROOT y A z'
+
+def test_replace_urls_does_not_rescan_replacements():
+    assert replace_urls('https://a.com/1', {'https://a.com/1': 'https://a.com/12', 'https://a.com/12': 'loop'}) == 'https://a.com/12'
+
+def test_replace_urls_without_matches_returns_payload():
+    assert replace_urls('no images here', {'https://braze-images.com/a.png': 'x'}) == 'no images here'
+    assert replace_urls('https://braze-images.com/a.png', {}) == 'https://braze-images.com/a.png'
+
+# --- URL extraction ---
+
+def test_extracts_braze_image_urls_in_order_without_duplicates():
+    payload = (
+        '<img src="https://braze-images.com/a.png">'
+        '<img src="https://example.com/b.png">'
+        '<img src="https://appboy-images.com/x/logo.gif">'
+        '<img src="https://braze-images.com/a.png">'
+    )
+    assert extract_braze_image_urls(payload) == ['https://braze-images.com/a.png', 'https://appboy-images.com/x/logo.gif']
+
+def test_extracts_urls_with_html_escaped_query_strings():
+    payload = '<img src="https://braze-images.com/q.png?a=1&amp;b=2">'
+    assert extract_braze_image_urls(payload) == ['https://braze-images.com/q.png?a=1&b=2']
+
+def test_skips_braze_urls_that_end_in_a_slash():
+    assert extract_braze_image_urls('see https://cdn-staging.braze.com/dir/ for more') == []
+
+def test_finds_images_on_every_braze_host_pattern():
+    urls = [
+        'https://braze-images.com/1.png',
+        'https://cdn-staging.braze.com/2.png',
+        'https://braze-social-icons.s3.amazonaws.com/3.png',
+        'https://braze-assets.s3.amazonaws.com/4.png',
+        'https://appboy-images.com/5.png',
+    ]
+    assert extract_braze_image_urls(' '.join(urls)) == urls
@@ -0,0 +1,67 @@
+"""
+Streaming tests for the Liquid -> Jinja converter: large bodies must come
+out piece by piece, in memory proportional to the chunk size.
+
+Usage (from the backend directory):
+    python -m pytest tests
+"""
+
+import os
+import time
+import tracemalloc
+
+os.environ.setdefault('LIQUID_CACHE_MAX_ENTRIES', '0')
+
+from migration_core.liquid_to_jinja import convert_liquid_to_jinja, convert_liquid_to_jinja_stream
+
+CHUNK_SIZE = 16 * 1024
+LINE = '<p>Hi {{ first_name | upcase }}, {% if vip %}thanks{% endif %} - see you soon</p>\n'
+
+def _email_lines(count):
+    """An email whose only utm_content= value has no "&" anywhere after it"""
+    yield '<a href="https://example.com/offer?utm_source=braze&utm_content=spring-sale">Shop</a>\n'
+    for _ in range(count):
+        yield LINE
+
+class _CountingPieces:
+    def __init__(self, pieces):
+        self.pieces = pieces
+        self.consumed = 0
+
+    def __iter__(self):
+        for piece in self.pieces:
+            self.consumed += len(piece)
+            yield piece
+
+def test_unterminated_utm_content_streams_without_holding_back():
+    line_count = (1024 * 1024) // len(LINE)
+    body_size = line_count * len(LINE)
+    pieces = _CountingPieces(_email_lines(line_count))
+
+    tracemalloc.start()
+    try:
+        started = time.perf_counter()
+        stream = convert_liquid_to_jinja_stream(pieces, chunk_size=CHUNK_SIZE)
+        first = next(stream)
+        first_yield_seconds = time.perf_counter() - started
+        consumed_at_first_yield = pieces.consumed
+        for _ in stream:
+            pass
+        total_seconds = time.perf_counter() - started
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    assert 'utm_content=spring_sale"' in first
+    assert consumed_at_first_yield <= 4 * CHUNK_SIZE
+    assert first_yield_seconds < total_seconds / 10
+    assert peak < body_size / 4
+
+def test_unterminated_utm_content_stream_matches_convert():
+    body = ''.join(_email_lines(2000))
+    streamed = ''.join(convert_liquid_to_jinja_stream(body, chunk_size=1024))
+    assert streamed == convert_liquid_to_jinja(body)
+
+def test_utm_content_value_stops_at_end_of_url():
+    liquid = 'https://x.com/?utm_content=a-b then plain-text & more'
+    assert convert_liquid_to_jinja(liquid) == 'https://x.com/?utm_content=a_b then plain-text & more'
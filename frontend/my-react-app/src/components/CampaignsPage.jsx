@@ -1,5 +1,4 @@
 import React, { useState, useEffect } from 'react';
-import axios from 'axios';
 import { useNavigate } from 'react-router-dom';
 import MoEngageAuthModal from './MoEngageAuthModal';
 
@@ -19,6 +18,9 @@ function CampaignsPage() {
 
   // useEffect hook to fetch data when the component mounts
   useEffect(() => {
+    // Stops the stream when the page is left before it finishes
+    const controller = new AbortController();
+
     const fetchCampaigns = async () => {
       // Retrieve the stored Braze credentials from localStorage
       const brazeCredentials = localStorage.getItem('brazeCredentials');
@@ -35,8 +37,10 @@ function CampaignsPage() {
       try {
         const credentials = JSON.parse(brazeCredentials);
         
-        // Make the API call directly to the FastAPI Braze Campaign Fetcher
-        const response = await axios.get('http://localhost:8082/campaigns/', {
+        // Stream the campaign summaries from the FastAPI Braze Campaign Fetcher
+        // as NDJSON, so the first ones render before the whole list arrives
+        const response = await fetch('http://localhost:8082/campaigns/stream', {
+          signal: controller.signal,
           headers: {
             'X-Dashboard-Url': `https://dashboard-${String(credentials.dashboard_number || 9).padStart(2, '0')}.braze.com`,
             'X-Session-Id': credentials.session_id,
@@ -44,29 +48,62 @@ function CampaignsPage() {
           },
         });
 
-        // The FastAPI returns an array of campaign summaries directly
-        if (response.data && Array.isArray(response.data)) {
-          // Debug: Log the first campaign to see the actual data structure
-          if (response.data.length > 0) {
-            console.log('Sample campaign data from API:', response.data[0]);
+        if (!response.ok) {
+          let detail = null;
+          try {
+            detail = (await response.json()).detail;
+          } catch {
+            // Not a JSON error body
           }
-          
-          // Map the FastAPI response format to the expected frontend format
-          const mappedCampaigns = response.data.map(campaign => ({
-            id: campaign.id,
-            name: campaign.name,
-            type: campaign.type === 'multi' ? 'multi' : campaign.type, // Keep 'multi' for push campaigns
-            created: campaign.created,
-            last_edit: campaign.last_edit,
-            message_types: campaign.message_types || [],
-            variation_count: campaign.variation_count || 0
-          }));
-          
-          setCampaigns(mappedCampaigns);
-        } else {
-          setError('Unexpected response format from Braze API.');
+          const err = new Error(detail || `Error ${response.status}: ${response.statusText}`);
+          err.response = { status: response.status, statusText: response.statusText, data: { detail } };
+          throw err;
+        }
+
+        // Map the FastAPI response format to the expected frontend format
+        const mapCampaign = campaign => ({
+          id: campaign.id,
+          name: campaign.name,
+          type: campaign.type === 'multi' ? 'multi' : campaign.type, // Keep 'multi' for push campaigns
+          created: campaign.created,
+          last_edit: campaign.last_edit,
+          message_types: campaign.message_types || [],
+          variation_count: campaign.variation_count || 0
+        });
+
+        setCampaigns([]);
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        let buffered = '';
+        let received = 0;
+        while (true) {
+          const { done, value } = await reader.read();
+          buffered += decoder.decode(value || new Uint8Array(), { stream: !done });
+          const lines = buffered.split('\n');
+          buffered = done ? '' : lines.pop();
+          const records = lines.filter(line => line.trim()).map(line => JSON.parse(line));
+          // A failure after the stream started arrives as its last record
+          const failure = records.find(record => record.error);
+          if (failure) {
+            const { status_code: status, detail } = failure.error;
+            const err = new Error(detail);
+            err.response = { status, statusText: detail, data: { detail } };
+            throw err;
+          }
+          const batch = records.map(mapCampaign);
+          if (batch.length > 0) {
+            // Debug: Log the first campaign to see the actual data structure
+            if (received === 0) {
+              console.log('Sample campaign data from API:', batch[0]);
+            }
+            received += batch.length;
+            setCampaigns(previous => [...previous, ...batch]);
+            setLoading(false); // Show what has arrived so far
+          }
+          if (done) break;
         }
       } catch (err) {
+        if (err.name === 'AbortError') return;
         // Handle network errors
         let errorMessage = 'An unexpected error occurred.';
         if (err.response) {
@@ -79,7 +116,7 @@ function CampaignsPage() {
           } else {
             errorMessage = `Error ${err.response.status}: ${err.response.statusText}`;
           }
-        } else if (err.request) {
+        } else if (err instanceof TypeError) {
           errorMessage = 'Cannot connect to the Braze Campaign Fetcher service. Is it running on port 8082?';
         } else {
           errorMessage = err.message;
@@ -92,6 +129,7 @@ function CampaignsPage() {
     };
 
     fetchCampaigns();
+    return () => controller.abort();
   }, [navigate]); // Add navigate to the dependency array
 
   // Filter and search functionality - Show all campaigns but only allow email/multi selection
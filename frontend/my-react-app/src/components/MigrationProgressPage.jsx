@@ -302,7 +302,8 @@ function MigrationProgressPage() {
             bearer_token: credentials.bearer_token,
             refresh_token: credentials.refresh_token,
             origin: credentials.origin || 'https://dashboard-01.moengage.com',
-            api_url: credentials.api_url || 'https://dashboard-01.moengage.com/v1.0/campaigns/draft'
+            api_url: credentials.api_url || 'https://dashboard-01.moengage.com/v1.0/campaigns/draft',
+            app_key: credentials.app_key || null
           }
         };
         break;
@@ -317,7 +318,8 @@ function MigrationProgressPage() {
             bearer_token: credentials.bearer_token,
             refresh_token: credentials.refresh_token,
             origin: credentials.origin || 'https://dashboard-01.moengage.com',
-            api_url: credentials.api_url || 'https://dashboard-01.moengage.com/v1.0/campaigns/draft'
+            api_url: credentials.api_url || 'https://dashboard-01.moengage.com/v1.0/campaigns/draft',
+            app_key: credentials.app_key || null
           }
         };
         break;
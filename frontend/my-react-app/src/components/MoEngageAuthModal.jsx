@@ -4,6 +4,7 @@ function MoEngageAuthModal({ isOpen, onClose, onAuthenticate, selectedCampaigns
   const [authData, setAuthData] = useState({
     bearer_token: '',
     refresh_token: '',
+    app_key: '',
     data_center: 'dashboard-01',
     api_url: 'https://dashboard-01.moengage.com/v1.0/campaigns/draft'
   });
@@ -35,6 +36,7 @@ function MoEngageAuthModal({ isOpen, onClose, onAuthenticate, selectedCampaigns
             ...prev,
             bearer_token: tokens.bearer_token || '',
             refresh_token: tokens.refresh_token || '',
+            app_key: tokens.app_key || '',
             data_center: tokens.data_center || 'dashboard-01',
             api_url: `https://${tokens.data_center || 'dashboard-01'}.moengage.com/v1.0/campaigns/draft`
           }));
@@ -59,6 +61,7 @@ function MoEngageAuthModal({ isOpen, onClose, onAuthenticate, selectedCampaigns
       localStorage.setItem('moEngageTokens', JSON.stringify({
         bearer_token: tokens.bearer_token,
         refresh_token: tokens.refresh_token,
+        app_key: tokens.app_key || '',
         data_center: tokens.data_center || 'dashboard-01'
       }));
       localStorage.setItem('moEngageTokensExpiry', expiryTime.getTime().toString());
@@ -68,6 +71,7 @@ function MoEngageAuthModal({ isOpen, onClose, onAuthenticate, selectedCampaigns
       let credentialsToSave = {
         bearerToken: tokens.bearer_token,
         refreshToken: tokens.refresh_token,
+        ...(tokens.app_key && { appKey: tokens.app_key }),
         apiUrl: tokens.api_url || `https://${tokens.data_center || 'dashboard-01'}.moengage.com/v1.0/campaigns/draft`,
         origin: `https://${tokens.data_center || 'dashboard-01'}.moengage.com`,
         dataCenter: tokens.data_center || 'dashboard-01'
@@ -124,6 +128,7 @@ function MoEngageAuthModal({ isOpen, onClose, onAuthenticate, selectedCampaigns
     setAuthData({
       bearer_token: '',
       refresh_token: '',
+      app_key: '',
       data_center: 'dashboard-01',
       api_url: 'https://dashboard-01.moengage.com/v1.0/campaigns/draft'
     });
@@ -527,6 +532,54 @@ function MoEngageAuthModal({ isOpen, onClose, onAuthenticate, selectedCampaigns
             />
           </div>
 
+          <div style={{ marginBottom: '24px' }}>
+            <label style={{
+              display: 'block',
+              color: '#1D244F', // Deep Navy
+              marginBottom: '8px',
+              fontSize: '15px',
+              fontWeight: '600'
+            }}>
+              App Key
+            </label>
+            <input
+              type="text"
+              value={authData.app_key}
+              onChange={(e) => setAuthData({...authData, app_key: e.target.value})}
+              placeholder="Enter your MoEngage workspace App Key"
+              style={{
+                width: '100%',
+                padding: '14px 16px',
+                backgroundColor: '#F9FAFB', // --color-bg-primary
+                border: '2px solid #E5E7EB', // --color-border-subtle
+                borderRadius: '8px',
+                color: '#111827', // --color-text-primary
+                fontSize: '15px',
+                outline: 'none',
+                boxSizing: 'border-box',
+                transition: 'border-color 0.2s ease, box-shadow 0.2s ease',
+                fontFamily: 'system-ui, -apple-system, sans-serif'
+              }}
+              onFocus={(e) => {
+                e.target.style.borderColor = '#00AFB9'; // Vibrant Teal
+                e.target.style.boxShadow = '0 0 0 3px rgba(0, 175, 185, 0.1)';
+              }}
+              onBlur={(e) => {
+                e.target.style.borderColor = '#E5E7EB';
+                e.target.style.boxShadow = 'none';
+              }}
+            />
+            <small style={{ 
+              color: '#6B7280', // --color-text-secondary
+              fontSize: '13px',
+              display: 'block',
+              marginTop: '6px',
+              fontStyle: 'italic'
+            }}>
+              ℹ️ Optional. With it, images uploaded to this workspace in earlier migrations are reused instead of uploaded again
+            </small>
+          </div>
+
           <div style={{ marginBottom: '30px' }}>
             <label style={{
               display: 'block',
@@ -599,6 +652,7 @@ function MoEngageAuthModal({ isOpen, onClose, onAuthenticate, selectedCampaigns
                   setAuthData({
                     bearer_token: '',
                     refresh_token: '',
+                    app_key: '',
                     data_center: 'dashboard-01',
                     api_url: 'https://dashboard-01.moengage.com/v1.0/campaigns/draft'
                   });